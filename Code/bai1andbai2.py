@@ -1,78 +1,29 @@
-import time
 import pandas as pd
-from bs4 import BeautifulSoup, Comment
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from io import StringIO
-import matplotlib.pyplot as plt
+import argparse
 import os
+import subprocess
+import sys
+from browser_pool import browser_pool_from_args
+from cleaning import country_codes, format_player_names, parse_ages
+from fbref_config import (competitions, decimal_columns, default_competition, default_season, integer_columns, key_column,
+                          season_name, stat_urls_for, table_identifiers, text_columns)
+from fetch_pages import fetch_pages
+from instrumentation import stage, trace_from_args
+from page_cache import page_cache_from_args
+from player_dataset import write_partition
+from player_store import current_player_columns, load_current_players, open_store
+from compact_table import load_compact_players, stat_chunks
+from player_table import write_player_table
+from project_paths import root_dir_from_args
+from rankings import top_k_rankings, write_rankings_text
+from summaries import summarize
+from table_extract import PlayerKeyError, extract_tables
 
-def parse_age_to_decimal(age_str):
-    try:
-        if pd.isna(age_str) or age_str == "N/A":
-            return "N/A"
-        age_str = str(age_str).strip()
-        if "-" in age_str:
-            years, days = map(int, age_str.split("-"))
-            decimal_age = years + (days / 365)
-            return round(decimal_age, 2)
-        if "." in age_str:
-            return round(float(age_str), 2)
-        if age_str.isdigit():
-            return round(float(age_str), 2)
-        return "N/A"
-    except (ValueError, AttributeError) as e:
-        print(f"⚠️ Age conversion error for '{age_str}': {e}")
-        return "N/A"
-
-def get_country_code(nation_str):
-    try:
-        if pd.isna(nation_str) or nation_str == "N/A":
-            return "N/A"
-        return nation_str.split()[-1]
-    except (AttributeError, IndexError):
-        return "N/A"
-
-def format_player_name(name):
-    try:
-        if pd.isna(name) or name == "N/A":
-            return "N/A"
-        if "," in name:
-            parts = [part.strip() for part in name.split(",")]
-            if len(parts) >= 2:
-                return " ".join(parts[::-1])
-        return " ".join(name.split()).strip()
-    except (AttributeError, TypeError):
-        return "N/A"
-
-root_dir = r"C:\Users\DD\OneDrive\Documents\newfolder(2)\btlpython"
-browser_options = Options()
-browser_options.add_argument("--headless")
-browser_options.add_argument("--disable-gpu")
-browser_options.add_argument("--no-sandbox")
-browser_driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=browser_options)
-stat_urls = [
-    "https://fbref.com/en/comps/9/2024-2025/stats/2024-2025-Premier-League-Stats",
-    "https://fbref.com/en/comps/9/2024-2025/keepers/2024-2025-Premier-League-Stats",
-    "https://fbref.com/en/comps/9/2024-2025/shooting/2024-2025-Premier-League-Stats",
-    "https://fbref.com/en/comps/9/2024-2025/passing/2024-2025-Premier-League-Stats",
-    "https://fbref.com/en/comps/9/2024-2025/gca/2024-2025-Premier-League-Stats",
-    "https://fbref.com/en/comps/9/2024-2025/defense/2024-2025-Premier-League-Stats",
-    "https://fbref.com/en/comps/9/2024-2025/possession/2024-2025-Premier-League-Stats",
-    "https://fbref.com/en/comps/9/2024-2025/misc/2024-2025-Premier-League-Stats",
-]
-table_identifiers = [
-    "stats_standard",
-    "stats_keeper",
-    "stats_shooting",
-    "stats_passing",
-    "stats_gca",
-    "stats_defense",
-    "stats_possession",
-    "stats_misc",
-]
+root_dir = root_dir_from_args()
+csv_dir = os.path.join(root_dir, "csv")
+pages_dir = os.path.join(root_dir, "pages")
+dataset_dir = os.path.join(root_dir, "dataset")
+pipeline_steps = ["scrape", "merge", "rank", "summarize", "plot"]
 target_columns = [
     "Player", "Nation", "Team", "Position", "Age",
     "Matches Played", "Starts", "Minutes",
@@ -193,196 +144,253 @@ rename_columns_map = {
         "Aerial Duels.2": "Aerl Won%"
     }
 }
-table_collection = {}
-for url, table_id in zip(stat_urls, table_identifiers):
-    print(f"🔍 Processing {table_id} from {url}")
-    browser_driver.get(url)
-    time.sleep(3)
-    page_soup = BeautifulSoup(browser_driver.page_source, "html.parser")
-    html_comments = page_soup.find_all(string=lambda text: isinstance(text, Comment))
-    data_table = None
-    for comment in html_comments:
-        if table_id in comment:
-            comment_soup = BeautifulSoup(comment, "html.parser")
-            data_table = comment_soup.find("table", {"id": table_id})
-            if data_table:
-                break
-    if not data_table:
-        print(f"⚠️ Table {table_id} not found!")
-        continue
-    try:
-        table_data = pd.read_html(StringIO(str(data_table)), header=0)[0]
-    except Exception as e:
-        print(f"❌ Error reading table {table_id}: {e}")
-        continue
-    print(f"📋 Original columns in {table_id}:", table_data.columns.tolist())
-    table_data = table_data.rename(columns=rename_columns_map.get(table_id, {}))
-    table_data = table_data.loc[:, ~table_data.columns.duplicated()]
-    if "Player" in table_data.columns:
-        table_data["Player"] = table_data["Player"].apply(format_player_name)
-        print(f"Sample Player names in {table_id}:", table_data["Player"].head(5).tolist())
-    if "Age" in table_data.columns:
-        print(f"Raw Age values in {table_id} (before conversion):", table_data["Age"].head(5).tolist())
-        table_data["Age"] = table_data["Age"].apply(parse_age_to_decimal)
-        print(f"Processed Age values in {table_id} (after conversion):", table_data["Age"].head(5).tolist())
-    print(f"📝 Renamed and cleaned columns in {table_id}:", table_data.columns.tolist())
-    table_collection[table_id] = table_data
-combined_data = None
-for table_id, table_data in table_collection.items():
-    table_data = table_data[[col for col in table_data.columns if col in target_columns]]
-    table_data = table_data.drop_duplicates(subset=["Player"], keep="first")
-    if combined_data is None:
-        combined_data = table_data
-    else:
-        try:
-            combined_data = pd.merge(combined_data, table_data, on="Player", how="outer", validate="1:1")
-        except Exception as e:
-            print(f"❌ Merge error for {table_id}: {e}")
+# Tải các trang thống kê (cache / HTTP / trình duyệt) và lưu bản HTML vào pages_dir
+def scrape_pages(pages_dir, stat_urls, page_cache, browser_pool):
+    fetched_pages, page_timings = fetch_pages(stat_urls, table_identifiers, page_cache=page_cache,
+                                              browser_pool=browser_pool)
+    os.makedirs(pages_dir, exist_ok=True)
+    for url, table_id in zip(stat_urls, table_identifiers):
+        if url in fetched_pages:
+            with open(os.path.join(pages_dir, f"{table_id}.html"), "w", encoding="utf-8") as f:
+                f.write(fetched_pages[url])
+    print(f"✅ Saved {len(fetched_pages)} page(s) to {pages_dir}")
+    return fetched_pages
+
+def load_saved_pages(pages_dir, stat_urls):
+    fetched_pages = {}
+    for url, table_id in zip(stat_urls, table_identifiers):
+        page_path = os.path.join(pages_dir, f"{table_id}.html")
+        if os.path.exists(page_path):
+            with open(page_path, encoding="utf-8") as f:
+                fetched_pages[url] = f.read()
+    return fetched_pages
+
+# Trích xuất, làm sạch và ghép các bảng thành một bảng cầu thủ
+def build_result(fetched_pages, stat_urls):
+    table_collection = {}
+    for url, table_id in zip(stat_urls, table_identifiers):
+        print(f"🔍 Processing {table_id} from {url}")
+        if url not in fetched_pages:
+            print(f"⚠️ Page for {table_id} could not be fetched!")
             continue
-combined_data = combined_data.loc[:, [col for col in target_columns if col in combined_data.columns]]
-combined_data["Minutes"] = pd.to_numeric(combined_data["Minutes"], errors="coerce")
-integer_columns = ["Matches Played", "Starts", "Minutes", "Gls", "Ast", "crdY", "crdR", "PrgC", "PrgP", "PrgR",
-                   "Cmp", "TotDist", "Tkl", "TklW", "Deff Att", "Lost", "Blocks", "Sh", "Pass", "Int",
-                   "Touches", "Def Pen", "Def 3rd", "Mid 3rd", "Att 3rd", "Att Pen", "Take-Ons Att",
-                   "Carries", "Carries 1_3", "CPA", "Mis", "Dis", "Rec", "Rec PrgR",
-                   "Fls", "Fld", "Off", "Crs", "Recov", "Aerl Won", "Aerl Lost"]
-decimal_columns = ["Age", "xG", "xAG", "Gls per 90", "Ast per 90", "xG per 90", "xAG per 90", "GA90", "Save%", "CS%", "PK Save%",
-                   "SoT%", "SoT per 90", "G per Sh", "Dist", "Cmp%", "ShortCmp%", "MedCmp%", "LongCmp%", "KP", "Pass into 1_3", "PPA",
-                   "CrsPA", "SCA", "SCA90", "GCA", "GCA90", "Succ%", "Tkld%", "ProDist", "Aerl Won%"]
-text_columns = ["Player", "Nation", "Team", "Position"]
-for col in integer_columns:
-    if col in combined_data.columns:
-        combined_data[col] = pd.to_numeric(combined_data[col], errors="coerce").astype("Int64")
-for col in decimal_columns:
-    if col in combined_data.columns:
-        combined_data[col] = pd.to_numeric(combined_data[col], errors="coerce").round(2)
-combined_data = combined_data[combined_data["Minutes"].notna() & (combined_data["Minutes"] > 90)]
-if "Nation" in combined_data.columns:
-    combined_data["Nation"] = combined_data["Nation"].apply(get_country_code)
-if "Player" in combined_data.columns:
-    combined_data["Player"] = combined_data["Player"].apply(format_player_name)
-for col in text_columns:
-    if col in combined_data.columns:
-        combined_data[col] = combined_data[col].fillna("N/A")
-print("\n📊 Preview of final DataFrame (first 5 rows) before saving to result.csv:")
-print(combined_data.head(5).to_string())
-result_csv_path = os.path.join(root_dir, "result.csv")
-combined_data.to_csv(result_csv_path, index=False, encoding="utf-8-sig", na_rep="N/A")
-print(f"✅ Successfully saved merged data to {result_csv_path} with {combined_data.shape[0]} rows and {combined_data.shape[1]} columns.")
-browser_driver.quit()
-input_data = pd.read_csv(result_csv_path, na_values=["N/A"])
-calc_data = input_data.copy()
-non_numeric_columns = ["Player", "Nation", "Team", "Position"]
-numeric_columns = [col for col in calc_data.columns if col not in non_numeric_columns]
-for col in numeric_columns:
-    calc_data[col] = pd.to_numeric(calc_data[col], errors="coerce").fillna(0)
-stat_rankings = {}
-for col in numeric_columns:
-    top_three_high = calc_data[["Player", "Team", col]].sort_values(by=col, ascending=False).head(3)
-    top_three_high = top_three_high.rename(columns={col: "Value"})
-    top_three_high["Rank"] = ["1st", "2nd", "3rd"]
-    if calc_data[col].eq(0).all():
-        top_three_low = calc_data[["Player", "Team", col]].sort_values(by=col, ascending=True).head(3)
-    else:
-        non_zero_data = calc_data[calc_data[col] > 0]
-        top_three_low = non_zero_data[["Player", "Team", col]].sort_values(by=col, ascending=True).head(3)
-    top_three_low = top_three_low.rename(columns={col: "Value"})
-    top_three_low["Rank"] = ["1st", "2nd", "3rd"]
-    stat_rankings[col] = {
-        "Highest": top_three_high,
-        "Lowest": top_three_low
-    }
-top_three_path = os.path.join(root_dir, "top_3.txt")
-with open(top_three_path, "w", encoding="utf-8") as f:
-    for stat, data in stat_rankings.items():
-        f.write(f"\nStatistic: {stat}\n")
-        f.write("\nTop 3 Highest:\n")
-        f.write(data["Highest"][["Rank", "Player", "Team", "Value"]].to_string(index=False))
-        f.write("\n\nTop 3 Lowest:\n")
-        f.write(data["Lowest"][["Rank", "Player", "Team", "Value"]].to_string(index=False))
-        f.write("\n" + "-" * 50 + "\n")
-print(f"✅ Saved top 3 rankings to {top_three_path}")
-stat_rows = []
-league_stats = {"": "all"}
-for col in numeric_columns:
-    league_stats[f"Median of {col}"] = calc_data[col].median()
-    league_stats[f"Mean of {col}"] = calc_data[col].mean()
-    league_stats[f"Std of {col}"] = calc_data[col].std()
-stat_rows.append(league_stats)
-teams = sorted(calc_data["Team"].unique())
-for team in teams:
-    team_subset = calc_data[calc_data["Team"] == team]
-    team_metrics = {"": team}
+        with stage("extract", table=table_id) as span:
+            page_tables = extract_tables(fetched_pages[url], [table_id])
+            span.rows_out = len(page_tables[table_id]) if table_id in page_tables else 0
+        if table_id not in page_tables:
+            print(f"⚠️ Table {table_id} not found!")
+            continue
+        table_data = page_tables[table_id]
+        print(f"📋 Original columns in {table_id}:", table_data.columns.tolist())
+        table_data = table_data.rename(columns=rename_columns_map.get(table_id, {}))
+        table_data = table_data.loc[:, ~table_data.columns.duplicated()]
+        if "Player" in table_data.columns:
+            table_data["Player"] = format_player_names(table_data["Player"])
+            print(f"Sample Player names in {table_id}:", table_data["Player"].head(5).tolist())
+        if "Age" in table_data.columns:
+            print(f"Raw Age values in {table_id} (before conversion):", table_data["Age"].head(5).tolist())
+            table_data["Age"] = parse_ages(table_data["Age"])
+            print(f"Processed Age values in {table_id} (after conversion):", table_data["Age"].head(5).tolist())
+        print(f"📝 Renamed and cleaned columns in {table_id}:", table_data.columns.tolist())
+        table_collection[table_id] = table_data
+    # Ghép tất cả các bảng một lần theo mã cầu thủ FBref (Player_ID) thay vì tên hiển thị
+    aligned_tables = []
+    player_name_columns = []
+    taken_columns = set()
+    for table_id, table_data in table_collection.items():
+        if key_column not in table_data.columns:
+            print(f"⚠️ No player keys found in {table_id}, skipping merge")
+            continue
+        table_data = table_data[table_data[key_column].notna()]
+        table_data = table_data.drop_duplicates(subset=[key_column], keep="first").set_index(key_column)
+        player_name_columns.append(table_data["Player"])
+        stat_columns = [col for col in table_data.columns if col in target_columns and col != "Player" and col not in taken_columns]
+        taken_columns.update(stat_columns)
+        aligned_tables.append(table_data[stat_columns])
+    if not aligned_tables:
+        raise PlayerKeyError("No stat table has player keys to merge on")
+    combined_data = pd.concat(aligned_tables, axis=1, join="outer")
+    combined_data.insert(0, "Player", pd.concat(player_name_columns).groupby(level=0).first())
+    combined_data = combined_data.rename_axis(key_column).reset_index().sort_values("Player", kind="stable")
+    combined_data = combined_data.loc[:, [col for col in target_columns if col in combined_data.columns] + [key_column]]
+    combined_data["Minutes"] = pd.to_numeric(combined_data["Minutes"], errors="coerce")
+    for col in integer_columns:
+        if col in combined_data.columns:
+            combined_data[col] = pd.to_numeric(combined_data[col], errors="coerce").astype("Int64")
+    for col in decimal_columns:
+        if col in combined_data.columns:
+            combined_data[col] = pd.to_numeric(combined_data[col], errors="coerce").round(2)
+    combined_data = combined_data[combined_data["Minutes"].notna() & (combined_data["Minutes"] > 90)]
+    if "Nation" in combined_data.columns:
+        combined_data["Nation"] = country_codes(combined_data["Nation"])
+    for col in text_columns:
+        if col in combined_data.columns:
+            combined_data[col] = combined_data[col].fillna("N/A")
+    print("\n📊 Preview of final DataFrame (first 5 rows):")
+    print(combined_data.head(5).to_string())
+    return combined_data
+
+# Lưu result.csv (kèm bản .arrow có kiểu)
+def save_result(combined_data, result_csv_path):
+    combined_data.to_csv(result_csv_path, index=False, encoding="utf-8-sig", na_rep="N/A")
+    print(f"✅ Successfully saved merged data to {result_csv_path} with {combined_data.shape[0]} rows and {combined_data.shape[1]} columns.")
+    result_arrow_path = write_player_table(combined_data, result_csv_path)
+    print(f"✅ Saved typed columnar copy to {result_arrow_path}")
+
+# Đọc result.csv và chuyển các cột số về dạng số (thiếu -> 0); compact=True dựng bảng gọn (compact_table.py)
+# thẳng từ nguồn, từng nhóm cột một, không nạp cả bảng
+def load_calc_data(result_csv_path, compact=False):
+    non_numeric_columns = ["Player", "Nation", "Team", "Position", key_column]
+    if compact:
+        columns = current_player_columns(result_csv_path)
+        numeric_columns = [col for col in columns if col not in non_numeric_columns]
+        return load_compact_players(result_csv_path, columns, numeric_columns, fill_value=0), numeric_columns
+    calc_data = load_current_players(result_csv_path)
+    numeric_columns = [col for col in calc_data.columns if col not in non_numeric_columns]
     for col in numeric_columns:
-        team_metrics[f"Median of {col}"] = team_subset[col].median()
-        team_metrics[f"Mean of {col}"] = team_subset[col].mean()
-        team_metrics[f"Std of {col}"] = team_subset[col].std()
-    stat_rows.append(team_metrics)
-stats_summary = pd.DataFrame(stat_rows)
-stats_summary = stats_summary.rename(columns={"": ""})
-for col in stats_summary.columns:
-    if col != "":
-        stats_summary[col] = stats_summary[col].round(2)
-stats_csv_path = os.path.join(root_dir, "results2.csv")
-stats_summary.to_csv(stats_csv_path, index=False, encoding="utf-8-sig")
-print(f"✅ Successfully saved statistics to {stats_csv_path} with {stats_summary.shape[0]} rows and {stats_summary.shape[1]} columns.")
-plot_stats = ["Gls per 90", "xG per 90", "SCA90", "GA90", "TklW", "Blocks"]
-histogram_folder = os.path.join(root_dir, "histograms")
-league_histogram_folder = os.path.join(histogram_folder, "league")
-team_histogram_folder = os.path.join(histogram_folder, "teams")
-os.makedirs(league_histogram_folder, exist_ok=True)
-os.makedirs(team_histogram_folder, exist_ok=True)
-teams = sorted(calc_data["Team"].unique())
-for stat in plot_stats:
-    if stat not in calc_data.columns:
-        print(f"⚠️ Statistic {stat} not found in DataFrame. Skipping...")
-        continue
-    plt.figure(figsize=(10, 6))
-    plt.hist(calc_data[stat], bins=20, color="skyblue", edgecolor="black")
-    plt.title(f"League-Wide Distribution of {stat}")
-    plt.xlabel(stat)
-    plt.ylabel("Number of Players")
-    plt.grid(True, alpha=0.3)
-    plt.savefig(os.path.join(league_histogram_folder, f"{stat}_league.png"), bbox_inches="tight")
-    plt.close()
-    print(f"📊 Saved league-wide histogram for {stat}")
-    for team in teams:
-        team_subset = calc_data[calc_data["Team"] == team]
-        plt.figure(figsize=(8, 6))
-        plt.hist(team_subset[stat], bins=10, color="lightgreen" if stat in ["GA90", "TklW", "Blocks"] else "skyblue",
-                 edgecolor="black", alpha=0.7)
-        plt.title(f"{team} - Distribution of {stat}")
-        plt.xlabel(stat)
-        plt.ylabel("Number of Players")
-        plt.grid(True, alpha=0.3)
-        stat_file_name = stat.replace(" ", "_")
-        plt.savefig(os.path.join(team_histogram_folder, f"{team}_{stat_file_name}.png"), bbox_inches="tight")
-        plt.close()
-        print(f"📊 Saved histogram for {team} - {stat}")
-print("✅ All histograms for selected statistics have been generated and saved under 'histograms'.")
-team_averages = calc_data.groupby("Team")[numeric_columns].mean().reset_index()
-top_team_stats = []
-for stat in numeric_columns:
-    if stat not in calc_data.columns:
-        print(f"⚠️ Statistic {stat} not found in DataFrame. Skipping...")
-        continue
-    top_row = team_averages.loc[team_averages[stat].idxmax()]
-    top_team_stats.append({
-        "Statistic": stat,
-        "Team": top_row["Team"],
-        "Mean Value": round(top_row[stat], 2)
-    })
-top_team_data = pd.DataFrame(top_team_stats)
-top_team_csv_path = os.path.join(root_dir, "highest_team_stats.csv")
-top_team_data.to_csv(top_team_csv_path, index=False, encoding="utf-8-sig")
-print(f"✅ Saved highest team stats to {top_team_csv_path} with {top_team_data.shape[0]} rows.")
-negative_metrics = [
-    "GA90", "CrdY", "CrdR", "Lost", "Mis", "Dis", "Fls", "Off", "Aerl Lost"
-]
-top_team_data = pd.read_csv(top_team_csv_path)
-positive_stats_data = top_team_data[~top_team_data["Statistic"].isin(negative_metrics)]
-team_rank_counts = positive_stats_data["Team"].value_counts()
-top_team = team_rank_counts.idxmax()
-lead_count = team_rank_counts.max()
-print(f"The best-performing team in the 2024-2025 Premier League season is: {top_team}")
-print(f"They lead in {lead_count} out of {len(positive_stats_data)} positive statistics.")
\ No newline at end of file
+        calc_data[col] = pd.to_numeric(calc_data[col], errors="coerce").fillna(0)
+    return calc_data, numeric_columns
+
+def write_rankings(calc_data, numeric_columns, top_three_path):
+    # Bảng gọn được mở rộng từng nhóm cột một; bảng thường là một nhóm duy nhất
+    stat_rankings = pd.concat([top_k_rankings(chunk, chunk_columns, k=3)
+                               for chunk, chunk_columns in stat_chunks(calc_data, numeric_columns, ["Player", "Team"])],
+                              ignore_index=True)
+    write_rankings_text(stat_rankings, top_three_path, k=3)
+    print(f"✅ Saved top 3 rankings to {top_three_path}")
+
+def write_team_summaries(calc_data, numeric_columns, stats_csv_path, top_team_csv_path, season_label):
+    summary_parts, average_parts = [], []
+    for chunk, chunk_columns in stat_chunks(calc_data, numeric_columns, ["Team"]):
+        summary_parts.append(summarize(chunk, chunk_columns, group_by="Team", statistics=("median", "mean", "std")))
+        average_parts.append(chunk.groupby("Team")[chunk_columns].mean())
+    stats_summary = pd.concat([summary_parts[0]] + [part.drop(columns="") for part in summary_parts[1:]], axis=1)
+    stats_summary.to_csv(stats_csv_path, index=False, encoding="utf-8-sig")
+    print(f"✅ Successfully saved statistics to {stats_csv_path} with {stats_summary.shape[0]} rows and {stats_summary.shape[1]} columns.")
+    team_averages = pd.concat(average_parts, axis=1).reset_index()
+    top_team_stats = []
+    for stat in numeric_columns:
+        if stat not in team_averages.columns:
+            print(f"⚠️ Statistic {stat} not found in DataFrame. Skipping...")
+            continue
+        top_row = team_averages.loc[team_averages[stat].idxmax()]
+        top_team_stats.append({
+            "Statistic": stat,
+            "Team": top_row["Team"],
+            "Mean Value": round(top_row[stat], 2)
+        })
+    top_team_data = pd.DataFrame(top_team_stats)
+    top_team_data.to_csv(top_team_csv_path, index=False, encoding="utf-8-sig")
+    print(f"✅ Saved highest team stats to {top_team_csv_path} with {top_team_data.shape[0]} rows.")
+    negative_metrics = [
+        "GA90", "CrdY", "CrdR", "Lost", "Mis", "Dis", "Fls", "Off", "Aerl Lost"
+    ]
+    # Dùng luôn bảng vừa tính, không đọc lại file CSV vừa ghi
+    positive_stats_data = top_team_data[~top_team_data["Statistic"].isin(negative_metrics)]
+    team_rank_counts = positive_stats_data["Team"].value_counts()
+    top_team = team_rank_counts.idxmax()
+    lead_count = team_rank_counts.max()
+    print(f"The best-performing team in the {season_label} season is: {top_team}")
+    print(f"They lead in {lead_count} out of {len(positive_stats_data)} positive statistics.")
+    return stats_summary, top_team_data
+
+def plot_histograms(result_csv_path, histogram_folder):
+    plot_stats = ["Gls per 90", "xG per 90", "SCA90", "GA90", "TklW", "Blocks"]
+    # Vẽ trong tiến trình riêng để các worker không phải import lại script này
+    subprocess.run([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "histograms.py"),
+                    result_csv_path, histogram_folder, "--stats", *plot_stats], check=True)
+    print("✅ All histograms for selected statistics have been generated and saved under 'histograms'.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape FBref stats and build result.csv")
+    parser.add_argument("--steps", nargs="+", choices=pipeline_steps, default=pipeline_steps,
+                        help="Run only these steps (scrape saves pages, merge builds result.csv from them)")
+    parser.add_argument("--competition", nargs="+", choices=list(competitions), default=[default_competition])
+    parser.add_argument("--season", nargs="+", type=season_name, default=[default_season])
+    parser.add_argument("--compact", action="store_true",
+                        help="Keep the table compact in memory for rank / summarize (same output, less memory)")
+    args, _ = parser.parse_known_args()
+    trace_from_args("bai1andbai2", root_dir)
+    os.makedirs(csv_dir, exist_ok=True)
+    result_csv_path = os.path.join(csv_dir, "result.csv")
+    # Mỗi cặp (giải, mùa) là một phân vùng của bộ dữ liệu; result.csv chỉ dành cho khi chọn đúng một cặp
+    partitions = [(competition, season) for competition in args.competition for season in args.season]
+    single_partition = len(partitions) == 1
+    missing_partitions = []
+
+    page_cache = browser_pool = None
+    store = open_store(root_dir) if "merge" in args.steps else None
+    if "scrape" in args.steps:
+        page_cache = page_cache_from_args(os.path.join(root_dir, "page_cache"), "Scrape FBref stats and build result.csv")
+        browser_pool = browser_pool_from_args("Scrape FBref stats and build result.csv")
+    try:
+        for competition, season in partitions:
+            stat_urls = stat_urls_for(competition, season)
+            partition_pages_dir = os.path.join(pages_dir, competition, season)
+            print(f"🏆 {competitions[competition]['label']} {season}")
+            fetched_pages = None
+            if "scrape" in args.steps:
+                with stage("scrape", competition=competition, season=season) as span:
+                    fetched_pages = scrape_pages(partition_pages_dir, stat_urls, page_cache, browser_pool)
+                    span.rows_out = len(fetched_pages)
+            if "merge" in args.steps:
+                if fetched_pages is None:
+                    fetched_pages = load_saved_pages(partition_pages_dir, stat_urls)
+                if not fetched_pages:
+                    print(f"❌ No pages for {competition} {season}, partition not written")
+                    missing_partitions.append((competition, season))
+                    continue
+                try:
+                    with stage("merge", competition=competition, season=season, pages=len(fetched_pages)) as span:
+                        combined_data = build_result(fetched_pages, stat_urls)
+                        span.rows_out = len(combined_data)
+                except PlayerKeyError as e:
+                    # Không ghi bảng thiếu cột: dừng phân vùng này thay vì lưu result.csv hẹp hơn
+                    print(f"❌ {e}; {competition} {season} partition not written")
+                    missing_partitions.append((competition, season))
+                    continue
+                with stage("save", rows_in=len(combined_data), competition=competition, season=season):
+                    partition_path = write_partition(combined_data, dataset_dir, competition, season)
+                    print(f"✅ Saved partition {partition_path}")
+                    if store is not None:
+                        stored_rows = store.replace_snapshot(combined_data, competition, season, current=single_partition)
+                        print(f"✅ Stored {stored_rows} player rows in {store.path}")
+                    if single_partition:
+                        save_result(combined_data, result_csv_path)
+    finally:
+        if browser_pool is not None:
+            browser_pool.close()
+        if store is not None:
+            store.close()
+    if browser_pool is not None:
+        browser_pool.report()
+        page_cache.report()
+    if missing_partitions:
+        sys.exit(1)
+
+    table_steps = [step for step in args.steps if step in ("rank", "summarize", "plot")]
+    if table_steps and not single_partition:
+        print(f"ℹ️ Skipping {', '.join(table_steps)}: they read result.csv, which is only written for a single "
+              f"competition and season. Query the partitions with player_dataset.py {dataset_dir}")
+        table_steps = []
+    if "rank" in table_steps or "summarize" in table_steps:
+        with stage("load") as span:
+            calc_data, numeric_columns = load_calc_data(result_csv_path, compact=args.compact)
+            span.rows_out = len(calc_data)
+        if "rank" in table_steps:
+            with stage("rank", rows_in=len(calc_data)):
+                write_rankings(calc_data, numeric_columns, os.path.join(csv_dir, "top_3.txt"))
+        if "summarize" in table_steps:
+            competition, season = partitions[0]
+            with stage("summarize", rows_in=len(calc_data)):
+                stats_summary, top_team_data = write_team_summaries(
+                    calc_data, numeric_columns, os.path.join(csv_dir, "results2.csv"),
+                    os.path.join(csv_dir, "highest_team_stats.csv"), f"{season} {competitions[competition]['label']}")
+                store = open_store(root_dir)
+                if store is not None:
+                    with store:
+                        summary_rows, top_rows = store.replace_team_summaries(stats_summary, top_team_data,
+                                                                              competition, season)
+                    print(f"✅ Stored {summary_rows} team summary values and {top_rows} top team stats in {store.path}")
+    if "plot" in table_steps:
+        with stage("plot"):
+            plot_histograms(result_csv_path, os.path.join(root_dir, "histograms"))
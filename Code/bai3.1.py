@@ -1,11 +1,25 @@
-import pandas as pd
-import numpy as np
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
+import argparse
+import os
+import time
 import matplotlib.pyplot as plt
-
-# Load the dataset
-data = pd.read_csv('result.csv')
+from cluster_selection import print_sweep, standardized_features, suggest_k, sweep_k
+from instrumentation import add_trace_arguments, stage, trace_from_args
+from player_store import load_current_players
+
+parser = argparse.ArgumentParser(description="Elbow analysis for k-means clustering of players")
+parser.add_argument("--k", type=int, default=None, help="Highlight this k instead of the suggested one")
+parser.add_argument("--k-max", type=int, default=10)
+parser.add_argument("--jobs", type=int, default=-1, help="Parallel fits (-1 = all cores)")
+parser.add_argument("--mini-batch", action="store_true", default=None, help="Force MiniBatchKMeans")
+parser.add_argument("--result-csv", default="result.csv")
+parser.add_argument("--output-dir", default=".", help="Where the plot and the feature cache are written")
+add_trace_arguments(parser)
+args = parser.parse_args()
+if args.k_max < 1:
+    parser.error(f"--k-max must be at least 1 (got {args.k_max})")
+if args.k is not None and not 1 <= args.k <= args.k_max:
+    parser.error(f"--k must be between 1 and --k-max ({args.k_max}), got {args.k}")
+trace_from_args("bai3.1", args.output_dir)
 
 # Select features for clustering
 features = [
@@ -14,27 +28,26 @@ features = [
     'Touches', 'PrgC', 'PrgP', 'PrgR', 'Carries'
 ]
 
-# Extract the feature data
-X = data[features].copy()
-
-# Handle missing values (replace 'N/A' with 0, fill NaN with 0)
-X = X.replace('N/A', 0)
-X = X.fillna(0)
+# Load only the feature columns of the current snapshot (from the player store, or the typed result table)
+data = load_current_players(args.result_csv, features)
 
-# Standardize the features
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
+# Standardize the features (NaN filled with 0), reusing the cached matrix when the data is unchanged
+with stage("standardize", rows_in=len(data)):
+    X_scaled, scaler = standardized_features(data, features, cache_dir=os.path.join(args.output_dir, 'feature_cache'))
 
-# Compute inertia (WCSS) for different k values
-inertia = []
-k_range = range(1, 11)
-for k in k_range:
-    kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
-    kmeans.fit(X_scaled)
-    inertia.append(kmeans.inertia_)
+# Compute inertia (WCSS), silhouette and Davies-Bouldin for every k in parallel
+k_range = range(1, args.k_max + 1)
+sweep_start = time.perf_counter()
+with stage("k sweep", rows_in=len(X_scaled), k_max=args.k_max):
+    sweep_results = sweep_k(X_scaled, k_range, n_jobs=args.jobs, mini_batch=args.mini_batch)
+print_sweep(sweep_results)
+print(f"k sweep over {len(X_scaled)} players took {time.perf_counter() - sweep_start:.2f}s")
+inertia = [result['inertia'] for result in sweep_results]
 
-# Specific k value for the title
-chosen_k = 4
+# Suggested k from the elbow of the inertia curve, unless one is given on the command line
+suggested_k = suggest_k(sweep_results)
+print(f"Suggested k (elbow): {suggested_k}")
+chosen_k = args.k if args.k is not None else suggested_k
 
 # Create the elbow plot
 plt.figure(figsize=(8, 6))
@@ -48,8 +61,9 @@ plt.xticks(k_range)
 plt.legend()
 
 # Save the plot as PNG
-plt.savefig('elbow_plot.png', format='png', dpi=300, bbox_inches='tight')
-plt.close()
+with stage("plot"):
+    plt.savefig(os.path.join(args.output_dir, 'elbow_plot.png'), format='png', dpi=300, bbox_inches='tight')
+    plt.close()
 
 print(f"Elbow plot with k={chosen_k} has been saved as 'elbow_plot.png'.")
 
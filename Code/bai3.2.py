@@ -1,12 +1,17 @@
-import pandas as pd
-import numpy as np
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
-from sklearn.decomposition import PCA
+import argparse
+import os
 import matplotlib.pyplot as plt
-
-# Load the dataset
-data = pd.read_csv('result.csv')
+from cluster_model import fit_cluster_model, save_cluster_model
+from cluster_selection import standardized_features
+from instrumentation import add_trace_arguments, stage, trace_from_args
+from player_store import load_current_players
+
+parser = argparse.ArgumentParser(description="2D PCA cluster plot of players and the saved cluster model")
+parser.add_argument("--result-csv", default="result.csv")
+parser.add_argument("--output-dir", default=".", help="Where the plot, model and feature cache are written")
+add_trace_arguments(parser)
+args = parser.parse_args()
+trace_from_args("bai3.2", args.output_dir)
 
 # Select features for clustering
 features = [
@@ -15,24 +20,23 @@ features = [
     'Touches', 'PrgC', 'PrgP', 'PrgR', 'Carries'
 ]
 
-# Extract the feature data
-X = data[features].copy()
-
-# Handle missing values (replace 'N/A' with 0, fill NaN with 0)
-X = X.replace('N/A', 0)
-X = X.fillna(0)
+# Load only the feature columns of the current snapshot (from the player store, or the typed result table)
+data = load_current_players(args.result_csv, features)
 
-# Standardize the features
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
+# Standardize the features (NaN filled with 0), reusing the matrix cached by bai3.1.py
+with stage("standardize", rows_in=len(data)):
+    X_scaled, scaler = standardized_features(data, features, cache_dir=os.path.join(args.output_dir, 'feature_cache'))
 
-# Apply PCA to reduce to 2 dimensions
-pca = PCA(n_components=2)
-X_pca = pca.fit_transform(X_scaled)
+# Apply PCA to reduce to 2 dimensions, then K-means clustering with k=4
+with stage("pca + kmeans", rows_in=len(data)) as span:
+    model, X_pca, cluster_labels = fit_cluster_model(data, features, n_components=2, n_clusters=4,
+                                                     X_scaled=X_scaled, scaler=scaler)
+    span.rows_out = len(cluster_labels)
 
-# Apply K-means clustering with k=4
-kmeans = KMeans(n_clusters=4, random_state=42, n_init=10)
-cluster_labels = kmeans.fit_predict(X_pca)
+# Save the fitted chain so new players can be assigned with `python cluster_model.py assign`
+with stage("save model"):
+    model_version, model_path = save_cluster_model(model, os.path.join(args.output_dir, 'models'))
+print(f"Cluster model v{model_version} saved to '{model_path}'.")
 
 # Create the 2D cluster plot
 plt.figure(figsize=(8, 6))
@@ -44,7 +48,8 @@ plt.colorbar(scatter, label='Cluster')
 plt.grid(True)
 
 # Save the plot as PNG
-plt.savefig('cluster_plot.png', format='png', dpi=300, bbox_inches='tight')
-plt.close()
+with stage("plot"):
+    plt.savefig(os.path.join(args.output_dir, 'cluster_plot.png'), format='png', dpi=300, bbox_inches='tight')
+    plt.close()
 
 print("2D cluster plot has been saved as 'cluster_plot.png'.")
\ No newline at end of file
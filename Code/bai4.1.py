@@ -1,18 +1,22 @@
-from fuzzywuzzy import fuzz, process
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
 import pandas as pd
 import os
+from browser_pool import browser_pool_from_args, prefetch_pages
+from cleaning import truncate_names
+from fbref_config import competition_from_args, competitions
+from instrumentation import stage, trace_from_args
+from name_index import NameIndex
+from player_store import open_store
+from player_table import load_player_table
+from project_paths import root_dir_from_args
+from page_cache import page_cache_from_args
+from table_extract import table_row_cells
 
 # Thư mục gốc
-root_dir = r"C:\Users\DD\OneDrive\Documents\newfolder(2)\btlpython"
+root_dir = root_dir_from_args()
+trace_from_args("bai4.1", root_dir)
 csv_folder = os.path.join(root_dir, "csv")
 os.makedirs(csv_folder, exist_ok=True)
+page_cache = page_cache_from_args(os.path.join(root_dir, "page_cache"), "Scrape confirmed Premier League transfers")
 result_csv_path = os.path.join(csv_folder, "result.csv")
 
 # Kiểm tra file result.csv tồn tại
@@ -20,81 +24,103 @@ if not os.path.exists(result_csv_path):
     print(f"Error: File {result_csv_path} does not exist.")
     exit()
 
-# Đọc file CSV
-try:
-    data_frame = pd.read_csv(result_csv_path, na_values=["N/A"])
-except Exception as e:
-    print(f"Error reading {result_csv_path}: {str(e)}")
-    exit()
+# Giải và mùa lấy từ --competition / --season (mặc định Premier League 2024-2025)
+competition, season = competition_from_args()
 
-calc_data_frame = data_frame.copy()
-filtered_data_frame = calc_data_frame[calc_data_frame['Minutes'] > 900].copy()
+# Lọc cầu thủ trên 900 phút ngay trong SQL nếu cơ sở dữ liệu có đúng giải/mùa này, không thì đọc result.csv
+with stage("load players", league=competition, season=season) as span:
+    filtered_data_frame = None
+    store = open_store(root_dir)
+    if store is not None:
+        with store:
+            filtered_data_frame = store.snapshot(where='"Minutes" > 900', league=competition, season=season)
+    if filtered_data_frame is None:
+        try:
+            data_frame = load_player_table(result_csv_path)
+        except Exception as e:
+            print(f"Error reading {result_csv_path}: {str(e)}")
+            exit()
+        filtered_data_frame = data_frame[data_frame['Minutes'] > 900].copy()
+    span.rows_out = len(filtered_data_frame)
 print(f"Number of players with more than 900 minutes: {len(filtered_data_frame)}")
 
 filtered_csv_path = os.path.join(root_dir, "csv", "players_over_900_minutes.csv")
 filtered_data_frame.to_csv(filtered_csv_path, index=False, encoding='utf-8-sig')
 print(f"Saved filtered players to {filtered_csv_path} with {filtered_data_frame.shape[0]} rows and {filtered_data_frame.shape[1]} columns.")
 
-def truncate_name(name):
-    parts = name.strip().split()
-    return " ".join(parts[:2]) if len(parts) >= 2 else name
-
-# Đọc danh sách cầu thủ đã lọc
-filtered_csv_file = os.path.join(root_dir, "csv", "players_over_900_minutes.csv")
-try:
-    players_data_frame = pd.read_csv(filtered_csv_file)
-except Exception as e:
-    print(f"Error reading {filtered_csv_file}: {str(e)}")
-    exit()
+# Dùng luôn bảng đã lọc, không đọc lại file vừa ghi
+players_data_frame = filtered_data_frame
 
-short_player_names = [truncate_name(name) for name in players_data_frame['Player'].str.strip()]
+short_player_names = truncate_names(players_data_frame['Player'].str.strip()).tolist()
+# Chỉ mục tên được tạo một lần, dùng cho mọi trang
+player_name_index = NameIndex(short_player_names)
 minutes_by_player = dict(zip(players_data_frame['Player'].str.strip(), players_data_frame['Minutes']))
 
-# Cấu hình trình duyệt
-browser_options = Options()
-browser_options.add_argument("--headless")
-browser_options.add_argument("--no-sandbox")
-browser_options.add_argument("--disable-dev-shm-usage")
-browser_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+# Nhóm trình duyệt dùng chung, Chrome chỉ được khởi động khi có trang không nằm trong cache
+browser_pool = browser_pool_from_args("Scrape confirmed Premier League transfers")
+transfer_page_params = {"wait_for": "transfer-table"}
+
+def render_transfer_page(url):
+    return browser_pool.render(url, wait_for_class="transfer-table", timeout=20)
 
-# Khởi tạo WebDriver
-browser_driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=browser_options)
-transfer_base_url = "https://www.footballtransfers.com/us/transfers/confirmed/2024-2025/uk-premier-league/"
+transfer_base_url = (f"https://www.footballtransfers.com/us/transfers/confirmed/{season}/"
+                     f"{competitions[competition]['transfers_slug']}/")
 transfer_urls = [f"{transfer_base_url}{i}" for i in range(1, 15)]
 transfer_data = []
 
 try:
-    for url in transfer_urls:
-        print(f"Scraping: {url}")
-        browser_driver.get(url)
-        try:
-            transfer_table = WebDriverWait(browser_driver, 20).until(
-                EC.presence_of_element_located((By.CLASS_NAME, "transfer-table"))
-            )
-            table_rows = transfer_table.find_elements(By.TAG_NAME, "tr")
-            print(f"Found {len(table_rows)} rows in table at {url}")
-            for row in table_rows:
-                table_columns = row.find_elements(By.TAG_NAME, "td")
-                if table_columns and len(table_columns) >= 2:
-                    full_player_name = table_columns[0].text.strip().split("\n")[0].strip()
-                    short_player_name = truncate_name(full_player_name)
-                    transfer_fee = table_columns[-1].text.strip() if len(table_columns) >= 3 else "N/A"
+    # Render song song các trang còn thiếu trong cache trước khi xử lý lần lượt
+    with stage("prefetch", pages=len(transfer_urls)) as span:
+        span.rows_out = prefetch_pages(page_cache, browser_pool, transfer_urls, transfer_page_params,
+                                       wait_for_class="transfer-table", timeout=20)
+    with stage("scrape pages", pages=len(transfer_urls)) as span:
+        for url in transfer_urls:
+            print(f"Scraping: {url}")
+            try:
+                page_source = page_cache.get_or_fetch(url, render_transfer_page, transfer_page_params)
+                if page_source is None:
+                    print(f"Page not in cache (offline mode): {url}")
+                    continue
+                table_rows = table_row_cells(page_source, "transfer-table")
+                if table_rows is None:
+                    print(f"Table not found at {url}")
+                    continue
+                print(f"Found {len(table_rows)} rows in table at {url}")
+                page_players = []
+                for table_columns in table_rows:
+                    if table_columns and len(table_columns) >= 2:
+                        full_player_name = table_columns[0].strip().split("\n")[0].strip()
+                        transfer_fee = table_columns[-1].strip() if len(table_columns) >= 3 else "N/A"
+                        page_players.append((full_player_name, transfer_fee))
+                    else:
+                        print(f"Skipping row with insufficient columns: {len(table_columns)}")
+                # Rút gọn tên cả trang bằng cùng hàm đã dùng cho danh sách cầu thủ
+                short_names = truncate_names([player[0] for player in page_players]).tolist()
+                for (full_player_name, transfer_fee), short_player_name in zip(page_players, short_names):
                     print(f"Processing player: {full_player_name}, Short name: {short_player_name}, Fee: {transfer_fee}")
-                    top_match = process.extractOne(short_player_name, short_player_names, scorer=fuzz.token_sort_ratio)
-                    if top_match and top_match[1] >= 80:
+                # So khớp cả trang trong một lần gọi
+                top_matches = player_name_index.extract_many(short_names, score_cutoff=80)
+                for (full_player_name, transfer_fee), top_match in zip(page_players, top_matches):
+                    if top_match:
                         matched_player_name = top_match[0]
                         print(f"Matched: {full_player_name} -> {matched_player_name} (Score: {top_match[1]})")
                         transfer_data.append([full_player_name, transfer_fee])
-                else:
-                    print(f"Skipping row with insufficient columns: {len(table_columns)}")
-        except Exception as e:
-            print(f"Error processing {url}: {str(e)}")
+            except Exception as e:
+                print(f"Error processing {url}: {str(e)}")
+        span.rows_out = len(transfer_data)
 finally:
-    browser_driver.quit()
+    browser_pool.close()
+    browser_pool.report()
+    page_cache.report()
 
 if transfer_data:
-    transfer_data_frame = pd.DataFrame(transfer_data, columns=['Player', 'Price'])
-    transfer_data_frame.to_csv(os.path.join(root_dir, "csv", "player_transfer_fee.csv"), index=False)
+    with stage("save", rows_in=len(transfer_data)):
+        transfer_data_frame = pd.DataFrame(transfer_data, columns=['Player', 'Price'])
+        transfer_data_frame.to_csv(os.path.join(root_dir, "csv", "player_transfer_fee.csv"), index=False)
+        store = open_store(root_dir)
+        if store is not None:
+            with store:
+                store.replace_transfers(transfer_data_frame, competition, season)
     print(f"Results saved to '{os.path.join(root_dir, 'csv', 'player_transfer_fee.csv')}' with {len(transfer_data)} records")
 else:
     print("No matching players found.")
\ No newline at end of file
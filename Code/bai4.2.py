@@ -1,17 +1,25 @@
 import pandas as pd
 import numpy as np
 import os
-import re
-from fuzzywuzzy import process, fuzz
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LinearRegression
 from sklearn.preprocessing import StandardScaler, OneHotEncoder
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
 from sklearn.metrics import mean_squared_error, r2_score
+from cleaning import parse_fees
+from fbref_config import key_column
+from instrumentation import stage, trace_from_args
+from player_identity import PlayerIdentityTable
+from player_store import open_store
+from player_table import load_player_table
+from project_paths import root_dir_from_args
 
 # Thư mục gốc nơi các file sẽ được lưu vào
-base_dir = r"C:\Users\DD\OneDrive\Documents\newfolder(2)\btlpython"
+base_dir = root_dir_from_args()
 
 # Đường dẫn đến directory csv
 csv_dir = os.path.join(base_dir, "csv")
@@ -27,6 +35,9 @@ standard_output_columns = [
 # Đường dẫn đến file all_estimate_transfer_fee
 etv_path = os.path.join(csv_dir, 'all_estimate_transfer_fee.csv')
 
+# Bảng định danh FBref <-> FootballTransfers, dùng lại giữa các lần chạy
+identity_path = os.path.join(csv_dir, 'player_identity.csv')
+
 # Cấu hình cho các vị trí cầu thủ
 roles_config = {
     'Goalkeeper': {
@@ -73,62 +84,50 @@ def simplify_name(name):
     parts = name.strip().split()
     return " ".join(parts[:2]) if len(parts) >= 2 else name
 
-# Hàm chuyển đổi giá trị chuyển nhượng
-def convert_valuation(val_text):
-    if pd.isna(val_text) or val_text in ["N/A", ""]:
-        return np.nan
-    try:
-        val_text = re.sub(r'[€£]', '', val_text).strip().upper()
-        multiplier = 1000000 if 'M' in val_text else 1000 if 'K' in val_text else 1
-        value = float(re.sub(r'[MK]', '', val_text)) * multiplier
-        return value
-    except (ValueError, TypeError):
-        return np.nan
-
-# Hàm so khớp tên cầu thủ
-def match_player_name(name, options, min_score=90):
-    if not isinstance(name, str):
-        return None, None
-    simplified_name = simplify_name(name).lower()
-    simplified_options = [simplify_name(opt).lower() for opt in options if isinstance(opt, str)]
-    match = process.extractOne(
-        simplified_name,
-        simplified_options,
-        scorer=fuzz.token_sort_ratio,
-        score_cutoff=min_score
-    )
-    if match is not None:
-        matched_idx = simplified_options.index(match[0])
-        return options[matched_idx], match[1]
-    return None, None
-
-# Hàm xử lý dữ liệu cho từng vị trí
-def analyze_role(role, config):
+# Đọc bảng cầu thủ và các bảng định giá một lần cho mọi vị trí (ưu tiên cơ sở dữ liệu, không thì các file CSV)
+def load_inputs():
+    attribute_columns = list(dict.fromkeys(col for config in roles_config.values() for col in config['attributes']))
+    columns = ['Player', 'Position', key_column] + attribute_columns
+    store = open_store(base_dir)
     try:
-        stats_data = pd.read_csv(result_path)
-        valuation_data = pd.read_csv(config['data_path'])
-    except FileNotFoundError as e:
-        print(f"Lỗi: Không tìm thấy tệp cho {role} - {e}")
-        return None, None
-
-    stats_data['Main_Role'] = stats_data['Position'].astype(str).str.split(r'[,/]').str[0].str.strip()
-    stats_data = stats_data[stats_data['Main_Role'].str.upper() == config['role_filter'].upper()].copy()
-
-    player_list = valuation_data['Player'].dropna().tolist()
-
-    stats_data['Linked_Name'] = None
-    stats_data['Link_Score'] = None
-    stats_data['Valuation'] = np.nan
-
-    for idx, row in stats_data.iterrows():
-        linked_name, score = match_player_name(row['Player'], player_list)
-        if linked_name:
-            stats_data.at[idx, 'Linked_Name'] = linked_name
-            stats_data.at[idx, 'Link_Score'] = score
-            linked_row = valuation_data[valuation_data['Player'] == linked_name]
-            if not linked_row.empty:
-                val_value = convert_valuation(linked_row['Price'].iloc[0])
-                stats_data.at[idx, 'Valuation'] = val_value
+        stats_data = store.snapshot(columns) if store is not None else None
+        if stats_data is None:
+            stats_data = load_player_table(result_path, columns)
+        stats_data['Main_Role'] = stats_data['Position'].astype(str).str.split(r'[,/]').str[0].str.strip().str.upper()
+        valuations = {}
+        for data_path in dict.fromkeys(config['data_path'] for config in roles_config.values()):
+            valuation_data = None
+            if store is not None and data_path == etv_path and store.current_snapshot_id() is not None:
+                # all_estimate_transfer_fee.csv cũng được lưu trong bảng valuations
+                valuation_data = store.valuations(store.current_snapshot_id()[0])
+            if valuation_data is None or valuation_data.empty:
+                valuation_data = pd.read_csv(data_path)
+                valuation_data['Price_Value'] = parse_fees(valuation_data['Price'])
+            valuations[data_path] = valuation_data
+    finally:
+        if store is not None:
+            store.close()
+    return stats_data, valuations
+
+# Gắn tên bên FootballTransfers và giá trị định giá cho mọi cầu thủ
+def link_valuations(stats_data, valuation_data, identity_table):
+    # Tra bảng định danh trước, chỉ cầu thủ chưa có liên kết mới phải so khớp mờ
+    links = identity_table.resolve(
+        stats_data['Player'], valuation_data['Player'].dropna().tolist(),
+        ids=stats_data[key_column] if key_column in stats_data.columns else None,
+        simplify=simplify_name, min_score=90)
+    linked_data = stats_data.copy()
+    linked_data['Linked_Name'] = links['Linked_Name']
+    linked_data['Link_Score'] = links['Link_Score']
+    price_by_name = valuation_data.drop_duplicates(subset='Player').set_index('Player')['Price_Value']
+    linked_data['Valuation'] = linked_data['Linked_Name'].map(price_by_name)
+    return linked_data
+
+# Lấy phần dữ liệu của một vị trí (chỉ các cột vị trí đó dùng)
+def role_view(role, config, linked_data):
+    columns = [col for col in ['Player', 'Position', key_column] + config['attributes'] if col in linked_data.columns]
+    columns += ['Main_Role', 'Linked_Name', 'Link_Score', 'Valuation']
+    stats_data = linked_data.loc[linked_data['Main_Role'] == config['role_filter'].upper(), columns].copy()
 
     filtered_data = stats_data[stats_data['Linked_Name'].notna()].copy()
     filtered_data = filtered_data.drop_duplicates(subset='Linked_Name')
@@ -137,7 +136,10 @@ def analyze_role(role, config):
     if unmatched_players:
         print(f"Cầu thủ {role} không khớp: {len(unmatched_players)} cầu thủ không được khớp.")
         print(unmatched_players)
+    return filtered_data, unmatched_players
 
+# Huấn luyện và đánh giá mô hình của một vị trí (chạy trong process riêng)
+def train_role(role, config, filtered_data):
     attributes = config['attributes']
     target_col = 'Valuation'
 
@@ -164,7 +166,7 @@ def analyze_role(role, config):
     ml_data = filtered_data.dropna(subset=[target_col]).copy()
     if ml_data.empty:
         print(f"Lỗi: Không có dữ liệu Valuation hợp lệ cho {role}.")
-        return None, unmatched_players
+        return None, None
 
     X = ml_data[attributes]
     y = ml_data[target_col]
@@ -188,12 +190,15 @@ def analyze_role(role, config):
         ('model', LinearRegression())
     ])
 
+    fit_start = time.perf_counter()
     model_pipeline.fit(X_train, y_train)
+    metrics = {'Role': role, 'Train': len(X_train), 'Test': len(X_test),
+               'Fit_Seconds': time.perf_counter() - fit_start, 'RMSE_M': np.nan, 'R2': np.nan}
 
     if len(X_test) > 0:
         y_pred = model_pipeline.predict(X_test)
-        rmse = np.sqrt(mean_squared_error(y_test, y_pred))
-        r2 = r2_score(y_test, y_pred)
+        metrics['RMSE_M'] = np.sqrt(mean_squared_error(y_test, y_pred)) / 1_000_000
+        metrics['R2'] = r2_score(y_test, y_pred) if len(X_test) > 1 else np.nan
 
     filtered_data['Estimated_Value'] = model_pipeline.predict(filtered_data[attributes])
     filtered_data['Estimated_Value'] = filtered_data['Estimated_Value'].clip(lower=100_000, upper=200_000_000)
@@ -216,22 +221,66 @@ def analyze_role(role, config):
         median_age = output_data['Age'].median()
         output_data['Age'] = output_data['Age'].fillna(median_age).astype(int)
 
-    return output_data, unmatched_players
-
-# Lưu trữ kết quả và danh sách không khớp
-combined_outputs = []
-unmatched_records = []
-
-for role, config in roles_config.items():
-    print(f"\nĐang xử lý {role}...")
-    output, unmatched = analyze_role(role, config)
-    if output is not None:
-        combined_outputs.append(output)
-    if unmatched:
-        unmatched_records.extend([(role, player) for player in unmatched])
-
-if combined_outputs:
-    final_output = pd.concat(combined_outputs, ignore_index=True)
-    final_output = final_output.sort_values(by='Predicted_Transfer_Value_M', ascending=False)
-    final_output.to_csv(os.path.join(csv_dir, 'ml_estimated_values_linear.csv'), index=False)
-    print(f"Giá trị ước tính của các cầu thủ đã được lưu vào '{os.path.join(csv_dir, 'ml_estimated_values_linear.csv')}'")
\ No newline at end of file
+    return output_data, metrics
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Estimate player transfer values with one model per role")
+    parser.add_argument("--workers", type=int, default=None, help="Processes used to train the roles (1 = sequential)")
+    args, _ = parser.parse_known_args()
+    trace_from_args("bai4.2", base_dir)
+
+    try:
+        with stage("load") as span:
+            stats_data, valuations = load_inputs()
+            span.rows_out = len(stats_data)
+    except FileNotFoundError as e:
+        print(f"Lỗi: Không tìm thấy tệp - {e}")
+        raise SystemExit(1)
+
+    with stage("link", rows_in=len(stats_data)) as span:
+        identity_table = PlayerIdentityTable(identity_path)
+        linked_by_path = {data_path: link_valuations(stats_data, valuation_data, identity_table)
+                          for data_path, valuation_data in valuations.items()}
+        identity_table.save()
+        span.rows_out = sum(int(linked['Linked_Name'].notna().sum()) for linked in linked_by_path.values())
+        span.set(stored_links=identity_table.hits, fuzzy_matches=identity_table.matched)
+
+    # Lưu trữ kết quả và danh sách không khớp
+    combined_outputs = []
+    unmatched_records = []
+    role_inputs = {}
+    for role, config in roles_config.items():
+        print(f"\nĐang xử lý {role}...")
+        role_inputs[role], unmatched = role_view(role, config, linked_by_path[config['data_path']])
+        if unmatched:
+            unmatched_records.extend([(role, player) for player in unmatched])
+
+    workers = args.workers or min(len(roles_config), os.cpu_count() or 1)
+    start = time.perf_counter()
+    with stage("train", rows_in=sum(len(role_data) for role_data in role_inputs.values()), workers=workers):
+        if workers == 1:
+            role_results = [train_role(role, config, role_inputs[role]) for role, config in roles_config.items()]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(train_role, role, config, role_inputs[role])
+                           for role, config in roles_config.items()]
+                role_results = [future.result() for future in futures]
+    print(f"\nTrained {len(roles_config)} role models with {workers} worker(s) in {time.perf_counter() - start:.2f}s")
+
+    role_metrics = []
+    for output, metrics in role_results:
+        if output is not None:
+            combined_outputs.append(output)
+            role_metrics.append(metrics)
+    if role_metrics:
+        print(pd.DataFrame(role_metrics).round({'Fit_Seconds': 4, 'RMSE_M': 2, 'R2': 3}).to_string(index=False))
+
+    if combined_outputs:
+        with stage("save") as span:
+            final_output = pd.concat(combined_outputs, ignore_index=True)
+            final_output = final_output.sort_values(by='Predicted_Transfer_Value_M', ascending=False)
+            final_output.to_csv(os.path.join(csv_dir, 'ml_estimated_values_linear.csv'), index=False)
+            span.rows_out = len(final_output)
+        print(f"Giá trị ước tính của các cầu thủ đã được lưu vào '{os.path.join(csv_dir, 'ml_estimated_values_linear.csv')}'")
+
+    identity_table.report()
@@ -0,0 +1,74 @@
+"""
+So sánh chi phí ghép bảng: chuỗi pd.merge theo tên (cách cũ) và một lần pd.concat theo Player_ID.
+
+Usage: python bench_merge.py [players_per_season]
+Synthetic stat tables are generated for a growing number of tables and seasons;
+every player appears in each table once per season under its own key.
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+key_column = "Player_ID"
+
+
+def make_tables(players, tables, seasons, columns_per_table=10, seed=42):
+    rng = np.random.default_rng(seed)
+    keys = [f"p{season:02d}{i:07d}" for season in range(seasons) for i in range(players)]
+    table_collection = {}
+    for t in range(tables):
+        # Mỗi bảng thiếu ngẫu nhiên ~5% cầu thủ, như bảng thủ môn/sút bóng trên FBref
+        present = rng.random(len(keys)) > 0.05
+        table_keys = [key for key, keep in zip(keys, present) if keep]
+        table_data = pd.DataFrame(rng.random((len(table_keys), columns_per_table)),
+                                  columns=[f"T{t} stat {c}" for c in range(columns_per_table)])
+        table_data.insert(0, "Player", table_keys)
+        table_data[key_column] = table_keys
+        table_collection[f"table_{t}"] = table_data
+    return table_collection
+
+
+def chained_merge(table_collection):
+    combined_data = None
+    for table_data in table_collection.values():
+        table_data = table_data.drop(columns=[key_column]).drop_duplicates(subset=["Player"], keep="first")
+        if combined_data is None:
+            combined_data = table_data
+        else:
+            combined_data = pd.merge(combined_data, table_data, on="Player", how="outer", validate="1:1")
+    return combined_data
+
+
+def keyed_concat(table_collection):
+    aligned_tables = []
+    player_name_columns = []
+    for table_data in table_collection.values():
+        table_data = table_data.drop_duplicates(subset=[key_column], keep="first").set_index(key_column)
+        player_name_columns.append(table_data["Player"])
+        aligned_tables.append(table_data.drop(columns=["Player"]))
+    combined_data = pd.concat(aligned_tables, axis=1, join="outer")
+    combined_data.insert(0, "Player", pd.concat(player_name_columns).groupby(level=0).first())
+    return combined_data.rename_axis(key_column).reset_index().sort_values("Player", kind="stable")
+
+
+def best_time(func, *args, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+if __name__ == "__main__":
+    players = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    print(f"{'tables':>6} {'seasons':>7} {'rows':>9} {'chained merge':>14} {'keyed concat':>13} {'speedup':>8}")
+    for seasons in (1, 5, 10):
+        for tables in (2, 4, 8):
+            table_collection = make_tables(players, tables, seasons)
+            merge_time = best_time(chained_merge, table_collection)
+            concat_time = best_time(keyed_concat, table_collection)
+            print(f"{tables:>6} {seasons:>7} {players * seasons:>9} {merge_time * 1000:>11.1f} ms "
+                  f"{concat_time * 1000:>10.1f} ms {merge_time / concat_time:>7.1f}x")
@@ -0,0 +1,129 @@
+"""
+Đo độ trễ của player_query.py dưới tải đồng thời: truy vấn qua HTTP từ nhiều luồng, có và không có cache.
+
+The player pool is result.csv repeated (with jittered stats and renamed teams)
+until it reaches the requested size. A local load generator sends a mix of
+filter + sort + top-k queries from several client threads; query popularity
+follows a Zipf-like distribution so some queries repeat, as on a scouting
+dashboard. The same workload runs against the service with the LRU cache and
+with the cache disabled, and the ad-hoc pandas filter/sort it replaces is timed
+on a sample of the queries.
+
+Usage: python bench_query_service.py [result.csv] [--players 50000] [--clients 8] [--requests 2000]
+"""
+import argparse
+import json
+import threading
+import time
+import urllib.request
+from urllib.parse import urlencode
+
+import numpy as np
+import pandas as pd
+
+from player_query import PlayerQueryEngine, parse_query_string, start_server
+from player_table import load_player_table
+
+sort_stats = ["xG per 90", "Gls per 90", "xAG per 90", "SCA90", "PrgC", "PrgP", "Tkl", "Int", "Touches", "Minutes"]
+
+
+def make_pool(base, players, seed=42):
+    rng = np.random.default_rng(seed)
+    copies = -(-players // len(base))
+    frames = []
+    for copy in range(copies):
+        frame = base.copy()
+        if copy:
+            numeric = [col for col in frame.columns if pd.api.types.is_float_dtype(frame[col])]
+            frame[numeric] = frame[numeric] * rng.uniform(0.8, 1.2, size=(len(frame), len(numeric)))
+            frame["Team"] = frame["Team"] + f" {copy}"
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True).head(players)
+
+
+def make_queries(pool, count, seed=7):
+    rng = np.random.default_rng(seed)
+    teams = pool["Team"].dropna().unique()
+    queries = []
+    for _ in range(count):
+        params = {"sort": rng.choice(sort_stats), "k": 10, "position": rng.choice(["DF", "MF", "FW", "GK"])}
+        if rng.random() < 0.7:
+            params["team"] = rng.choice(teams)
+        if rng.random() < 0.5:
+            params["max_Age"] = int(rng.integers(21, 30))
+        if rng.random() < 0.5:
+            params["min_Minutes"] = int(rng.choice([450, 900, 1800]))
+        queries.append(urlencode(params))
+    return queries
+
+
+def run_load(port, workload, clients):
+    latencies = [[] for _ in range(clients)]
+
+    def client(index):
+        for query_string in workload[index::clients]:
+            start = time.perf_counter()
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/query?{query_string}") as response:
+                json.loads(response.read())
+            latencies[index].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return np.concatenate([np.array(values) for values in latencies]), time.perf_counter() - start
+
+
+def pandas_query(data, params):
+    subset = data
+    for col, values in params["equals"].items():
+        if col == "Position":
+            subset = subset[subset[col].fillna("").str.split(",").map(lambda parts: bool(set(parts) & set(values)))]
+        else:
+            subset = subset[subset[col].isin(values)]
+    for col, (low, high) in params["ranges"].items():
+        if low is not None:
+            subset = subset[subset[col] >= low]
+        if high is not None:
+            subset = subset[subset[col] < high]
+    return subset.dropna(subset=[params["sort_by"]]).sort_values(params["sort_by"], ascending=params["ascending"]).head(params["k"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency benchmark of the local player query service")
+    parser.add_argument("result_csv", nargs="?", default="result.csv")
+    parser.add_argument("--players", type=int, default=50_000)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--distinct", type=int, default=300, help="Number of distinct queries in the workload")
+    args = parser.parse_args()
+
+    pool = make_pool(load_player_table(args.result_csv), args.players)
+    queries = make_queries(pool, args.distinct)
+    rng = np.random.default_rng(1)
+    popularity = 1.0 / np.arange(1, len(queries) + 1)
+    workload = list(rng.choice(queries, size=args.requests, p=popularity / popularity.sum()))
+    print(f"{len(pool)} players, {args.requests} requests ({len(set(workload))} distinct) from {args.clients} clients")
+
+    start = time.perf_counter()
+    sample = [parse_query_string(query_string) for query_string in queries[:50]]
+    for params in sample:
+        pandas_query(pool, params)
+    print(f"pandas ad-hoc filter + sort: {(time.perf_counter() - start) / len(sample) * 1000:8.2f} ms per query")
+
+    for label, cache_size in (("no cache", 0), ("LRU cache", 1024)):
+        start = time.perf_counter()
+        engine = PlayerQueryEngine(pool, cache_size=cache_size)
+        build_seconds = time.perf_counter() - start
+        server = start_server(engine, port=0)
+        try:
+            latencies, wall = run_load(server.server_address[1], workload, args.clients)
+        finally:
+            server.shutdown()
+            server.server_close()
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+        stats = engine.stats()
+        print(f"{label:10s} build {build_seconds * 1000:7.1f} ms | p50 {p50:6.2f} ms  p95 {p95:6.2f} ms  "
+              f"p99 {p99:6.2f} ms | {len(latencies) / wall:7.0f} req/s | hits {stats['hits']} misses {stats['misses']}")
@@ -0,0 +1,401 @@
+"""
+Đo thời gian và bộ nhớ của từng bước pipeline trên dữ liệu giả, lưu mốc (baseline) và so sánh giữa các lần chạy.
+
+Usage:
+    python bench_suite.py [--scale small medium large|N ...] [--stages extract merge ...] [--repeat 3]
+                          [--workers 1] [--no-memory] [--no-limits] [--save-baseline NAME] [--compare NAME]
+                          [--threshold 0.2] [--bench-dir bench_results]
+    python bench_suite.py --report OLD.json NEW.json [--threshold 0.2]
+
+Data comes from synthetic_data.py (500 / 50k / 5M players for small / medium /
+large). Every stage calls the project's own functions on that data:
+    extract       table_extract.extract_tables on the eight FBref pages
+    cleaning      cleaning.py on raw names / ages / nations / fees
+    merge         bai1andbai2.build_result (extract + clean + join by Player_ID)
+    rank          top-3 rankings of every stat (top_3.txt)
+    summarize     results2.csv team median/mean/std + highest team per stat
+    histograms    league and team histograms (histograms.render_histograms)
+    kmeans_sweep  bai3.1 k sweep (k = 1..10)
+    pca_cluster   bai3.2 PCA + k-means model
+    fuzzy         FBref <-> FootballTransfers name linking (bai4.2 link_valuations)
+    role_models   bai4.2 role models (players linked by exact name)
+A stage is timed `repeat` times (best wall / CPU time is kept) and then run
+once more under tracemalloc for its peak Python + NumPy allocation. Building
+the input data is not timed. Stages that cannot run at a scale (pages, one
+image per team, dense one-hot encoding) have a player limit and are reported
+as skipped above it; --no-limits runs them anyway.
+
+Every run is written to <bench-dir>/runs/<time>.json; --save-baseline also
+stores it as <bench-dir>/baselines/NAME.json. --compare NAME prints a
+regression report against that baseline (a stage is flagged when it is more
+than --threshold slower or uses more memory) and exits with status 1 when
+something regressed, so it can gate a change.
+"""
+import argparse
+import contextlib
+import gc
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from fbref_config import default_competition, default_season, key_column, stat_urls_for, table_identifiers
+import synthetic_data
+
+stage_names = ["extract", "cleaning", "merge", "rank", "summarize", "histograms", "kmeans_sweep", "pca_cluster",
+               "fuzzy", "role_models"]
+# Giới hạn số cầu thủ của các bước không chạy nổi ở quy mô lớn (None = không giới hạn)
+stage_limits = {"extract": 50_000, "merge": 50_000, "histograms": 5_000, "fuzzy": 50_000, "role_models": 50_000}
+
+
+def load_script(name, file_name):
+    # bai4.2.py có dấu chấm trong tên nên không import trực tiếp được
+    spec = importlib.util.spec_from_file_location(name, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                     file_name))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class SyntheticData:
+    """Inputs of every stage for one scale, built once and only when a stage needs them."""
+
+    def __init__(self, players, seed=42):
+        self.n = players
+        self.seed = seed
+        self._cache = {}
+
+    def _get(self, name, build):
+        if name not in self._cache:
+            self._cache[name] = build()
+        return self._cache[name]
+
+    @property
+    def players(self):
+        return self._get("players", lambda: synthetic_data.make_players(self.n, self.seed))
+
+    @property
+    def pages(self):
+        return self._get("pages", lambda: synthetic_data.make_pages(self.players, seed=self.seed))
+
+    @property
+    def raw_columns(self):
+        return self._get("raw_columns", lambda: synthetic_data.make_raw_columns(self.players))
+
+    @property
+    def valuations(self):
+        def build():
+            from cleaning import parse_fees
+
+            valuations = synthetic_data.make_valuations(self.players, self.seed)
+            valuations["Price_Value"] = parse_fees(valuations["Price"])
+            return valuations
+        return self._get("valuations", build)
+
+    @property
+    def calc_data(self):
+        # Giống load_calc_data của bai1andbai2: cột số thiếu -> 0
+        def build():
+            calc_data = self.players.copy()
+            for col in self.numeric_columns:
+                calc_data[col] = pd.to_numeric(calc_data[col], errors="coerce").fillna(0)
+            return calc_data
+        return self._get("calc_data", build)
+
+    @property
+    def numeric_columns(self):
+        return [col for col in self.players.columns if col not in ["Player", "Nation", "Team", "Position", key_column]]
+
+    @property
+    def scaled_features(self):
+        def build():
+            from cluster_model import cluster_features
+            from cluster_selection import standardized_features
+
+            return standardized_features(self.players, cluster_features)
+        return self._get("scaled_features", build)
+
+
+def quiet(func):
+    # Các bước in rất nhiều dòng tiến trình; bỏ đi để không đo cả thời gian ghi ra màn hình
+    def run():
+        with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+            return func()
+    return run
+
+
+def extract_stage(data, work_dir, workers):
+    from table_extract import extract_tables
+
+    pages = list(zip(data.pages.values(), table_identifiers))
+    return lambda: [extract_tables(page, [table_id]) for page, table_id in pages]
+
+
+def cleaning_stage(data, work_dir, workers):
+    from cleaning import country_codes, format_player_names, parse_ages, parse_fees
+
+    raw = data.raw_columns
+
+    def run():
+        format_player_names(raw["Player"])
+        parse_ages(raw["Age"])
+        country_codes(raw["Nation"])
+        parse_fees(raw["Price"])
+    return run
+
+
+def merge_stage(data, work_dir, workers):
+    from bai1andbai2 import build_result
+
+    pages, stat_urls = data.pages, stat_urls_for(default_competition, default_season)
+    return quiet(lambda: build_result(pages, stat_urls))
+
+
+def rank_stage(data, work_dir, workers):
+    from bai1andbai2 import write_rankings
+
+    calc_data, numeric_columns = data.calc_data, data.numeric_columns
+    return quiet(lambda: write_rankings(calc_data, numeric_columns, os.path.join(work_dir, "top_3.txt")))
+
+
+def summarize_stage(data, work_dir, workers):
+    from bai1andbai2 import write_team_summaries
+
+    calc_data, numeric_columns = data.calc_data, data.numeric_columns
+    return quiet(lambda: write_team_summaries(calc_data, numeric_columns, os.path.join(work_dir, "results2.csv"),
+                                              os.path.join(work_dir, "highest_team_stats.csv"), "benchmark"))
+
+
+def histograms_stage(data, work_dir, workers):
+    from histograms import default_plot_stats, render_histograms
+
+    plot_data = data.calc_data[["Team"] + default_plot_stats]
+    folder = os.path.join(work_dir, "histograms")
+    return quiet(lambda: render_histograms(plot_data, default_plot_stats, folder, workers=workers, force=True))
+
+
+def kmeans_sweep_stage(data, work_dir, workers):
+    from cluster_selection import sweep_k, suggest_k
+
+    X_scaled, _ = data.scaled_features
+    return lambda: suggest_k(sweep_k(X_scaled, range(1, 11)))
+
+
+def pca_cluster_stage(data, work_dir, workers):
+    from cluster_model import cluster_features, fit_cluster_model
+
+    X_scaled, scaler = data.scaled_features
+    players = data.players
+    return lambda: fit_cluster_model(players, cluster_features, n_components=2, n_clusters=4,
+                                     X_scaled=X_scaled, scaler=scaler)
+
+
+def fuzzy_stage(data, work_dir, workers):
+    from player_identity import PlayerIdentityTable
+
+    valuation_model = load_script("bai4_2", "bai4.2.py")
+    stats_data = data.players[["Player", "Position", key_column]]
+    valuations = data.valuations
+    identity_path = os.path.join(work_dir, "player_identity.csv")
+
+    def run():
+        # Bảng định danh mới mỗi lần: đo trường hợp phải so khớp mờ toàn bộ
+        return valuation_model.link_valuations(stats_data, valuations, PlayerIdentityTable(identity_path))
+    return run
+
+
+def role_models_stage(data, work_dir, workers):
+    valuation_model = load_script("bai4_2", "bai4.2.py")
+    linked_data = data.players.copy()
+    linked_data["Main_Role"] = linked_data["Position"].astype(str).str.split(r"[,/]").str[0].str.strip().str.upper()
+    price_by_name = data.valuations.drop_duplicates(subset="Player").set_index("Player")["Price_Value"]
+    linked_data["Valuation"] = linked_data["Player"].map(price_by_name)
+    linked_data["Linked_Name"] = linked_data["Player"].where(linked_data["Valuation"].notna())
+    linked_data["Link_Score"] = 100
+
+    def run():
+        for role, config in valuation_model.roles_config.items():
+            role_data, _ = valuation_model.role_view(role, config, linked_data)
+            valuation_model.train_role(role, config, role_data)
+    return quiet(run)
+
+
+stage_builders = {
+    "extract": extract_stage,
+    "cleaning": cleaning_stage,
+    "merge": merge_stage,
+    "rank": rank_stage,
+    "summarize": summarize_stage,
+    "histograms": histograms_stage,
+    "kmeans_sweep": kmeans_sweep_stage,
+    "pca_cluster": pca_cluster_stage,
+    "fuzzy": fuzzy_stage,
+    "role_models": role_models_stage,
+}
+
+
+def measure(run, repeat=3, memory=True):
+    """Best wall / CPU seconds over repeat runs and the tracemalloc peak (MiB) of one more run."""
+    wall_times, cpu_times = [], []
+    for _ in range(repeat):
+        gc.collect()
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        run()
+        wall_times.append(time.perf_counter() - start_wall)
+        cpu_times.append(time.process_time() - start_cpu)
+    peak_mb = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            run()
+            peak_mb = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            tracemalloc.stop()
+    return {"seconds": min(wall_times), "median_seconds": float(np.median(wall_times)),
+            "cpu_seconds": min(cpu_times), "peak_mb": peak_mb}
+
+
+def machine_info():
+    import sklearn
+
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+            "numpy": np.__version__, "pandas": pd.__version__, "sklearn": sklearn.__version__}
+
+
+def run_suite(scales, stages, repeat=3, memory=True, limits=True, seed=42, workers=1):
+    results = []
+    for scale in scales:
+        players = synthetic_data.players_for_scale(scale)
+        data = SyntheticData(players, seed)
+        print(f"\n📏 Scale {scale}: {players} players")
+        for stage in stages:
+            limit = stage_limits.get(stage)
+            entry = {"stage": stage, "scale": str(scale), "players": players}
+            if limits and limit is not None and players > limit:
+                entry.update(status="skipped", note=f"above the {limit} player limit of this stage")
+                print(f"  ⏭️ {stage:<13} skipped ({entry['note']}; --no-limits to force)")
+                results.append(entry)
+                continue
+            work_dir = tempfile.mkdtemp(prefix=f"bench_{stage}_")
+            try:
+                setup_start = time.perf_counter()
+                run = stage_builders[stage](data, work_dir, workers)
+                setup_seconds = time.perf_counter() - setup_start
+                entry.update(measure(run, repeat, memory), status="ok", setup_seconds=setup_seconds)
+            except MemoryError:
+                entry.update(status="failed", note="MemoryError")
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+            results.append(entry)
+            if entry["status"] == "ok":
+                memory_text = f"{entry['peak_mb']:>9.1f} MiB" if entry["peak_mb"] is not None else ""
+                print(f"  ⏱️ {stage:<13} {entry['seconds'] * 1000:>10.1f} ms  cpu {entry['cpu_seconds'] * 1000:>10.1f} ms"
+                      f"  {memory_text}")
+            else:
+                print(f"  ❌ {stage:<13} {entry['note']}")
+    return {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "machine": machine_info(), "seed": seed,
+            "repeat": repeat, "results": results}
+
+
+def save_run(run, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(run, f, indent=1)
+    return path
+
+
+def load_run(name_or_path, bench_dir):
+    path = name_or_path
+    if not os.path.exists(path):
+        path = os.path.join(bench_dir, "baselines", f"{name_or_path}.json")
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare_runs(baseline, current, threshold=0.2):
+    """Per stage/scale comparison table; a ratio above 1 + threshold is a regression."""
+    old = {(entry["stage"], entry["scale"]): entry for entry in baseline["results"] if entry["status"] == "ok"}
+    rows = []
+    for entry in current["results"]:
+        base = old.get((entry["stage"], entry["scale"]))
+        if entry["status"] != "ok" or base is None:
+            continue
+        time_ratio = entry["seconds"] / base["seconds"] if base["seconds"] else np.nan
+        memory_ratio = np.nan
+        if entry.get("peak_mb") is not None and base.get("peak_mb"):
+            memory_ratio = entry["peak_mb"] / base["peak_mb"]
+        if time_ratio > 1 + threshold or memory_ratio > 1 + threshold:
+            verdict = "regression"
+        elif time_ratio < 1 / (1 + threshold):
+            verdict = "faster"
+        else:
+            verdict = "same"
+        rows.append({"Stage": entry["stage"], "Scale": entry["scale"],
+                     "Old ms": base["seconds"] * 1000, "New ms": entry["seconds"] * 1000, "Time x": time_ratio,
+                     "Old MiB": base.get("peak_mb"), "New MiB": entry.get("peak_mb"), "Memory x": memory_ratio,
+                     "Verdict": verdict})
+    return pd.DataFrame(rows, columns=["Stage", "Scale", "Old ms", "New ms", "Time x", "Old MiB", "New MiB",
+                                       "Memory x", "Verdict"])
+
+
+def print_report(baseline, current, threshold=0.2):
+    """Print the regression report; returns True when some stage regressed."""
+    if baseline.get("machine") != current.get("machine"):
+        print("⚠️ The runs come from different machines or library versions; ratios are only indicative")
+    report = compare_runs(baseline, current, threshold)
+    if report.empty:
+        print("⚠️ No stage / scale in common between the two runs")
+        return False
+    print(f"\n📈 {baseline['created']} -> {current['created']} (threshold {threshold:.0%})")
+    print(report.round({"Old ms": 1, "New ms": 1, "Time x": 2, "Old MiB": 1, "New MiB": 1, "Memory x": 2})
+          .to_string(index=False))
+    regressions = report[report["Verdict"] == "regression"]
+    if len(regressions):
+        print(f"❌ {len(regressions)} regression(s): "
+              + ", ".join(f"{row.Stage}@{row.Scale}" for row in regressions.itertuples()))
+        return True
+    print("✅ No regression")
+    return False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time and memory-profile every pipeline stage on synthetic data")
+    parser.add_argument("--scale", nargs="+", default=["small"], help="small (500), medium (50k), large (5M) or N")
+    parser.add_argument("--stages", nargs="+", choices=stage_names, default=stage_names)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=1, help="Processes used to render the histograms")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc run of each stage")
+    parser.add_argument("--no-limits", action="store_true", help="Run every stage at every scale")
+    parser.add_argument("--bench-dir", default="bench_results")
+    parser.add_argument("--save-baseline", default=None, metavar="NAME")
+    parser.add_argument("--compare", default=None, metavar="NAME", help="Baseline name (or run file) to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative slowdown reported as a regression")
+    parser.add_argument("--report", nargs=2, default=None, metavar=("OLD", "NEW"),
+                        help="Only compare two saved runs")
+    args = parser.parse_args()
+
+    if args.report:
+        regressed = print_report(load_run(args.report[0], args.bench_dir), load_run(args.report[1], args.bench_dir),
+                                 args.threshold)
+        sys.exit(1 if regressed else 0)
+
+    baseline = load_run(args.compare, args.bench_dir) if args.compare else None
+    current = run_suite(args.scale, args.stages, args.repeat, not args.no_memory, not args.no_limits, args.seed,
+                        args.workers)
+    run_path = save_run(current, os.path.join(args.bench_dir, "runs", time.strftime("%Y%m%d-%H%M%S") + ".json"))
+    print(f"\n✅ Saved run to {run_path}")
+    if args.save_baseline:
+        baseline_path = save_run(current, os.path.join(args.bench_dir, "baselines", f"{args.save_baseline}.json"))
+        print(f"✅ Saved baseline {args.save_baseline} to {baseline_path}")
+    if baseline is not None and print_report(baseline, current, args.threshold):
+        sys.exit(1)
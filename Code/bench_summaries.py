@@ -0,0 +1,67 @@
+"""
+So sánh cách tính results2.csv: vòng lặp theo đội/cột (cách cũ) và summarize() (một lần groupby).
+
+Usage: python bench_summaries.py [players] [teams] [columns]
+Defaults to a synthetic table of 100,000 players, 20 teams and 75 stat columns.
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from summaries import summarize
+
+
+def make_players(players, teams, columns, seed=42):
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame(rng.gamma(2.0, 10.0, size=(players, columns)), columns=[f"Stat {i}" for i in range(columns)])
+    data.insert(0, "Team", rng.choice([f"Team {i:02d}" for i in range(teams)], size=players))
+    return data
+
+
+def loop_summary(calc_data, numeric_columns):
+    stat_rows = []
+    league_stats = {"": "all"}
+    for col in numeric_columns:
+        league_stats[f"Median of {col}"] = calc_data[col].median()
+        league_stats[f"Mean of {col}"] = calc_data[col].mean()
+        league_stats[f"Std of {col}"] = calc_data[col].std()
+    stat_rows.append(league_stats)
+    for team in sorted(calc_data["Team"].unique()):
+        team_subset = calc_data[calc_data["Team"] == team]
+        team_metrics = {"": team}
+        for col in numeric_columns:
+            team_metrics[f"Median of {col}"] = team_subset[col].median()
+            team_metrics[f"Mean of {col}"] = team_subset[col].mean()
+            team_metrics[f"Std of {col}"] = team_subset[col].std()
+        stat_rows.append(team_metrics)
+    stats_summary = pd.DataFrame(stat_rows)
+    for col in stats_summary.columns:
+        if col != "":
+            stats_summary[col] = stats_summary[col].round(2)
+    return stats_summary
+
+
+if __name__ == "__main__":
+    players = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    teams = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    columns = int(sys.argv[3]) if len(sys.argv) > 3 else 75
+    calc_data = make_players(players, teams, columns)
+    numeric_columns = [col for col in calc_data.columns if col != "Team"]
+
+    start = time.perf_counter()
+    old = loop_summary(calc_data, numeric_columns)
+    loop_time = time.perf_counter() - start
+    start = time.perf_counter()
+    new = summarize(calc_data, numeric_columns)
+    grouped_time = time.perf_counter() - start
+    max_diff = np.abs(old.iloc[:, 1:].to_numpy() - new.iloc[:, 1:].to_numpy()).max()
+
+    print(f"{players} players, {teams} teams, {columns} columns")
+    print(f"loop:    {loop_time:8.3f} s")
+    print(f"grouped: {grouped_time:8.3f} s ({loop_time / grouped_time:.1f}x faster)")
+    print(f"max difference after rounding: {max_diff:.2f}")
+    start = time.perf_counter()
+    summarize(calc_data, numeric_columns, statistics=("median", "mean", "std", "p10", "p90"))
+    print(f"grouped with p10/p90: {time.perf_counter() - start:8.3f} s")
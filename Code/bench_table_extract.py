@@ -0,0 +1,67 @@
+"""
+So sánh thời gian trích xuất bảng: BeautifulSoup (cách cũ) và table_extract (quét một lượt).
+
+Usage: python bench_table_extract.py <saved_pages_dir> [repeat]
+Every *.html file (or extension-less file) under the directory is treated as a
+saved FBref page; the table ids from fbref_config are looked up in each.
+"""
+import os
+import sys
+import time
+from io import StringIO
+
+import pandas as pd
+from bs4 import BeautifulSoup, Comment
+
+from fbref_config import key_column, table_identifiers
+from table_extract import extract_tables
+
+
+def extract_with_soup(page_source, table_id):
+    page_soup = BeautifulSoup(page_source, "html.parser")
+    html_comments = page_soup.find_all(string=lambda text: isinstance(text, Comment))
+    for comment in html_comments:
+        if table_id in comment:
+            comment_soup = BeautifulSoup(comment, "html.parser")
+            data_table = comment_soup.find("table", {"id": table_id})
+            if data_table:
+                return pd.read_html(StringIO(str(data_table)), header=0)[0]
+    return None
+
+
+def time_call(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def saved_pages(directory):
+    for folder, _, files in os.walk(directory):
+        for name in sorted(files):
+            if name.endswith(".html") or "." not in name:
+                yield os.path.join(folder, name)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    pages_dir = sys.argv[1]
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    total_old = total_new = 0.0
+    for path in saved_pages(pages_dir):
+        with open(path, encoding="utf-8") as f:
+            page_source = f.read()
+        table_ids = [table_id for table_id in table_identifiers if f'id="{table_id}"' in page_source]
+        if not table_ids:
+            continue
+        old_time, old_tables = time_call(lambda: {t: extract_with_soup(page_source, t) for t in table_ids}, repeat)
+        new_time, new_tables = time_call(lambda: extract_tables(page_source, table_ids), repeat)
+        same = all(old_tables[t] is not None and t in new_tables
+                   and old_tables[t].equals(new_tables[t].drop(columns=[key_column], errors="ignore")) for t in table_ids)
+        total_old += old_time
+        total_new += new_time
+        print(f"{os.path.relpath(path, pages_dir):70s} soup {old_time * 1000:8.1f} ms | single-pass {new_time * 1000:8.1f} ms | identical: {same}")
+    if total_new:
+        print(f"Total: soup {total_old * 1000:.1f} ms, single-pass {total_new * 1000:.1f} ms ({total_old / total_new:.1f}x faster)")
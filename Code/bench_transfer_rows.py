@@ -0,0 +1,95 @@
+"""
+So sánh thời gian lấy các dòng bảng FootballTransfers: WebDriver từng ô (cách cũ), một lần execute_script, và parse page source.
+
+Usage: python bench_transfer_rows.py <saved_pages_dir> [--table-class transfer-table] [--repeat 3] [--browser]
+Every *.html file under the directory is treated as a saved transfer or ETV page.
+Without --browser only the page-source parse is timed. With --browser each
+saved page is opened in headless Chrome (file:// URL) and the old per-cell
+calls (find_elements for rows and cells, .text for every cell read) are timed
+against browser_row_cells, which returns all rows in one execute_script call.
+"""
+import argparse
+import os
+import time
+
+from table_extract import browser_row_cells, table_row_cells
+
+
+def per_cell_rows(driver, table_class):
+    # Cách cũ: mỗi find_elements / .text là một lượt gọi WebDriver
+    from selenium.webdriver.common.by import By
+
+    table = driver.find_element(By.CLASS_NAME, table_class)
+    calls = 2
+    rows = []
+    for row in table.find_elements(By.TAG_NAME, "tr"):
+        cells = row.find_elements(By.XPATH, "./td")
+        calls += 1 + len(cells)
+        rows.append([cell.text for cell in cells])
+    return rows, calls
+
+
+def time_call(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def first_lines(rows):
+    # So sánh như code xử lý dòng: dòng đầu của ô đầu tiên và ô cuối cùng
+    return [(cells[0].strip().split("\n")[0].strip(), cells[-1].strip()) for cells in rows if len(cells) >= 2]
+
+
+def make_driver():
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
+    options = Options()
+    options.add_argument("--headless")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    return webdriver.Chrome(options=options)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time table row extraction on saved FootballTransfers pages")
+    parser.add_argument("pages_dir")
+    parser.add_argument("--table-class", default="transfer-table")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--browser", action="store_true", help="Also time the WebDriver approaches in headless Chrome")
+    args = parser.parse_args()
+
+    driver = make_driver() if args.browser else None
+    totals = {"per-cell": 0.0, "script": 0.0, "source": 0.0}
+    try:
+        for name in sorted(os.listdir(args.pages_dir)):
+            if not name.endswith(".html"):
+                continue
+            path = os.path.abspath(os.path.join(args.pages_dir, name))
+            with open(path, encoding="utf-8") as f:
+                page_source = f.read()
+            source_time, source_rows = time_call(lambda: table_row_cells(page_source, args.table_class), args.repeat)
+            if source_rows is None:
+                print(f"{name:40s} table .{args.table_class} not found")
+                continue
+            totals["source"] += source_time
+            line = f"{name:40s} {len(source_rows):4d} rows | page source {source_time * 1000:8.2f} ms"
+            if driver is not None:
+                driver.get("file://" + path)
+                cell_time, (cell_rows, calls) = time_call(lambda: per_cell_rows(driver, args.table_class), args.repeat)
+                script_time, script_rows = time_call(lambda: browser_row_cells(driver, args.table_class), args.repeat)
+                totals["per-cell"] += cell_time
+                totals["script"] += script_time
+                same = first_lines(cell_rows) == first_lines(script_rows) == first_lines(source_rows)
+                line += (f" | per-cell {cell_time * 1000:8.1f} ms ({calls} calls)"
+                         f" | one script {script_time * 1000:8.2f} ms (1 call) | identical: {same}")
+            print(line)
+    finally:
+        if driver is not None:
+            driver.quit()
+    print(f"Total: page source {totals['source'] * 1000:.1f} ms", end="")
+    if driver is not None and totals["script"]:
+        print(f", per-cell {totals['per-cell'] * 1000:.1f} ms, one script {totals['script'] * 1000:.1f} ms "
+              f"({totals['per-cell'] / totals['script']:.1f}x fewer ms than per-cell)", end="")
+    print()
@@ -0,0 +1,234 @@
+"""
+Nhóm trình duyệt Chrome headless dùng chung cho mọi script crawl.
+
+BrowserPool starts up to `size` Chrome instances lazily (no browser at all when
+every page comes from the cache), hands them out through acquire() and keeps
+them warm for the next page. A browser that fails a health check or raises a
+WebDriver error is quit and replaced. The chromedriver path is resolved once
+per process. Pages load with the "eager" strategy (stop at DOMContentLoaded)
+and images are blocked by default; stylesheets can be blocked too. With
+remote_url (or --browser-remote) the pool talks to a Selenium server, so the
+browsers stay warm across script runs instead of starting per script.
+
+render_many() renders several URLs concurrently, one thread per browser;
+prefetch_pages() renders the pages missing from a PageCache and stores them.
+"""
+import argparse
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from instrumentation import count, stage
+
+default_user_agent = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                      "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+
+def chromedriver_path():
+    # Chỉ tìm / tải chromedriver một lần cho mỗi process
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            from webdriver_manager.chrome import ChromeDriverManager
+
+            _driver_path = ChromeDriverManager().install()
+    return _driver_path
+
+
+class BrowserPool:
+    def __init__(self, size=2, headless=True, page_load_strategy="eager", block_images=True, block_css=False,
+                 user_agent=default_user_agent, remote_url=None):
+        self.size = max(1, size)
+        self.headless = headless
+        self.page_load_strategy = page_load_strategy
+        self.block_images = block_images
+        self.block_css = block_css
+        self.user_agent = user_agent
+        self.remote_url = remote_url
+        self._idle = queue.LifoQueue()
+        self._started = 0
+        self._lock = threading.Lock()
+        self._drivers = []
+        self.pages_rendered = 0
+        self.startup_seconds = 0.0
+
+    def _options(self):
+        from selenium.webdriver.chrome.options import Options
+
+        options = Options()
+        if self.headless:
+            options.add_argument("--headless=new")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--disable-gpu")
+        options.add_argument(f"user-agent={self.user_agent}")
+        options.page_load_strategy = self.page_load_strategy
+        if self.block_images:
+            options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+        return options
+
+    def _start_driver(self):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+
+        start = time.perf_counter()
+        with stage("browser start"):
+            if self.remote_url:
+                driver = webdriver.Remote(command_executor=self.remote_url, options=self._options())
+            else:
+                driver = webdriver.Chrome(service=Service(chromedriver_path()), options=self._options())
+        if self.block_css and not self.remote_url:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": ["*.css", "*.woff", "*.woff2"]})
+        self.startup_seconds += time.perf_counter() - start
+        return driver
+
+    @staticmethod
+    def _healthy(driver):
+        try:
+            return driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _discard(self, driver):
+        with self._lock:
+            if driver in self._drivers:
+                self._drivers.remove(driver)
+            self._started -= 1
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _take(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            can_start = self._started < self.size
+            if can_start:
+                self._started += 1
+        if not can_start:
+            return self._idle.get()
+        try:
+            driver = self._start_driver()
+        except Exception:
+            with self._lock:
+                self._started -= 1
+            raise
+        with self._lock:
+            self._drivers.append(driver)
+        return driver
+
+    @contextmanager
+    def acquire(self):
+        """Borrow a healthy browser; it goes back to the pool afterwards (or is replaced if it broke)."""
+        from selenium.common.exceptions import TimeoutException, WebDriverException
+
+        driver = self._take()
+        while not self._healthy(driver):
+            self._discard(driver)
+            driver = self._take()
+        try:
+            yield driver
+        except TimeoutException:
+            self._idle.put(driver)
+            raise
+        except WebDriverException:
+            self._discard(driver)
+            raise
+        except BaseException:
+            self._idle.put(driver)
+            raise
+        else:
+            self._idle.put(driver)
+
+    def render(self, url, wait_for_class=None, wait_seconds=None, timeout=20):
+        """Page source of url after the element with class wait_for_class appears (or after wait_seconds)."""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        with self.acquire() as driver, stage("browser render", url=url):
+            driver.get(url)
+            if wait_for_class:
+                WebDriverWait(driver, timeout).until(EC.presence_of_element_located((By.CLASS_NAME, wait_for_class)))
+            if wait_seconds:
+                # Thời gian chờ cố định được ghi riêng để thấy nó chiếm bao nhiêu trong trace
+                with stage("browser wait", seconds=wait_seconds):
+                    time.sleep(wait_seconds)
+                count("wait_seconds", wait_seconds)
+            page_source = driver.page_source
+        with self._lock:
+            self.pages_rendered += 1
+        count("pages_rendered")
+        count("bytes_rendered", len(page_source.encode("utf-8")))
+        return page_source
+
+    def render_many(self, urls, **render_kwargs):
+        """{url: (html or None, seconds)} for every url, rendered concurrently on the pool's browsers."""
+        def timed_render(url):
+            start = time.perf_counter()
+            try:
+                return url, (self.render(url, **render_kwargs), time.perf_counter() - start)
+            except Exception as e:
+                print(f"❌ Browser could not render {url}: {e}")
+                return url, (None, time.perf_counter() - start)
+
+        if not urls:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.size, len(urls))) as executor:
+            return dict(executor.map(timed_render, urls))
+
+    def close(self):
+        with self._lock:
+            drivers, self._drivers = self._drivers, []
+            self._started = 0
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        self._idle = queue.LifoQueue()
+
+    def report(self):
+        if self.pages_rendered or self.startup_seconds:
+            print(f"🌐 Browser pool: {self.pages_rendered} page(s) rendered, "
+                  f"{self.startup_seconds:.1f}s spent starting browsers")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def prefetch_pages(page_cache, pool, urls, params=None, **render_kwargs):
+    """Render the urls that are not in page_cache concurrently and store them; returns how many were fetched."""
+    if page_cache.offline or not page_cache.enabled:
+        return 0
+    missing = [url for url in urls if not page_cache.contains(url, params)]
+    fetched = 0
+    for url, (html, _) in pool.render_many(missing, **render_kwargs).items():
+        if html is not None:
+            page_cache.put(url, html, params)
+            fetched += 1
+    return fetched
+
+
+def browser_pool_from_args(description=None):
+    """Build a BrowserPool from the --browsers / --load-images / --block-css / --browser-remote flags."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--browsers", type=int, default=2, help="Number of Chrome instances rendering in parallel")
+    parser.add_argument("--load-images", action="store_true", help="Do not block images while rendering")
+    parser.add_argument("--block-css", action="store_true", help="Also block stylesheets and web fonts")
+    parser.add_argument("--browser-remote", default=None, help="Selenium server URL to keep browsers warm across runs")
+    args, _ = parser.parse_known_args()
+    return BrowserPool(size=args.browsers, block_images=not args.load_images, block_css=args.block_css,
+                       remote_url=args.browser_remote)
@@ -0,0 +1,88 @@
+"""
+Các hàm làm sạch dữ liệu theo cột (vectorized), dùng chung cho mọi script.
+
+Each function takes a whole pandas Series and returns a new one computed with
+the .str accessor / NumPy instead of a per-value Python function, with the
+same results as the original per-value helpers:
+- parse_ages:          "27-123" -> 27.34 (years + days / 365), "27.5" -> 27.5
+- country_codes:       "eng ENG" -> "ENG"
+- format_player_names: "Saka, Bukayo" -> "Bukayo Saka", collapses whitespace
+- truncate_names:      first two words of a name
+- shorten_names:       first and last word for names of three or more words
+- parse_fees:          "€41.6M" -> 41600000.0, "£500K" -> 500000.0
+"""
+import numpy as np
+import pandas as pd
+
+
+def _as_text(values):
+    # Giá trị không phải chuỗi (NaN, số) được coi là thiếu, giống các hàm cũ
+    values = pd.Series(values)
+    return values.where(values.map(type) == str).astype("string")
+
+
+def parse_ages(values):
+    """FBref ages ("years-days" or plain numbers) as decimal years, NaN when unparseable."""
+    text = pd.Series(values).astype("string").str.strip()
+    text = text.mask(text == "N/A")
+    parts = text.str.extract(r"^(\d+)\s*-\s*(\d+)$")
+    years = pd.to_numeric(parts[0], errors="coerce").astype("float64")
+    days = pd.to_numeric(parts[1], errors="coerce").astype("float64")
+    from_days = years + days / 365
+    is_plain = ~text.str.contains("-", regex=False, na=True) & (
+        text.str.contains(".", regex=False, na=False) | text.str.fullmatch(r"\d+", na=False))
+    plain = pd.to_numeric(text.where(is_plain), errors="coerce").astype("float64")
+    return from_days.where(parts[0].notna(), plain).round(2)
+
+
+def country_codes(values):
+    """Last token of the Nation column ("eng ENG" -> "ENG"), "N/A" when missing."""
+    text = _as_text(values)
+    codes = text.str.split().str[-1]
+    return codes.where(text != "N/A").fillna("N/A").astype(object)
+
+
+def format_player_names(values):
+    """Turn "Last, First" into "First Last" and collapse whitespace, "N/A" when missing."""
+    text = _as_text(values)
+    has_comma = text.str.contains(",", regex=False, na=False)
+    names = text.str.replace(r"\s+", " ", regex=True).str.strip()
+    if has_comma.any():
+        parts = text[has_comma].str.split(",", expand=True)
+        reversed_names = pd.Series(pd.NA, index=parts.index, dtype="string")
+        for col in reversed(parts.columns):
+            part = parts[col].astype("string").str.strip()
+            joined = reversed_names.str.cat(part, sep=" ")
+            reversed_names = part.where(reversed_names.isna(), joined).where(part.notna(), reversed_names)
+        names[has_comma] = reversed_names.str.replace(r"\s+", " ", regex=True).str.strip()
+    return names.where(text != "N/A").fillna("N/A").astype(object)
+
+
+def truncate_names(values):
+    """First two words of each name; names with fewer words are kept unchanged."""
+    text = _as_text(values)
+    words = text.str.strip().str.split()
+    first_two = words.str[0].str.cat(words.str[1], sep=" ")
+    return first_two.where(words.str.len() >= 2, text).fillna("").astype(object)
+
+
+def shorten_names(values, special_cases=None):
+    """First and last word for names of three or more words, with explicit overrides."""
+    text = _as_text(values)
+    words = text.str.strip().str.split()
+    first_last = words.str[0].str.cat(words.str[-1], sep=" ")
+    shortened = first_last.where(words.str.len() >= 3, text)
+    if special_cases:
+        shortened = text.map(special_cases).astype("string").fillna(shortened)
+    return shortened.astype(object)
+
+
+def parse_fees(values):
+    """Fee/valuation strings such as "€41.6M" or "£500K" as floats, NaN when unparseable."""
+    text = _as_text(values)
+    text = text.mask(text.isin(["N/A", ""]))
+    text = text.str.replace(r"[€£]", "", regex=True).str.strip().str.upper()
+    multiplier = np.where(text.str.contains("M", regex=False, na=False), 1_000_000,
+                          np.where(text.str.contains("K", regex=False, na=False), 1000, 1))
+    amounts = pd.to_numeric(text.str.replace(r"[MK]", "", regex=True).str.strip(), errors="coerce")
+    return pd.Series(amounts.astype("float64").to_numpy() * multiplier, index=text.index)
@@ -0,0 +1,167 @@
+"""
+Lưu mô hình phân cụm (StandardScaler -> PCA -> KMeans) để gán cụm cho cầu thủ mới mà không cần fit lại.
+
+The fitted chain is saved with joblib as a versioned artifact
+(cluster_model_v<N>.joblib) together with the feature list and per-cluster
+sizes. assign_clusters folds scaler and PCA into one affine map and picks the
+nearest centre with a single matrix product, so thousands of players are
+labelled per call. update_cluster_model moves the centres towards newly
+scraped players (running-mean update, as in mini-batch k-means) and saves the
+result as the next version; scaler and PCA stay frozen so labels remain
+comparable across versions.
+
+Usage:
+    python cluster_model.py fit <result.csv> [--model-dir DIR]
+    python cluster_model.py assign <players.csv> [--out labelled.csv] [--version N]
+    python cluster_model.py update <players.csv>
+"""
+import argparse
+import glob
+import os
+import re
+import time
+
+import joblib
+import numpy as np
+import sklearn
+from sklearn.cluster import KMeans
+from sklearn.decomposition import PCA
+from sklearn.preprocessing import StandardScaler
+
+default_model_dir = "models"
+cluster_features = [
+    'Gls per 90', 'Ast per 90', 'xG per 90', 'xAG per 90', 'SCA90', 'GCA90',
+    'Cmp%', 'TotDist', 'KP', 'PPA', 'Tkl', 'Blocks', 'Int',
+    'Touches', 'PrgC', 'PrgP', 'PrgR', 'Carries'
+]
+
+
+def feature_matrix(data, features):
+    return data[features].astype("float64").fillna(0).to_numpy()
+
+
+def fit_cluster_model(data, features=cluster_features, n_components=2, n_clusters=4, X_scaled=None, scaler=None,
+                      random_state=42):
+    """Fit scaler, PCA and KMeans like bai3.2.py; returns (model, X_pca, labels)."""
+    if X_scaled is None or scaler is None:
+        scaler = StandardScaler()
+        X_scaled = scaler.fit_transform(feature_matrix(data, features))
+    pca = PCA(n_components=n_components)
+    X_pca = pca.fit_transform(X_scaled)
+    kmeans = KMeans(n_clusters=n_clusters, random_state=random_state, n_init=10)
+    labels = kmeans.fit_predict(X_pca)
+    model = {
+        "features": list(features),
+        "scaler": scaler,
+        "pca": pca,
+        "kmeans": kmeans,
+        "centers": kmeans.cluster_centers_.copy(),
+        "cluster_counts": np.bincount(labels, minlength=n_clusters).astype("float64"),
+        "n_samples": int(len(X_pca)),
+        "sklearn_version": sklearn.__version__,
+        "created": time.time(),
+    }
+    _compile(model)
+    return model, X_pca, labels
+
+
+def _compile(model):
+    # Gộp scaler + PCA thành một phép biến đổi affine: Z = X @ weights + offset
+    scaler, pca = model["scaler"], model["pca"]
+    weights = (pca.components_ / scaler.scale_).T
+    offset = -(scaler.mean_ / scaler.scale_ + pca.mean_) @ pca.components_.T
+    model["weights"] = np.ascontiguousarray(weights)
+    model["offset"] = offset
+    model["center_norms"] = (model["centers"] ** 2).sum(axis=1)
+
+
+def project(model, data):
+    return feature_matrix(data, model["features"]) @ model["weights"] + model["offset"]
+
+
+def assign_clusters(model, data):
+    """Cluster label of every row of data (a DataFrame with the model's feature columns)."""
+    Z = project(model, data)
+    distances = model["center_norms"] - 2 * Z @ model["centers"].T
+    return distances.argmin(axis=1)
+
+
+def update_cluster_model(model, data):
+    """Move the centres towards the rows of data (running mean per cluster) and return a new model."""
+    Z = project(model, data)
+    labels = assign_clusters(model, data)
+    centers = model["centers"].copy()
+    counts = model["cluster_counts"].copy()
+    for cluster in range(len(centers)):
+        members = Z[labels == cluster]
+        if len(members):
+            counts[cluster] += len(members)
+            centers[cluster] += (members.sum(axis=0) - len(members) * centers[cluster]) / counts[cluster]
+    updated = dict(model, centers=centers, cluster_counts=counts, n_samples=model["n_samples"] + len(Z),
+                   created=time.time())
+    _compile(updated)
+    return updated
+
+
+def _versions(model_dir):
+    versions = []
+    for path in glob.glob(os.path.join(model_dir, "cluster_model_v*.joblib")):
+        match = re.search(r"cluster_model_v(\d+)\.joblib$", path)
+        if match:
+            versions.append(int(match.group(1)))
+    return sorted(versions)
+
+
+def save_cluster_model(model, model_dir=default_model_dir):
+    """Save as the next cluster_model_v<N>.joblib and return (version, path)."""
+    os.makedirs(model_dir, exist_ok=True)
+    versions = _versions(model_dir)
+    version = versions[-1] + 1 if versions else 1
+    model["version"] = version
+    path = os.path.join(model_dir, f"cluster_model_v{version}.joblib")
+    joblib.dump(model, path)
+    return version, path
+
+
+def load_cluster_model(model_dir=default_model_dir, version=None):
+    """Load a saved model (the latest version by default)."""
+    versions = _versions(model_dir)
+    if not versions:
+        raise FileNotFoundError(f"No cluster model found in {model_dir}")
+    version = versions[-1] if version is None else version
+    model = joblib.load(os.path.join(model_dir, f"cluster_model_v{version}.joblib"))
+    if model.get("sklearn_version") != sklearn.__version__:
+        print(f"⚠️ Model was saved with scikit-learn {model.get('sklearn_version')}, running {sklearn.__version__}")
+    return model
+
+
+if __name__ == "__main__":
+    from player_table import load_player_table
+
+    parser = argparse.ArgumentParser(description="Fit, apply or update the saved player clustering model")
+    parser.add_argument("command", choices=["fit", "assign", "update"])
+    parser.add_argument("players_csv")
+    parser.add_argument("--model-dir", default=default_model_dir)
+    parser.add_argument("--version", type=int, default=None)
+    parser.add_argument("--out", default=None, help="Where to write the labelled players (assign)")
+    args = parser.parse_args()
+
+    if args.command == "fit":
+        model, _, _ = fit_cluster_model(load_player_table(args.players_csv, cluster_features))
+        version, path = save_cluster_model(model, args.model_dir)
+        print(f"Saved cluster model v{version} to {path}")
+    elif args.command == "assign":
+        model = load_cluster_model(args.model_dir, args.version)
+        players = load_player_table(args.players_csv)
+        start = time.perf_counter()
+        players["Cluster"] = assign_clusters(model, players)
+        print(f"Assigned {len(players)} players with model v{model['version']} "
+              f"in {(time.perf_counter() - start) * 1000:.2f} ms")
+        out_path = args.out or os.path.splitext(args.players_csv)[0] + "_clusters.csv"
+        players.to_csv(out_path, index=False, encoding="utf-8-sig")
+        print(f"Saved labelled players to {out_path}")
+    else:
+        model = load_cluster_model(args.model_dir, args.version)
+        updated = update_cluster_model(model, load_player_table(args.players_csv, model["features"]))
+        version, path = save_cluster_model(updated, args.model_dir)
+        print(f"Updated centres from v{model['version']} and saved v{version} to {path}")
@@ -0,0 +1,119 @@
+"""
+Chọn số cụm k: quét k song song trên ma trận đặc trưng đã chuẩn hóa (có cache).
+
+The feature matrix is standardized once and cached on disk (keyed by a hash of
+the raw values), so the elbow sweep and the PCA clustering script reuse it.
+Each k is fitted in its own thread: KMeans runs its Lloyd iterations without
+the GIL, so threads scale across cores without re-importing the calling
+script the way a process pool would. OpenMP inside each fit is limited to one
+thread during the sweep to avoid oversubscription. For large player pools
+MiniBatchKMeans is used instead of KMeans.
+
+For every k the sweep reports inertia, silhouette (on a sample), Davies-Bouldin
+and fit time; suggest_k picks the elbow (the point farthest from the straight
+line between the first and last inertia values).
+"""
+import hashlib
+import os
+import time
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import davies_bouldin_score, silhouette_score
+from sklearn.preprocessing import StandardScaler
+from threadpoolctl import threadpool_limits
+
+mini_batch_threshold = 20_000
+
+
+def _scale_in_place(X):
+    scaler = StandardScaler(copy=False)
+    X_scaled = scaler.fit_transform(X)
+    # Scaler được lưu trong mô hình phân cụm: các lần transform sau không được sửa dữ liệu đầu vào
+    scaler.set_params(copy=True)
+    return X_scaled, scaler
+
+
+def standardized_features(data, features, cache_dir=None):
+    """Return (X_scaled, scaler) for data[features] with NaN filled by 0, cached by content hash."""
+    # X được chuẩn hóa tại chỗ: chỉ có một ma trận float64 thay vì hai
+    X = data[features].astype("float64").fillna(0).to_numpy()
+    if cache_dir is None:
+        return _scale_in_place(X)
+    # Băm thẳng bộ nhớ của X (theo cột), không tạo bản sao bằng tobytes()
+    digest = hashlib.sha256(np.asfortranarray(X).T)
+    digest.update("|".join(features).encode("utf-8"))
+    cache_path = os.path.join(cache_dir, f"features_{digest.hexdigest()[:16]}.npz")
+    if os.path.exists(cache_path):
+        with np.load(cache_path) as cached:
+            cached = dict(cached)
+        scaler = StandardScaler()
+        scaler.mean_, scaler.var_, scaler.scale_ = cached["mean"], cached["var"], cached["scale"]
+        scaler.n_features_in_ = X.shape[1]
+        scaler.n_samples_seen_ = X.shape[0]
+        return cached["X_scaled"], scaler
+    X_scaled, scaler = _scale_in_place(X)
+    os.makedirs(cache_dir, exist_ok=True)
+    # elbow và cluster chạy song song trên cùng thư mục cache: ghi ra file tạm riêng rồi đổi tên
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        np.savez(f, X_scaled=X_scaled, mean=scaler.mean_, var=scaler.var_, scale=scaler.scale_)
+    os.replace(temp_path, cache_path)
+    return X_scaled, scaler
+
+
+def make_kmeans(k, n_samples, mini_batch=None, random_state=42):
+    if mini_batch is None:
+        mini_batch = n_samples > mini_batch_threshold
+    if mini_batch:
+        return MiniBatchKMeans(n_clusters=k, random_state=random_state, n_init=3, batch_size=4096)
+    return KMeans(n_clusters=k, random_state=random_state, n_init=10)
+
+
+def evaluate_k(X, k, mini_batch=None, silhouette_sample=5000, random_state=42):
+    start = time.perf_counter()
+    model = make_kmeans(k, X.shape[0], mini_batch, random_state)
+    labels = model.fit_predict(X)
+    fit_seconds = time.perf_counter() - start
+    silhouette = davies_bouldin = np.nan
+    if 1 < k < X.shape[0]:
+        sample_size = min(silhouette_sample, X.shape[0])
+        silhouette = silhouette_score(X, labels, sample_size=sample_size, random_state=random_state)
+        davies_bouldin = davies_bouldin_score(X, labels)
+    return {
+        "k": k,
+        "inertia": model.inertia_,
+        "silhouette": silhouette,
+        "davies_bouldin": davies_bouldin,
+        "fit_seconds": fit_seconds,
+        "total_seconds": time.perf_counter() - start,
+    }
+
+
+def sweep_k(X, k_range, n_jobs=-1, mini_batch=None, silhouette_sample=5000, random_state=42):
+    """Evaluate every k in k_range in parallel; returns a list of per-k result dicts in k order."""
+    with threadpool_limits(limits=1):
+        results = Parallel(n_jobs=n_jobs, prefer="threads")(
+            delayed(evaluate_k)(X, k, mini_batch, silhouette_sample, random_state) for k in k_range)
+    return sorted(results, key=lambda result: result["k"])
+
+
+def suggest_k(results):
+    """Elbow of the inertia curve: the k farthest from the line joining its first and last points."""
+    ks = np.array([result["k"] for result in results], dtype="float64")
+    inertia = np.array([result["inertia"] for result in results], dtype="float64")
+    if len(ks) < 3:
+        return int(ks[-1])
+    # Chuẩn hóa hai trục về [0, 1] rồi tính khoảng cách tới đường thẳng nối hai đầu
+    x = (ks - ks[0]) / (ks[-1] - ks[0])
+    y = (inertia - inertia.min()) / (inertia.max() - inertia.min() or 1)
+    distances = np.abs((y[-1] - y[0]) * x - (x[-1] - x[0]) * y + x[-1] * y[0] - y[-1] * x[0])
+    return int(ks[np.argmax(distances)])
+
+
+def print_sweep(results):
+    print(f"{'k':>3} {'inertia':>12} {'silhouette':>11} {'davies-bouldin':>15} {'seconds':>8}")
+    for result in results:
+        print(f"{result['k']:>3} {result['inertia']:>12.1f} {result['silhouette']:>11.3f} "
+              f"{result['davies_bouldin']:>15.3f} {result['total_seconds']:>8.2f}")
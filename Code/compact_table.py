@@ -0,0 +1,233 @@
+"""
+Bảng cầu thủ dạng gọn trong bộ nhớ: cột phân loại, số nguyên thu nhỏ, float32 và khối số liền mạch.
+
+CompactPlayerTable holds the merged player table as
+  - Team / Nation / Position as pandas categoricals (Player and the FBref key
+    are unique per row and stay strings);
+  - the stat matrix as contiguous column-major 2D blocks, one per storage type:
+      counts  stats with only whole values and no missing value, in the
+              smallest signed integer type that holds all of them
+      rates   other stats as float32
+      wide    float64, only for columns float32 cannot hold exactly
+A column goes to float32 only if it survives the round trip: its values have
+at most max_decimals decimals (FBref prints one or two), and rounding the
+float32 copy back to that many decimals gives exactly the float64 value again.
+table[columns], frame() and chunks() rebuild the exact values and the original
+dtypes, a few columns at a time, so rankings and team summaries computed from
+the compact table are identical to those from the full one.
+load_compact_players builds the table straight from the player store /
+result.arrow a chunk of columns at a time, so the full-width table is never
+loaded at all; the memory report shows the process peak RSS next to the sizes.
+"""
+import numpy as np
+import pandas as pd
+
+from fbref_config import key_column
+from instrumentation import peak_rss_mb
+
+category_columns = ["Team", "Nation", "Position"]
+integer_types = [np.int8, np.int16, np.int32, np.int64]
+
+
+def _decimals(values, max_decimals):
+    # Số chữ số thập phân nhỏ nhất giữ nguyên mọi giá trị, hoặc None
+    for decimals in range(max_decimals + 1):
+        if np.array_equal(np.round(values, decimals), values, equal_nan=True):
+            return decimals
+    return None
+
+
+def _storage(values, max_decimals):
+    """("counts", None), ("rates", decimals) or ("wide", None) for one float64 column."""
+    finite = values[~np.isnan(values)]
+    if len(finite) == len(values) and np.array_equal(np.trunc(values), values) \
+            and (len(values) == 0 or np.abs(values).max() < 2 ** 62):
+        return "counts", None
+    decimals = _decimals(values, max_decimals)
+    if decimals is not None:
+        restored = np.round(values.astype(np.float32).astype(np.float64), decimals)
+        if np.array_equal(restored, values, equal_nan=True):
+            return "rates", decimals
+    return "wide", None
+
+
+def _integer_type(low, high):
+    for integer_type in integer_types:
+        info = np.iinfo(integer_type)
+        if info.min <= low and high <= info.max:
+            return integer_type
+    return np.int64
+
+
+def frame_nbytes(data_frame):
+    return int(data_frame.memory_usage(deep=True, index=False).sum())
+
+
+class CompactPlayerTable:
+    def __init__(self, labels, blocks, locations, dtypes, decimals, columns, source_nbytes=None):
+        self.labels = labels
+        self.blocks = blocks
+        self.locations = locations
+        self.dtypes = dtypes
+        self.decimals = decimals
+        self.columns = columns
+        self.source_nbytes = source_nbytes
+
+    @classmethod
+    def from_frame(cls, data_frame, stat_columns=None, max_decimals=4, chunk_size=16):
+        """Compact data_frame; stat_columns (default: every numeric column) go to the stat blocks."""
+        if stat_columns is None:
+            stat_columns = [col for col in data_frame.columns if pd.api.types.is_numeric_dtype(data_frame[col])]
+        return cls.from_reader(lambda columns: data_frame[columns], list(data_frame.columns), stat_columns,
+                               max_decimals=max_decimals, chunk_size=chunk_size)
+
+    @classmethod
+    def from_reader(cls, read_columns, columns, stat_columns, fill_value=None, max_decimals=4, chunk_size=16):
+        """Build the table from read_columns(list of columns) -> DataFrame, chunk_size stat columns at a time.
+
+        Only one chunk is ever held at full width, so the whole table is never in memory. fill_value
+        replaces missing stats (after converting them to numbers), like load_calc_data does with 0.
+        """
+        stat_set = set(stat_columns)
+        stat_columns = [col for col in columns if col in stat_set]
+        label_columns = [col for col in columns if col not in stat_set]
+        dtypes, decimals, narrow = {}, {}, {}
+        source_nbytes = 0
+        labels = None
+        if label_columns:
+            labels = read_columns(label_columns).reset_index(drop=True)
+            source_nbytes += frame_nbytes(labels)
+            dtypes.update(labels.dtypes.to_dict())
+            for col in category_columns:
+                if col in labels.columns:
+                    labels[col] = labels[col].astype("category")
+        n_rows = None if labels is None else len(labels)
+        for start in range(0, len(stat_columns), chunk_size):
+            chunk = read_columns(stat_columns[start:start + chunk_size])
+            for col in chunk.columns:
+                if fill_value is not None:
+                    chunk[col] = pd.to_numeric(chunk[col], errors="coerce").fillna(fill_value)
+            source_nbytes += frame_nbytes(chunk)
+            n_rows = len(chunk)
+            for col in chunk.columns:
+                dtypes[col] = chunk[col].dtype
+                values = chunk[col].to_numpy(dtype="float64", na_value=np.nan)
+                kind, column_decimals = _storage(values, max_decimals)
+                if kind == "counts":
+                    values = values.astype(_integer_type(values.min(initial=0), values.max(initial=0)))
+                elif kind == "rates":
+                    values = values.astype(np.float32)
+                    decimals[col] = column_decimals
+                narrow[col] = (kind, values)
+            del chunk
+        if labels is None:
+            labels = pd.DataFrame(index=pd.RangeIndex(n_rows or 0))
+
+        blocks, locations = {}, {}
+        for kind in ("counts", "rates", "wide"):
+            kind_columns = [col for col in stat_columns if col in narrow and narrow[col][0] == kind]
+            if not kind_columns:
+                continue
+            # Các cột nguyên dùng chung kiểu nhỏ nhất chứa được mọi cột
+            block_type = np.result_type(*[narrow[col][1].dtype for col in kind_columns])
+            # Cột nối tiếp cột (order="F"): mỗi chỉ số là một đoạn bộ nhớ liền nhau
+            block = np.empty((len(labels), len(kind_columns)), dtype=block_type, order="F")
+            for position, col in enumerate(kind_columns):
+                block[:, position] = narrow.pop(col)[1]
+                locations[col] = (kind, position)
+            blocks[kind] = block
+        return cls(labels, blocks, locations, dtypes, decimals, [col for col in columns if col in dtypes],
+                   source_nbytes)
+
+    def __len__(self):
+        return len(self.labels)
+
+    @property
+    def stat_columns(self):
+        return [col for col in self.columns if col in self.locations]
+
+    @property
+    def nbytes(self):
+        return frame_nbytes(self.labels) + sum(block.nbytes for block in self.blocks.values())
+
+    def values(self, col):
+        """Exact float64 values of one stat column."""
+        kind, position = self.locations[col]
+        values = self.blocks[kind][:, position].astype(np.float64)
+        if kind == "rates":
+            values = np.round(values, self.decimals[col])
+        return values
+
+    def column(self, col):
+        """Exact values of one column as a Series with its original dtype."""
+        if col not in self.locations:
+            series = self.labels[col]
+            return series.astype(self.dtypes[col]) if col in category_columns else series
+        kind, position = self.locations[col]
+        if kind == "counts":
+            return pd.Series(self.blocks[kind][:, position], name=col).astype(self.dtypes[col])
+        return pd.Series(self.values(col), name=col).astype(self.dtypes[col])
+
+    def frame(self, columns=None):
+        """Columns (default: all) rebuilt as a regular DataFrame, exactly as before compacting."""
+        columns = self.columns if columns is None else list(columns)
+        return pd.DataFrame({col: self.column(col) for col in columns}, columns=columns)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.column(key)
+        return self.frame(key)
+
+    def chunks(self, stat_columns, label_columns=(), chunk_size=16):
+        """(DataFrame of label_columns + up to chunk_size stats, those stats) for every chunk of stat_columns."""
+        for start in range(0, len(stat_columns), chunk_size):
+            chunk_columns = list(stat_columns[start:start + chunk_size])
+            yield self.frame(list(label_columns) + chunk_columns), chunk_columns
+
+    def memory_report(self):
+        """Bytes per part of the compact table, the same columns as a DataFrame, and the process peak RSS (MiB)."""
+        report = {"labels": frame_nbytes(self.labels)}
+        for kind, block in self.blocks.items():
+            report[f"{kind} ({block.dtype}, {block.shape[1]} columns)"] = block.nbytes
+        report["total"] = self.nbytes
+        if self.source_nbytes is not None:
+            report["before"] = self.source_nbytes
+        report["peak_rss_mb"] = peak_rss_mb()
+        return report
+
+
+def stat_chunks(data, stat_columns, label_columns=(), chunk_size=16):
+    """Like CompactPlayerTable.chunks, for either a compact table or a regular DataFrame (one chunk)."""
+    if isinstance(data, CompactPlayerTable):
+        yield from data.chunks(stat_columns, label_columns, chunk_size)
+    else:
+        yield data, list(stat_columns)
+
+
+def load_compact_players(result_csv_path, columns=None, stat_columns=None, fill_value=None, verbose=True):
+    """Compact table of the current players (store or result.arrow), read a chunk of columns at a time."""
+    from player_store import current_player_columns, load_current_players
+
+    available = current_player_columns(result_csv_path)
+    columns = available if columns is None else [col for col in columns if col in available]
+    if stat_columns is None:
+        stat_columns = [col for col in columns if col not in category_columns + ["Player", key_column]]
+    table = CompactPlayerTable.from_reader(lambda chunk: load_current_players(result_csv_path, chunk), columns,
+                                           stat_columns, fill_value=fill_value)
+    if verbose:
+        print_memory_report(table.memory_report())
+    return table
+
+
+def print_memory_report(report):
+    before, total = report.get("before"), report["total"]
+    if before:
+        print(f"🧮 Compact player table: {before / 2 ** 20:.2f} MiB as a DataFrame -> {total / 2 ** 20:.2f} MiB "
+              f"({1 - total / before:.0%} smaller)")
+    else:
+        print(f"🧮 Compact player table: {total / 2 ** 20:.2f} MiB")
+    for part, nbytes in report.items():
+        if part not in ("before", "total", "peak_rss_mb"):
+            print(f"   {part:<32} {nbytes / 2 ** 20:>8.2f} MiB")
+    if report.get("peak_rss_mb") is not None:
+        print(f"   {'peak RSS of the process so far':<32} {report['peak_rss_mb']:>8.2f} MiB")
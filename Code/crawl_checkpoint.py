@@ -0,0 +1,101 @@
+"""
+Checkpoint ghi nối tiếp cho các lần crawl nhiều trang, để chạy lại từ trang đang dở.
+
+Rows of every finished page are appended to rows.csv and flushed to disk, then
+the page URL and the new end offset of rows.csv are appended to pages.tsv. On
+start the rows file is cut back to the last recorded offset, so a crash in the
+middle of a page leaves no partial rows and that page is simply crawled again.
+meta.json holds a fingerprint of the crawl inputs (e.g. the player list used
+for matching); when it changes the checkpoint is discarded. Once every page
+has been crawled and the output written, clear() removes the checkpoint, so
+it only ever resumes an interrupted run and the next run fetches fresh data.
+
+retry_with_backoff retries a call with exponentially growing, jittered delays.
+"""
+import csv
+import json
+import os
+import random
+import shutil
+import time
+
+import pandas as pd
+
+
+class CrawlCheckpoint:
+    def __init__(self, directory, columns, fingerprint="", restart=False):
+        self.directory = directory
+        self.columns = list(columns)
+        self.rows_path = os.path.join(directory, "rows.csv")
+        self.pages_path = os.path.join(directory, "pages.tsv")
+        meta_path = os.path.join(directory, "meta.json")
+        meta = {}
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+        if restart or meta.get("fingerprint") != fingerprint or meta.get("columns") != self.columns:
+            if os.path.isdir(directory) and meta:
+                print(f"Starting a new checkpoint in {directory}")
+            shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": fingerprint, "columns": self.columns}, f)
+
+        self.completed_pages = {}
+        end_offset = 0
+        if os.path.exists(self.pages_path):
+            with open(self.pages_path, encoding="utf-8") as f:
+                for line in f:
+                    parts = line.rstrip("\n").split("\t")
+                    if len(parts) == 2 and parts[1].isdigit():
+                        self.completed_pages[parts[0]] = int(parts[1])
+                        end_offset = int(parts[1])
+        if not os.path.exists(self.rows_path):
+            with open(self.rows_path, "w", encoding="utf-8", newline="") as f:
+                csv.writer(f).writerow(["Page"] + self.columns)
+        # Bỏ các dòng của trang đang ghi dở khi chương trình dừng giữa chừng
+        with open(self.rows_path, "r+b") as f:
+            header_end = len(f.readline())
+            f.truncate(max(end_offset, header_end))
+
+    def is_done(self, page):
+        return page in self.completed_pages
+
+    def add_page(self, page, rows):
+        """Append the rows of a finished page and mark it completed."""
+        with open(self.rows_path, "a", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerows([page] + list(row) for row in rows)
+            f.flush()
+            os.fsync(f.fileno())
+            end_offset = f.tell()
+        with open(self.pages_path, "a", encoding="utf-8") as f:
+            f.write(f"{page}\t{end_offset}\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.completed_pages[page] = end_offset
+
+    def clear(self):
+        """Remove the checkpoint (call once the crawl is complete and its output saved)."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.completed_pages = {}
+
+    def rows(self):
+        """All checkpointed rows in crawl order (with the Page column)."""
+        return pd.read_csv(self.rows_path, dtype=str, keep_default_na=False, encoding="utf-8")
+
+
+def retry_with_backoff(func, attempts=4, base_delay=2.0, max_delay=60.0, give_up_on=(), on_retry=None):
+    """Call func() until it succeeds; wait base_delay * 2**n (with jitter) between failed attempts."""
+    for attempt in range(1, attempts + 1):
+        try:
+            return func()
+        except give_up_on:
+            raise
+        except Exception as e:
+            if attempt == attempts:
+                raise
+            delay = min(max_delay, base_delay * 2 ** (attempt - 1)) * random.uniform(0.8, 1.2)
+            if on_retry is not None:
+                on_retry(attempt, e, delay)
+            time.sleep(delay)
@@ -1,15 +1,19 @@
 import pandas as pd
+import argparse
+import hashlib
 import os
-import time
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-from fuzzywuzzy import fuzz, process
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import NoSuchElementException
+from browser_pool import browser_pool_from_args, prefetch_pages
+from cleaning import shorten_names
+from crawl_checkpoint import CrawlCheckpoint, retry_with_backoff
+from fbref_config import competition_from_args, competitions
+from instrumentation import stage, trace_from_args
+from name_index import NameIndex
+from player_store import open_store
+from player_table import load_player_table
+from project_paths import root_dir_from_args
+from page_cache import PageNotCached, page_cache_from_args
+from table_extract import link_texts, table_row_cells
 
 """
 Mục đích: Crawl dữ liệu giá trị chuyển nhượng ước tính (ETV) từ FootballTransfers
@@ -17,39 +21,56 @@ Mục đích: Crawl dữ liệu giá trị chuyển nhượng ước tính (ETV)
 """
 
 # Thư mục gốc và đường dẫn
-base_dir = r"C:\Users\DD\OneDrive\Documents\newfolder(2)\btlpython"
+base_dir = root_dir_from_args()
+trace_from_args("estimate_players_fee", base_dir)
 csv_dir = os.path.join(base_dir, "csv")
 os.makedirs(csv_dir, exist_ok=True)
 result_path = os.path.join(csv_dir, "result.csv")
 output_path = os.path.join(csv_dir, "all_estimate_transfer_fee.csv")
+page_cache = page_cache_from_args(os.path.join(base_dir, "page_cache"), "Crawl FootballTransfers ETV pages")
+checkpoint_dir = os.path.join(csv_dir, "etv_checkpoint")
 
-# Hàm rút ngắn tên để so khớp
-def shorten_name(name):
-    special_cases = {
-        "Manuel Ugarte Ribeiro": "Manuel Ugarte",
-        "Igor Júlio": "Igor",
-        "Igor Thiago": "Thiago",
-        "Felipe Morato": "Morato",
-        "Nathan Wood-Gordon": "Nathan Wood",
-        "Bobby Reid": "Bobby Cordova-Reid",
-        "J. Philogene": "Jaden Philogene Bidace"
-    }
-    if name in special_cases:
-        return special_cases[name]
-    parts = name.strip().split()
-    return f"{parts[0]} {parts[-1]}" if len(parts) >= 3 else name
-
-# Đọc danh sách cầu thủ từ result.csv (nếu có)
+crawl_parser = argparse.ArgumentParser(add_help=False)
+crawl_parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and crawl every page again")
+crawl_parser.add_argument("--max-retries", type=int, default=4, help="Attempts per page (delay doubles each time)")
+crawl_args, _ = crawl_parser.parse_known_args()
+
+# Tên rút gọn đặc biệt khi so khớp (dùng với cleaning.shorten_names)
+special_cases = {
+    "Manuel Ugarte Ribeiro": "Manuel Ugarte",
+    "Igor Júlio": "Igor",
+    "Igor Thiago": "Thiago",
+    "Felipe Morato": "Morato",
+    "Nathan Wood-Gordon": "Nathan Wood",
+    "Bobby Reid": "Bobby Cordova-Reid",
+    "J. Philogene": "Jaden Philogene Bidace"
+}
+
+# Giải lấy từ --competition; trang ETV là giá trị hiện tại nên không theo mùa,
+# mùa chỉ dùng để chọn danh sách cầu thủ của giải đó trong cơ sở dữ liệu
+competition, season = competition_from_args()
+
+# Đọc danh sách cầu thủ của giải/mùa này từ cơ sở dữ liệu, không có thì từ result.csv (nếu có)
 player_positions = {}
 player_original_names = {}
 player_names = []
+player_name_index = None
+df_players = None
+store = open_store(base_dir)
+if store is not None:
+    with store:
+        df_players = store.snapshot(['Player', 'Position'], league=competition, season=season)
 
-if os.path.exists(result_path):
+if df_players is not None or os.path.exists(result_path):
     try:
-        df_players = pd.read_csv(result_path)
-        player_positions = dict(zip(df_players['Player'].str.strip().apply(shorten_name), df_players['Position']))
-        player_original_names = dict(zip(df_players['Player'].str.strip().apply(shorten_name), df_players['Player'].str.strip()))
+        if df_players is None:
+            df_players = load_player_table(result_path, ['Player', 'Position'])
+        stripped_names = df_players['Player'].str.strip()
+        short_names = shorten_names(stripped_names, special_cases)
+        player_positions = dict(zip(short_names, df_players['Position']))
+        player_original_names = dict(zip(short_names, stripped_names))
         player_names = list(player_positions.keys())
+        player_name_index = NameIndex(player_names)
         print(f"Loaded {len(player_names)} players from result.csv")
     except Exception as e:
         print(f"Error reading result.csv: {e}")
@@ -57,33 +78,29 @@ if os.path.exists(result_path):
 else:
     print("result.csv not found. Crawling all players without matching.")
 
-# Cấu hình trình duyệt
-options = Options()
-options.add_argument("--headless")  # Chạy ẩn, bỏ comment để debug: # options.add_argument("--headless")
-options.add_argument("--no-sandbox")
-options.add_argument("--disable-dev-shm-usage")
-options.add_argument("--disable-gpu")
-options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+# Nhóm trình duyệt dùng chung, Chrome chỉ được khởi động khi có trang không nằm trong cache
+browser_pool = browser_pool_from_args("Crawl FootballTransfers ETV pages")
+etv_page_params = {"wait_for": "similar-players-table"}
 
-# Khởi tạo ChromeDriver
-try:
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-except Exception as e:
-    print(f"Error initializing ChromeDriver: {e}")
-    exit(1)
+def render_etv_page(url):
+    # Đợi bảng xuất hiện
+    return browser_pool.render(url, wait_for_class="similar-players-table", timeout=15)
+
+def get_etv_page(url):
+    page_source = page_cache.get_or_fetch(url, render_etv_page, etv_page_params)
+    if page_source is None:
+        raise PageNotCached(f"{url} is not in the page cache (offline mode)")
+    return page_source
 
 # Xác định số trang tối đa bằng cách kiểm tra nút phân trang
-base_url = "https://www.footballtransfers.com/us/players/uk-premier-league/"
+base_url = f"https://www.footballtransfers.com/us/players/{competitions[competition]['transfers_slug']}/"
 max_pages = 1
 try:
-    driver.get(base_url + "1")
-    pagination = WebDriverWait(driver, 10).until(
-        EC.presence_of_element_located((By.CLASS_NAME, "pagination"))
-    )
-    page_links = pagination.find_elements(By.TAG_NAME, "a")
-    for link in page_links:
+    with stage("pagination"):
+        page_links = link_texts(get_etv_page(base_url + "1"), "pagination")
+    for link_text in page_links:
         try:
-            page_num = int(link.text)
+            page_num = int(link_text)
             max_pages = max(max_pages, page_num)
         except ValueError:
             continue
@@ -94,72 +111,97 @@ except Exception as e:
 
 urls = [f"{base_url}{i}" for i in range(1, max_pages + 1)]
 
-# Danh sách dữ liệu
-data_gk = []
-data_df = []
-data_mf = []
-data_fw = []
-all_data_unmatched = []  # Lưu cầu thủ không khớp (nếu không có result.csv)
+# Lấy và so khớp các cầu thủ của một trang: trả về các dòng [Player, Position, Price, Group]
+def crawl_page(url):
+    rows = table_row_cells(get_etv_page(url), "similar-players-table")
+    if rows is None:
+        raise NoSuchElementException("similar-players-table")
+
+    page_players = []
+    for cols in rows:
+        if cols and len(cols) >= 2:
+            # Lấy tên cầu thủ
+            player_name = cols[1].strip().split("\n")[0].strip()
+            # Lấy ETV
+            etv = cols[-1].strip() if len(cols) >= 3 else "N/A"
+            page_players.append((player_name, etv))
+
+    if not player_names:
+        # Lưu tất cả cầu thủ nếu không có result.csv
+        return [[player_name, "Unknown", etv, "Unmatched"] for player_name, etv in page_players]
+
+    page_rows = []
+    # So khớp tên cả trang trong một lần gọi
+    short_names = shorten_names([player_name for player_name, _ in page_players], special_cases).tolist()
+    best_matches = player_name_index.extract_many(short_names)
+    for (player_name, etv), best_match in zip(page_players, best_matches):
+        if best_match and best_match[1] >= 70:  # Giảm ngưỡng để giữ nhiều cầu thủ hơn
+            matched_name = best_match[0]
+            original_name = player_original_names.get(matched_name, matched_name)
+            position = player_positions.get(matched_name, "Unknown")
+            print(f"Match found: {player_name} -> {original_name} (score: {best_match[1]}, Position: {position})")
+
+            # Lưu theo vị trí
+            if "GK" in position:
+                page_rows.append([original_name, position, etv, "GK"])
+            elif position.startswith("DF"):
+                page_rows.append([original_name, position, etv, "DF"])
+            elif position.startswith("MF"):
+                page_rows.append([original_name, position, etv, "MF"])
+            elif position.startswith("FW"):
+                page_rows.append([original_name, position, etv, "FW"])
+        else:
+            print(f"No match for: {player_name} (best match: {best_match[0] if best_match else 'None'}, score: {best_match[1] if best_match else 'N/A'})")
+            page_rows.append([player_name, "Unknown", etv, "Unmatched"])
+    return page_rows
+
+# Checkpoint theo trang: chạy lại sẽ bỏ qua các trang đã xong (làm lại từ đầu nếu giải hoặc danh sách cầu thủ thay đổi)
+crawl_fingerprint = hashlib.sha256("\n".join([base_url] + player_names).encode("utf-8")).hexdigest()[:16]
+checkpoint = CrawlCheckpoint(checkpoint_dir, ["Player", "Position", "Price", "Group"], crawl_fingerprint,
+                             restart=crawl_args.restart)
+if checkpoint.completed_pages:
+    print(f"Resuming: {len(checkpoint.completed_pages)} page(s) already in {checkpoint_dir}")
+
+def report_retry(url):
+    return lambda attempt, error, delay: print(
+        f"Error processing {url}, attempt {attempt}/{crawl_args.max_retries}: {error}. Retrying in {delay:.1f}s")
 
 try:
+    # Render song song các trang chưa xong và chưa có trong cache
+    with stage("prefetch", pages=len(urls)) as span:
+        span.rows_out = prefetch_pages(page_cache, browser_pool, [url for url in urls if not checkpoint.is_done(url)],
+                                       etv_page_params, wait_for_class="similar-players-table", timeout=15)
     for url in urls:
+        if checkpoint.is_done(url):
+            print(f"Skipping (checkpointed): {url}")
+            continue
         print(f"Scraping: {url}")
-        for attempt in range(3):  # Thử lại tối đa 3 lần nếu lỗi
-            try:
-                driver.get(url)
-                # Đợi bảng xuất hiện
-                table = WebDriverWait(driver, 15).until(
-                    EC.presence_of_element_located((By.CLASS_NAME, "similar-players-table"))
-                )
-                rows = table.find_elements(By.TAG_NAME, "tr")
-                
-                for row in rows:
-                    cols = row.find_elements(By.TAG_NAME, "td")
-                    if cols and len(cols) >= 2:
-                        # Lấy tên cầu thủ
-                        player_name = cols[1].text.strip().split("\n")[0].strip()
-                        shortened_player_name = shorten_name(player_name)
-                        # Lấy ETV
-                        etv = cols[-1].text.strip() if len(cols) >= 3 else "N/A"
-                        
-                        # So khớp tên
-                        if player_names:
-                            best_match = process.extractOne(
-                                shortened_player_name, player_names, scorer=fuzz.token_sort_ratio
-                            )
-                            if best_match and best_match[1] >= 70:  # Giảm ngưỡng để giữ nhiều cầu thủ hơn
-                                matched_name = best_match[0]
-                                original_name = player_original_names.get(matched_name, matched_name)
-                                position = player_positions.get(matched_name, "Unknown")
-                                print(f"Match found: {player_name} -> {original_name} (score: {best_match[1]}, Position: {position})")
-                                
-                                # Lưu theo vị trí
-                                if "GK" in position:
-                                    data_gk.append([original_name, position, etv])
-                                elif position.startswith("DF"):
-                                    data_df.append([original_name, position, etv])
-                                elif position.startswith("MF"):
-                                    data_mf.append([original_name, position, etv])
-                                elif position.startswith("FW"):
-                                    data_fw.append([original_name, position, etv])
-                            else:
-                                print(f"No match for: {player_name} (best match: {best_match[0] if best_match else 'None'}, score: {best_match[1] if best_match else 'N/A'})")
-                                all_data_unmatched.append([player_name, "Unknown", etv])
-                        else:
-                            # Lưu tất cả cầu thủ nếu không có result.csv
-                            all_data_unmatched.append([player_name, "Unknown", etv])
-                break  # Thoát vòng lặp thử lại nếu thành công
-            except TimeoutException:
-                print(f"Timeout on {url}, attempt {attempt + 1}/3")
-                time.sleep(2)
-            except Exception as e:
-                print(f"Error processing {url}, attempt {attempt + 1}/3: {e}")
-                time.sleep(2)
-        else:
-            print(f"Failed to process {url} after 3 attempts")
+        try:
+            with stage("crawl page", url=url) as span:
+                page_rows = retry_with_backoff(lambda: crawl_page(url), attempts=crawl_args.max_retries,
+                                               give_up_on=(PageNotCached,), on_retry=report_retry(url))
+                span.rows_out = len(page_rows)
+        except PageNotCached as e:
+            print(e)
+            continue
+        except Exception as e:
+            print(f"Failed to process {url} after {crawl_args.max_retries} attempts: {e}")
+            continue
+        checkpoint.add_page(url, page_rows)
 finally:
-    driver.quit()
-    print("WebDriver closed.")
+    browser_pool.close()
+    browser_pool.report()
+    page_cache.report()
+
+# Danh sách dữ liệu, đọc lại từ checkpoint theo đúng thứ tự crawl
+crawled_rows = checkpoint.rows()
+def group_rows(group):
+    return crawled_rows.loc[crawled_rows["Group"] == group, ["Player", "Position", "Price"]].values.tolist()
+data_gk = group_rows("GK")
+data_df = group_rows("DF")
+data_mf = group_rows("MF")
+data_fw = group_rows("FW")
+all_data_unmatched = group_rows("Unmatched")  # Lưu cầu thủ không khớp (nếu không có result.csv)
 
 # Gộp dữ liệu
 all_data = data_gk + data_df + data_mf + data_fw
@@ -168,12 +210,23 @@ if not player_names:
 
 # Lưu vào CSV
 if all_data:
-    df_all = pd.DataFrame(all_data, columns=['Player', 'Position', 'Price'])
-    df_all = df_all.drop_duplicates(subset=['Player'])  # Loại bỏ trùng lặp
-    df_all.to_csv(output_path, index=False, encoding='utf-8-sig')
+    with stage("save", rows_in=len(all_data)) as span:
+        df_all = pd.DataFrame(all_data, columns=['Player', 'Position', 'Price'])
+        df_all = df_all.drop_duplicates(subset=['Player'])  # Loại bỏ trùng lặp
+        df_all.to_csv(output_path, index=False, encoding='utf-8-sig')
+        store = open_store(base_dir)
+        if store is not None:
+            with store:
+                store.replace_valuations(df_all, competition)
+        span.rows_out = len(df_all)
     print(f"File 'all_estimate_transfer_fee.csv' saved to: {output_path}")
     print(f"Total players scraped: {len(df_all)} (GK: {len(data_gk)}, DF: {len(data_df)}, MF: {len(data_mf)}, FW: {len(data_fw)})")
     if all_data_unmatched and player_names:
         print(f"Unmatched players: {len(all_data_unmatched)}")
 else:
-    print("No players found. Check URL, table structure, or internet connection.")
\ No newline at end of file
+    print("No players found. Check URL, table structure, or internet connection.")
+
+# Crawl đã xong hết các trang: xóa checkpoint để lần chạy sau lấy giá mới
+if all(checkpoint.is_done(url) for url in urls):
+    checkpoint.clear()
+    print(f"All {len(urls)} page(s) crawled, removed checkpoint {checkpoint_dir}")
\ No newline at end of file
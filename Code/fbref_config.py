@@ -0,0 +1,68 @@
+import argparse
+import re
+
+# Các giải đấu hỗ trợ: mã và tên trên FBref, slug trên FootballTransfers
+competitions = {
+    "premier-league": {"fbref_id": 9, "fbref_name": "Premier-League", "transfers_slug": "uk-premier-league",
+                       "label": "Premier League"},
+    "la-liga": {"fbref_id": 12, "fbref_name": "La-Liga", "transfers_slug": "es-laliga", "label": "La Liga"},
+    "serie-a": {"fbref_id": 11, "fbref_name": "Serie-A", "transfers_slug": "it-serie-a", "label": "Serie A"},
+    "bundesliga": {"fbref_id": 20, "fbref_name": "Bundesliga", "transfers_slug": "de-bundesliga",
+                   "label": "Bundesliga"},
+    "ligue-1": {"fbref_id": 13, "fbref_name": "Ligue-1", "transfers_slug": "fr-ligue-1", "label": "Ligue 1"},
+}
+default_competition = "premier-league"
+default_season = "2024-2025"
+season_pattern = re.compile(r"^(\d{4})-(\d{4})$")
+
+
+def season_name(value):
+    """argparse type for seasons written like 2024-2025."""
+    match = season_pattern.match(value)
+    if not match or int(match.group(2)) != int(match.group(1)) + 1:
+        raise argparse.ArgumentTypeError(f"season must look like 2024-2025, got {value!r}")
+    return value
+
+
+def competition_from_args():
+    """(competition, season) from --competition / --season (other command-line flags are ignored)."""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--competition", choices=list(competitions), default=default_competition)
+    parser.add_argument("--season", type=season_name, default=default_season)
+    args, _ = parser.parse_known_args()
+    return args.competition, args.season
+
+
+# Danh sách trang thống kê FBref và id bảng tương ứng
+stat_pages = ["stats", "keepers", "shooting", "passing", "gca", "defense", "possession", "misc"]
+
+
+def stat_urls_for(competition=default_competition, season=default_season):
+    comp = competitions[competition]
+    return [f"https://fbref.com/en/comps/{comp['fbref_id']}/{season}/{page}/{season}-{comp['fbref_name']}-Stats"
+            for page in stat_pages]
+
+
+stat_urls = stat_urls_for()
+table_identifiers = [
+    "stats_standard",
+    "stats_keeper",
+    "stats_shooting",
+    "stats_passing",
+    "stats_gca",
+    "stats_defense",
+    "stats_possession",
+    "stats_misc",
+]
+
+# Nhóm cột của result.csv theo kiểu dữ liệu
+key_column = "Player_ID"
+integer_columns = ["Matches Played", "Starts", "Minutes", "Gls", "Ast", "crdY", "crdR", "PrgC", "PrgP", "PrgR",
+                   "Cmp", "TotDist", "Tkl", "TklW", "Deff Att", "Lost", "Blocks", "Sh", "Pass", "Int",
+                   "Touches", "Def Pen", "Def 3rd", "Mid 3rd", "Att 3rd", "Att Pen", "Take-Ons Att",
+                   "Carries", "Carries 1_3", "CPA", "Mis", "Dis", "Rec", "Rec PrgR",
+                   "Fls", "Fld", "Off", "Crs", "Recov", "Aerl Won", "Aerl Lost"]
+decimal_columns = ["Age", "xG", "xAG", "Gls per 90", "Ast per 90", "xG per 90", "xAG per 90", "GA90", "Save%", "CS%", "PK Save%",
+                   "SoT%", "SoT per 90", "G per Sh", "Dist", "Cmp%", "ShortCmp%", "MedCmp%", "LongCmp%", "KP", "Pass into 1_3", "PPA",
+                   "CrsPA", "SCA", "SCA90", "GCA", "GCA90", "Succ%", "Tkld%", "ProDist", "Aerl Won%"]
+text_columns = ["Player", "Nation", "Team", "Position", key_column]
@@ -0,0 +1,156 @@
+"""
+Tải song song các trang thống kê FBref.
+
+All pages are requested at once over a single pooled, keep-alive HTTP session.
+A page only goes to headless Chrome when the plain HTTP response does not
+contain the table we are looking for (e.g. blocked or JavaScript-only pages).
+"""
+import argparse
+import asyncio
+import os
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from browser_pool import BrowserPool
+from instrumentation import count, stage
+from page_cache import PageCache
+
+request_headers = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+
+def rebase_url(url, base_url):
+    # Trỏ URL sang server khác (ví dụ server local chứa HTML đã lưu), giữ nguyên path
+    if not base_url:
+        return url
+    parts = urlsplit(url)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    return base_url.rstrip("/") + path
+
+
+def needs_browser(html, table_id):
+    return html is None or f'id="{table_id}"' not in html
+
+
+async def _fetch_one(session, semaphore, url):
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            async with session.get(url) as response:
+                if response.status != 200:
+                    print(f"⚠️ HTTP {response.status} for {url}")
+                    return url, None, time.perf_counter() - start
+                body = await response.read()
+                html = await response.text()
+                count("pages_fetched")
+                count("bytes_downloaded", len(body))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"⚠️ Request failed for {url}: {e}")
+            return url, None, time.perf_counter() - start
+        return url, html, time.perf_counter() - start
+
+
+async def fetch_pages_async(urls, max_connections=8, timeout=30):
+    connector = aiohttp.TCPConnector(limit=max_connections, keepalive_timeout=30)
+    semaphore = asyncio.Semaphore(max_connections)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    async with aiohttp.ClientSession(connector=connector, headers=request_headers, timeout=client_timeout) as session:
+        tasks = [_fetch_one(session, semaphore, url) for url in urls]
+        return await asyncio.gather(*tasks)
+
+
+def render_with_browser(urls, wait_seconds=3, browser_pool=None):
+    """{url: (html or None, seconds)}, rendered concurrently on browser_pool (or a temporary pool)."""
+    if browser_pool is not None:
+        return browser_pool.render_many(urls, wait_seconds=wait_seconds)
+    with BrowserPool(size=min(len(urls), 4)) as temporary_pool:
+        return temporary_pool.render_many(urls, wait_seconds=wait_seconds)
+
+
+def fetch_pages(urls, table_ids, base_url=None, max_connections=8, timeout=30, browser_fallback=True, page_cache=None,
+                browser_pool=None):
+    """Return ({url: html}, {url: (seconds, source)}) for the given stat pages."""
+    total_start = time.perf_counter()
+    pages = {}
+    page_timings = {}
+    pending = []
+    for url, table_id in zip(urls, table_ids):
+        start = time.perf_counter()
+        cached = page_cache.get(url, {"table": table_id}) if page_cache else None
+        if cached is not None:
+            pages[url] = cached
+            page_timings[url] = (time.perf_counter() - start, "cache")
+        elif page_cache and page_cache.offline:
+            page_timings[url] = (0.0, "missing")
+        else:
+            pending.append((url, table_id))
+    request_urls = [rebase_url(url, base_url) for url, _ in pending]
+    results = []
+    if pending:
+        with stage("http fetch", pages=len(pending)) as span:
+            results = asyncio.run(fetch_pages_async(request_urls, max_connections, timeout))
+            span.rows_out = sum(html is not None for _, html, _ in results)
+    fallback = []
+    for (url, table_id), (_, html, elapsed) in zip(pending, results):
+        page_timings[url] = (elapsed, "http")
+        if needs_browser(html, table_id):
+            fallback.append((url, table_id))
+        else:
+            pages[url] = html
+    if fallback and browser_fallback:
+        print(f"🌐 {len(fallback)} page(s) need a browser, rendering with Chrome...")
+        with stage("browser fallback", pages=len(fallback)):
+            rendered = render_with_browser([rebase_url(url, base_url) for url, _ in fallback], browser_pool=browser_pool)
+        for url, table_id in fallback:
+            html, elapsed = rendered[rebase_url(url, base_url)]
+            if html is not None:
+                pages[url] = html
+                if needs_browser(html, table_id):
+                    print(f"⚠️ {table_id} still missing after rendering {url} (rate limit or consent page?)")
+            page_timings[url] = (page_timings[url][0] + elapsed, "browser")
+    if page_cache:
+        # Chỉ lưu trang có bảng cần tìm, không lưu trang chặn/consent để phát lại về sau
+        for url, table_id in pending:
+            if url in pages and not needs_browser(pages[url], table_id):
+                page_cache.put(url, pages[url], {"table": table_id})
+    for url, table_id in zip(urls, table_ids):
+        elapsed, source = page_timings[url]
+        print(f"⏱️ {table_id}: {elapsed:.2f}s ({source})")
+    print(f"⏱️ Fetched {len(pages)}/{len(urls)} pages in {time.perf_counter() - total_start:.2f}s")
+    return pages, page_timings
+
+
+def start_local_server(directory, port=0):
+    """Serve saved HTML pages from directory (mirroring FBref paths) on localhost."""
+    handler = partial(SimpleHTTPRequestHandler, directory=directory)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    from fbref_config import stat_urls, table_identifiers
+
+    parser = argparse.ArgumentParser(description="Fetch all FBref stat pages concurrently and report timings.")
+    parser.add_argument("--base-url", help="Serve pages from this host instead of fbref.com")
+    parser.add_argument("--saved-dir", help="Start a local server over saved HTML in this directory")
+    parser.add_argument("--no-browser", action="store_true", help="Never fall back to headless Chrome")
+    parser.add_argument("--cache-dir", help="Read and store pages in this page cache")
+    parser.add_argument("--offline", action="store_true", help="Replay pages from --cache-dir only")
+    args = parser.parse_args()
+    base_url = args.base_url
+    if args.saved_dir:
+        _, base_url = start_local_server(os.path.abspath(args.saved_dir))
+    page_cache = PageCache(args.cache_dir, offline=args.offline) if args.cache_dir else None
+    fetch_pages(stat_urls, table_identifiers, base_url=base_url, browser_fallback=not args.no_browser,
+                page_cache=page_cache)
+    if page_cache:
+        page_cache.report()
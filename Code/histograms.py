@@ -0,0 +1,187 @@
+"""
+Vẽ histogram toàn giải và theo đội song song, chỉ vẽ lại những ảnh có dữ liệu thay đổi.
+
+Plot jobs are spread over a process pool running the Agg backend. Each worker
+keeps one figure per figure size and clears/reuses it instead of creating and
+destroying a figure per PNG. A manifest next to the images stores a hash of
+every job's input values and styling; jobs whose hash is unchanged and whose
+image still exists are skipped. With --grid, one small-multiples image per stat
+(league + every team) is written instead of one file per team.
+
+Run as a script so worker processes never re-import the scraping code:
+    python histograms.py <result.csv> <histogram_folder> [--stats ...] [--workers N] [--grid]
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+
+default_plot_stats = ["Gls per 90", "xG per 90", "SCA90", "GA90", "TklW", "Blocks"]
+defensive_stats = ["GA90", "TklW", "Blocks"]
+manifest_name = ".histogram_manifest.json"
+renderer_version = 1
+
+_figures = {}
+
+
+def _figure(figsize):
+    # Mỗi worker giữ lại một figure cho mỗi kích thước và dùng lại
+    if figsize not in _figures:
+        fig, ax = plt.subplots(figsize=figsize)
+        _figures[figsize] = (fig, ax)
+    fig, ax = _figures[figsize]
+    ax.clear()
+    return fig, ax
+
+
+def build_jobs(calc_data, plot_stats, league_folder, team_folder):
+    jobs = []
+    teams = sorted(calc_data["Team"].dropna().unique())
+    team_rows = calc_data.groupby("Team").indices
+    for stat in plot_stats:
+        if stat not in calc_data.columns:
+            print(f"⚠️ Statistic {stat} not found in DataFrame. Skipping...")
+            continue
+        values = calc_data[stat].to_numpy(dtype="float64")
+        jobs.append({
+            "path": os.path.join(league_folder, f"{stat}_league.png"),
+            "values": values, "bins": 20, "color": "skyblue", "alpha": None, "figsize": (10, 6),
+            "title": f"League-Wide Distribution of {stat}", "xlabel": stat,
+        })
+        stat_file_name = stat.replace(" ", "_")
+        for team in teams:
+            jobs.append({
+                "path": os.path.join(team_folder, f"{team}_{stat_file_name}.png"),
+                "values": values[team_rows[team]], "bins": 10,
+                "color": "lightgreen" if stat in defensive_stats else "skyblue", "alpha": 0.7, "figsize": (8, 6),
+                "title": f"{team} - Distribution of {stat}", "xlabel": stat,
+            })
+    return jobs
+
+
+def job_hash(job):
+    digest = hashlib.sha256(np.ascontiguousarray(job["values"]).tobytes())
+    style = {key: value for key, value in job.items() if key not in ("values", "path")}
+    digest.update(json.dumps([style, renderer_version], sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def render_job(job):
+    fig, ax = _figure(job["figsize"])
+    ax.hist(job["values"], bins=job["bins"], color=job["color"], edgecolor="black", alpha=job["alpha"])
+    ax.set_title(job["title"])
+    ax.set_xlabel(job["xlabel"])
+    ax.set_ylabel("Number of Players")
+    ax.grid(True, alpha=0.3)
+    fig.savefig(job["path"], bbox_inches="tight")
+    return job["path"]
+
+
+def render_jobs(jobs, workers=None):
+    if not jobs:
+        return []
+    if workers == 1 or len(jobs) == 1:
+        return [render_job(job) for job in jobs]
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, math.ceil(len(jobs) / (workers * 4)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(render_job, jobs, chunksize=chunksize))
+
+
+def render_histograms(calc_data, plot_stats, histogram_folder, workers=None, force=False):
+    """Render league and team histograms, skipping images whose inputs are unchanged."""
+    league_folder = os.path.join(histogram_folder, "league")
+    team_folder = os.path.join(histogram_folder, "teams")
+    os.makedirs(league_folder, exist_ok=True)
+    os.makedirs(team_folder, exist_ok=True)
+    manifest_path = os.path.join(histogram_folder, manifest_name)
+    manifest = {}
+    if os.path.exists(manifest_path) and not force:
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+
+    jobs = build_jobs(calc_data, plot_stats, league_folder, team_folder)
+    hashes = {job["path"]: job_hash(job) for job in jobs}
+    pending = [job for job in jobs
+               if manifest.get(os.path.relpath(job["path"], histogram_folder)) != hashes[job["path"]]
+               or not os.path.exists(job["path"])]
+    start = time.perf_counter()
+    render_jobs(pending, workers)
+    for job in pending:
+        manifest[os.path.relpath(job["path"], histogram_folder)] = hashes[job["path"]]
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    print(f"📊 Rendered {len(pending)} histogram(s), skipped {len(jobs) - len(pending)} unchanged "
+          f"in {time.perf_counter() - start:.2f}s")
+    return len(pending), len(jobs) - len(pending)
+
+
+def render_grid(calc_data, stat, path, columns=5):
+    """One small-multiples image for a stat: the league panel followed by one panel per team."""
+    teams = sorted(calc_data["Team"].dropna().unique())
+    team_rows = calc_data.groupby("Team").indices
+    values = calc_data[stat].to_numpy(dtype="float64")
+    panels = [("League", values, 20, "skyblue", None)] + [
+        (team, values[team_rows[team]], 10, "lightgreen" if stat in defensive_stats else "skyblue", 0.7)
+        for team in teams]
+    rows = math.ceil(len(panels) / columns)
+    fig, axes = plt.subplots(rows, columns, figsize=(3.2 * columns, 2.6 * rows), sharex=True, squeeze=False)
+    for ax, (title, panel_values, bins, color, alpha) in zip(axes.flat, panels):
+        ax.hist(panel_values, bins=bins, color=color, edgecolor="black", alpha=alpha)
+        ax.set_title(title, fontsize=9)
+        ax.grid(True, alpha=0.3)
+    for ax in axes.flat[len(panels):]:
+        ax.set_visible(False)
+    fig.suptitle(f"Distribution of {stat}")
+    fig.supxlabel(stat)
+    fig.supylabel("Number of Players")
+    fig.savefig(path, bbox_inches="tight")
+    plt.close(fig)
+    return path
+
+
+def render_grids(calc_data, plot_stats, histogram_folder, workers=None):
+    grid_folder = os.path.join(histogram_folder, "grids")
+    os.makedirs(grid_folder, exist_ok=True)
+    stats = [stat for stat in plot_stats if stat in calc_data.columns]
+    paths = [os.path.join(grid_folder, f"{stat.replace(' ', '_')}_grid.png") for stat in stats]
+    workers = min(workers or os.cpu_count() or 1, max(1, len(stats)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(render_grid, [calc_data] * len(stats), stats, paths))
+    print(f"📊 Rendered {len(paths)} small-multiples grid(s) to {grid_folder}")
+    return paths
+
+
+def load_plot_data(result_csv_path, plot_stats):
+    from player_store import load_current_players
+
+    calc_data = load_current_players(result_csv_path, ["Team"] + list(plot_stats))
+    for stat in plot_stats:
+        if stat in calc_data.columns:
+            calc_data[stat] = calc_data[stat].astype("float64").fillna(0)
+    return calc_data
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render league and team histograms from result.csv")
+    parser.add_argument("result_csv")
+    parser.add_argument("histogram_folder")
+    parser.add_argument("--stats", nargs="+", default=default_plot_stats)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--force", action="store_true", help="Re-render every image")
+    parser.add_argument("--grid", action="store_true", help="Write one small-multiples image per stat instead")
+    args = parser.parse_args()
+    plot_data = load_plot_data(args.result_csv, args.stats)
+    if args.grid:
+        render_grids(plot_data, args.stats, args.histogram_folder, args.workers)
+    else:
+        render_histograms(plot_data, args.stats, args.histogram_folder, args.workers, args.force)
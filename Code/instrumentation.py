@@ -0,0 +1,328 @@
+"""
+Đo từng bước của các script (thời gian, CPU, bộ nhớ, số dòng, số trang, số byte, cache) và xuất log JSON + Chrome trace.
+
+A script starts one RunTrace with trace_from_args() and wraps its steps in
+    with stage("merge", rows_in=len(players)) as span:
+        ...
+        span.rows_out = len(result)
+Each stage records wall time, CPU time of the process (and of the child
+processes that finished meanwhile), the peak RSS of the process and of its
+children when it ends, rows in/out and counters. Library code
+reports counters with count() - fetch_pages counts pages fetched and bytes
+downloaded, PageCache counts hits and misses, BrowserPool counts rendered
+pages, their size and the seconds spent waiting - and every stage open then
+gets them, so the "scrape" stage shows what its fetches cost. Stages nest;
+stages opened in worker threads (parallel browser renders) get their own
+lane in the trace. Without an active trace stage() and count() do nothing.
+
+When the script exits two files are written to <root>/traces (or --trace-dir):
+    <script>-<time>.json        structured log: run totals + one record per stage
+    <script>-<time>.trace.json  Chrome trace format, open it in chrome://tracing
+                                or https://ui.perfetto.dev to see the timeline
+<time> is the start time to the millisecond followed by the process id, so
+scripts running at the same time (the pipeline's rank and summarize) never
+share a name; the files are opened in exclusive mode and never overwritten.
+--no-trace turns it off. Compare runs with
+    python instrumentation.py summary RUN.json [OTHER_RUN.json]
+"""
+import argparse
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    # Windows không có module resource: bỏ qua số liệu RSS
+    resource = None
+
+_active = None
+
+
+def peak_rss_mb(children=False):
+    """High-water mark of the resident set size in MiB (None where it cannot be read)."""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    # Linux báo KiB, macOS báo byte
+    return round(usage / 2 ** 20 if sys.platform == "darwin" else usage / 1024, 1)
+
+
+def _child_cpu_seconds():
+    # CPU của các tiến trình con đã kết thúc (vd. histograms.py, ProcessPoolExecutor)
+    times = os.times()
+    return times.children_user + times.children_system
+
+
+class Span:
+    def __init__(self, name, rows_in=None, fields=None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.fields = dict(fields or {})
+        self.counters = {}
+        self.thread_id = threading.get_ident()
+        self.thread_name = threading.current_thread().name
+        self.start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        self.child_cpu_start = _child_cpu_seconds()
+        self.wall_seconds = None
+        self.cpu_seconds = None
+        self.child_cpu_seconds = None
+        self.status = "ok"
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def set(self, **fields):
+        self.fields.update(fields)
+
+
+class NullSpan(Span):
+    # Dùng khi không có trace nào đang chạy: mọi thao tác đều không ghi gì
+    def __init__(self, name="", rows_in=None, fields=None):
+        pass
+
+    def count(self, name, value=1):
+        pass
+
+    def set(self, **fields):
+        pass
+
+    def __setattr__(self, name, value):
+        pass
+
+
+class RunTrace:
+    def __init__(self, script, trace_dir, enabled=True):
+        self.script = script
+        self.trace_dir = trace_dir
+        self.enabled = enabled
+        self.started = time.time()
+        self.origin = time.perf_counter()
+        self.cpu_origin = time.process_time()
+        self.spans = []
+        self.counters = {}
+        self._open = []
+        self._lock = threading.Lock()
+        self._finished = False
+
+    @contextmanager
+    def stage(self, name, rows_in=None, **fields):
+        if not self.enabled:
+            yield NullSpan()
+            return
+        span = Span(name, rows_in, fields)
+        with self._lock:
+            self._open.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = f"error: {type(e).__name__}"
+            raise
+        finally:
+            span.wall_seconds = time.perf_counter() - span.start
+            span.cpu_seconds = time.process_time() - span.cpu_start
+            span.child_cpu_seconds = _child_cpu_seconds() - span.child_cpu_start
+            span.fields.setdefault("peak_rss_mb", peak_rss_mb())
+            span.fields.setdefault("peak_child_rss_mb", peak_rss_mb(children=True))
+            with self._lock:
+                self._open.remove(span)
+                self.spans.append(span)
+
+    def count(self, name, value=1):
+        """Add value to a counter of the run and of every stage open right now."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+            for span in self._open:
+                span.count(name, value)
+
+    def stage_records(self):
+        records = []
+        for span in sorted(self.spans, key=lambda span: span.start):
+            record = {"stage": span.name, "status": span.status, "thread": span.thread_name,
+                      "start_seconds": round(span.start - self.origin, 6), "wall_seconds": round(span.wall_seconds, 6),
+                      "cpu_seconds": round(span.cpu_seconds, 6), "child_cpu_seconds": round(span.child_cpu_seconds, 6),
+                      "rows_in": span.rows_in, "rows_out": span.rows_out}
+            record.update(span.fields)
+            record.update(span.counters)
+            records.append(record)
+        return records
+
+    def log(self):
+        """Structured log of the run: totals plus one record per stage."""
+        return {
+            "script": self.script,
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "argv": sys.argv[1:],
+            "pid": os.getpid(),
+            "wall_seconds": round(time.perf_counter() - self.origin, 6),
+            "cpu_seconds": round(time.process_time() - self.cpu_origin, 6),
+            "peak_rss_mb": peak_rss_mb(),
+            "peak_child_rss_mb": peak_rss_mb(children=True),
+            "counters": dict(self.counters),
+            "stages": self.stage_records(),
+        }
+
+    def chrome_trace(self):
+        """Chrome trace format: one complete ("X") event per stage and an RSS counter track."""
+        pid = os.getpid()
+        events = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": self.script}}]
+        thread_names = {}
+        for span in self.spans:
+            thread_names.setdefault(span.thread_id, span.thread_name)
+            args = {"cpu_seconds": round(span.cpu_seconds, 6), "child_cpu_seconds": round(span.child_cpu_seconds, 6),
+                    "rows_in": span.rows_in, "rows_out": span.rows_out,
+                    "status": span.status}
+            args.update(span.fields)
+            args.update(span.counters)
+            end = span.start + span.wall_seconds
+            events.append({"name": span.name, "cat": "stage", "ph": "X", "pid": pid, "tid": span.thread_id,
+                           "ts": round((span.start - self.origin) * 1e6, 1), "dur": round(span.wall_seconds * 1e6, 1),
+                           "args": {key: value for key, value in args.items() if value is not None}})
+            if span.fields.get("peak_rss_mb") is not None:
+                events.append({"name": "peak RSS (MiB)", "ph": "C", "pid": pid, "tid": 0,
+                               "ts": round((end - self.origin) * 1e6, 1), "args": {"MiB": span.fields["peak_rss_mb"]}})
+        for thread_id, thread_name in thread_names.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": thread_id, "args": {"name": thread_name}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save(self):
+        """Write <script>-<time>.json and .trace.json; returns both paths."""
+        os.makedirs(self.trace_dir, exist_ok=True)
+        started = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started))
+        milliseconds = int(self.started % 1 * 1000)
+        base = os.path.join(self.trace_dir, f"{self.script}-{started}-{milliseconds:03d}-{os.getpid()}")
+        stem, attempt = base, 1
+        while True:
+            try:
+                # "x": không bao giờ ghi đè trace của một lần chạy khác
+                log_file = open(stem + ".json", "x", encoding="utf-8")
+                break
+            except FileExistsError:
+                attempt += 1
+                stem = f"{base}-{attempt}"
+        with log_file:
+            json.dump(self.log(), log_file, indent=1, ensure_ascii=False, default=str)
+        with open(stem + ".trace.json", "x", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f, ensure_ascii=False, default=str)
+        return stem + ".json", stem + ".trace.json"
+
+    def finish(self):
+        global _active
+        if self._finished or not self.enabled:
+            return
+        self._finished = True
+        if _active is self:
+            _active = None
+        try:
+            log_path, trace_path = self.save()
+        except OSError as e:
+            print(f"⚠️ Could not write the trace to {self.trace_dir}: {e}")
+            return
+        print_summary(self.log())
+        print(f"🧭 Trace saved to {log_path} and {trace_path}")
+
+
+def start_trace(script, trace_dir, enabled=True):
+    """Make a RunTrace the active one; it is saved when the process exits."""
+    global _active
+    trace = RunTrace(script, trace_dir, enabled)
+    _active = trace
+    atexit.register(trace.finish)
+    return trace
+
+
+def add_trace_arguments(parser):
+    parser.add_argument("--trace-dir", default=os.environ.get("BTL_TRACE_DIR"),
+                        help="Where the JSON log and Chrome trace are written (default: <root>/traces)")
+    parser.add_argument("--no-trace", action="store_true", help="Do not record or write a trace")
+
+
+def trace_from_args(script, root_dir):
+    """Start the trace of script from --trace-dir / --no-trace (other command-line flags are ignored)."""
+    parser = argparse.ArgumentParser(add_help=False)
+    add_trace_arguments(parser)
+    args, _ = parser.parse_known_args()
+    return start_trace(script, args.trace_dir or os.path.join(root_dir, "traces"), enabled=not args.no_trace)
+
+
+def stage(name, rows_in=None, **fields):
+    """Context manager timing one step in the active trace (does nothing without one)."""
+    if _active is None:
+        return _null_stage()
+    return _active.stage(name, rows_in, **fields)
+
+
+@contextmanager
+def _null_stage():
+    yield NullSpan()
+
+
+def count(name, value=1):
+    """Add to a counter (pages_fetched, bytes_downloaded, cache_hits, ...) of the active trace."""
+    if _active is not None:
+        _active.count(name, value)
+
+
+def print_summary(log):
+    stages = log["stages"]
+    if not stages:
+        return
+    print(f"\n🧭 {log['script']}: {log['wall_seconds']:.2f}s wall, {log['cpu_seconds']:.2f}s CPU, "
+          f"peak RSS {log['peak_rss_mb']} MiB")
+    counter_names = sorted({key for record in stages for key in record
+                            if key not in ("stage", "status", "thread", "start_seconds", "wall_seconds", "cpu_seconds",
+                                           "child_cpu_seconds", "rows_in", "rows_out", "peak_rss_mb", "peak_child_rss_mb")
+                            and isinstance(record[key], (int, float))})
+    for record in stages:
+        extra = ", ".join(f"{name}={record[name]:g}" for name in counter_names if record.get(name) is not None)
+        rows = ""
+        if record.get("rows_in") is not None or record.get("rows_out") is not None:
+            rows_in, rows_out = (record.get(key) for key in ("rows_in", "rows_out"))
+            rows = f" rows {'-' if rows_in is None else rows_in} -> {'-' if rows_out is None else rows_out}"
+        child = f" (+{record['child_cpu_seconds']:.3f}s children)" if record.get("child_cpu_seconds") else ""
+        print(f"  {record['stage']:<24} {record['wall_seconds']:>9.3f}s wall {record['cpu_seconds']:>9.3f}s cpu"
+              f"{child}{rows}{' ' + extra if extra else ''}{'' if record['status'] == 'ok' else ' ' + record['status']}")
+
+
+def stage_totals(log):
+    """{stage: (calls, wall seconds, cpu seconds)} summed over every record of that stage."""
+    totals = {}
+    for record in log["stages"]:
+        calls, wall, cpu = totals.get(record["stage"], (0, 0.0, 0.0))
+        totals[record["stage"]] = (calls + 1, wall + record["wall_seconds"], cpu + record["cpu_seconds"])
+    return totals
+
+
+def compare_logs(old_log, new_log):
+    old, new = stage_totals(old_log), stage_totals(new_log)
+    print(f"\n{'stage':<24} {'old s':>9} {'new s':>9} {'change':>8}")
+    for name in list(dict.fromkeys(list(old) + list(new))):
+        old_wall = old.get(name, (0, None, None))[1]
+        new_wall = new.get(name, (0, None, None))[1]
+        change = f"{new_wall / old_wall:>7.2f}x" if old_wall and new_wall is not None else "       -"
+        print(f"{name:<24} {old_wall if old_wall is not None else float('nan'):>9.3f} "
+              f"{new_wall if new_wall is not None else float('nan'):>9.3f} {change}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize or compare JSON run logs written by the scripts")
+    parser.add_argument("command", choices=["summary"])
+    parser.add_argument("logs", nargs="+", help="One run log, or two to compare (old then new)")
+    args = parser.parse_args()
+
+    loaded = []
+    for path in args.logs[:2]:
+        with open(path, encoding="utf-8") as f:
+            loaded.append(json.load(f))
+    for log in loaded:
+        print_summary(log)
+    if len(loaded) == 2:
+        compare_logs(*loaded)
@@ -0,0 +1,112 @@
+"""
+Chỉ mục tên cầu thủ để so khớp mờ (fuzzy) nhanh với danh sách từ result.csv.
+
+NameIndex replaces process.extractOne(query, names, scorer=fuzz.token_sort_ratio),
+which scores every name in pure Python for every scraped row. Names are folded
+once (accents removed, lower case, punctuation dropped, tokens sorted), which
+is what token_sort_ratio compares, except that "Júlio" becomes "julio" instead
+of losing the accented letter. For a batch of queries the index computes, in
+one NumPy call, an upper bound of every candidate's score from the shared
+letter counts (a match can never pair more characters than both names contain).
+The bound is summed letter by letter and the batch is cut so that a chunk of
+queries x names stays within max_cells, so memory does not grow with the
+number of names times the alphabet.
+Candidates are then scored exactly with fuzz.ratio in order of that bound and
+the scan stops as soon as no remaining bound can beat the best score, so the
+result is the same (best name, score) pair extractOne would return (ties go
+to the name that comes first) while only a handful of names are scored.
+"""
+import re
+import unicodedata
+
+import numpy as np
+from fuzzywuzzy import fuzz
+
+alphabet = "abcdefghijklmnopqrstuvwxyz0123456789 "
+special_letters = str.maketrans({"ø": "o", "ł": "l", "đ": "d", "ß": "ss", "æ": "ae", "œ": "oe", "ı": "i",
+                                 "þ": "th", "ð": "d"})
+non_alnum_pattern = re.compile(r"[^a-z0-9]+")
+
+_letter_codes = np.full(256, -1, dtype=np.int64)
+_letter_codes[np.frombuffer(alphabet.encode("ascii"), dtype=np.uint8)] = np.arange(len(alphabet))
+
+
+def fold_name(name):
+    """"Ødegaard, Martin" -> "martin odegaard" (accent-free, lower case, sorted tokens)."""
+    if not isinstance(name, str):
+        return ""
+    text = unicodedata.normalize("NFKD", name.lower().translate(special_letters))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(sorted(non_alnum_pattern.sub(" ", text).split()))
+
+
+def letter_counts(keys):
+    """Matrix of letter counts, one row per folded key."""
+    encoded = [key.encode("ascii") for key in keys]
+    lengths = np.array([len(key) for key in encoded], dtype=np.int64)
+    codes = _letter_codes[np.frombuffer(b"".join(encoded), dtype=np.uint8)]
+    rows = np.repeat(np.arange(len(encoded)), lengths)
+    flat = np.bincount(rows * len(alphabet) + codes, minlength=len(encoded) * len(alphabet))
+    return flat.reshape(len(encoded), len(alphabet)).astype(np.int16), lengths
+
+
+class NameIndex:
+    def __init__(self, choices, chunk_size=256, max_cells=4_000_000):
+        self.choices = list(choices)
+        self.chunk_size = chunk_size
+        self.max_cells = max_cells
+        first_position = {}
+        for position, choice in enumerate(self.choices):
+            key = fold_name(choice)
+            if key and key not in first_position:
+                first_position[key] = position
+        self.keys = list(first_position)
+        self.positions = np.array(list(first_position.values()), dtype=np.int64)
+        self.counts, self.lengths = letter_counts(self.keys)
+        # Cột nối tiếp cột để lấy nhanh số lần xuất hiện của một chữ cái ở mọi tên
+        self.counts = np.asfortranarray(self.counts)
+
+    def __len__(self):
+        return len(self.choices)
+
+    def _score_bounds(self, query_keys):
+        counts, lengths = letter_counts(query_keys)
+        # Cộng dồn theo từng chữ cái: mảng tạm chỉ có kích thước truy vấn x tên
+        shared = np.zeros((len(query_keys), len(self.keys)), dtype=np.int16)
+        for letter in np.flatnonzero(counts.any(axis=0)):
+            shared += np.minimum(counts[:, letter, None], self.counts[None, :, letter])
+        total = lengths[:, None] + self.lengths[None, :]
+        return np.round(200 * shared / np.maximum(total, 1))
+
+    def _best(self, query_key, bounds, score_cutoff):
+        candidates = np.flatnonzero(bounds >= score_cutoff)
+        candidates = candidates[np.lexsort((self.positions[candidates], -bounds[candidates]))]
+        best_score, best_position = -1, None
+        for candidate in candidates:
+            if bounds[candidate] < best_score:
+                break
+            score = fuzz.ratio(query_key, self.keys[candidate])
+            position = self.positions[candidate]
+            if score > best_score or (score == best_score and position < best_position):
+                best_score, best_position = score, position
+        if best_position is None or best_score < score_cutoff:
+            return None
+        return self.choices[best_position], best_score
+
+    def extract_many(self, queries, score_cutoff=0):
+        """(best choice, score) for every query, or None when nothing reaches score_cutoff."""
+        query_keys = [fold_name(query) for query in queries]
+        results = [None] * len(query_keys)
+        active = [i for i, key in enumerate(query_keys) if key]
+        if not self.keys:
+            return results
+        chunk_size = max(1, min(self.chunk_size, self.max_cells // len(self.keys)))
+        for start in range(0, len(active), chunk_size):
+            chunk = active[start:start + chunk_size]
+            bounds = self._score_bounds([query_keys[i] for i in chunk])
+            for row, i in enumerate(chunk):
+                results[i] = self._best(query_keys[i], bounds[row], score_cutoff)
+        return results
+
+    def extract_one(self, query, score_cutoff=0):
+        return self.extract_many([query], score_cutoff)[0]
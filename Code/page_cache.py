@@ -0,0 +1,148 @@
+"""
+Bộ nhớ đệm trang HTML trên đĩa, dùng chung cho các script crawl.
+
+Each page is stored gzip-compressed under the SHA-256 of its URL plus fetch
+parameters. An index file keeps creation/access times so entries expire after
+a TTL and the least recently used ones are evicted once the cache grows past
+its size cap. In offline mode nothing is fetched: pages are replayed from the
+cache regardless of age, and missing pages are reported as None. Access times
+of cache hits are only written back to the index at the next put or on
+flush() / report(), not on every hit.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import time
+
+from instrumentation import count
+
+
+class PageNotCached(Exception):
+    """A page that is not in the cache while fetching is off (offline mode)."""
+
+
+class PageCache:
+    def __init__(self, cache_dir, ttl=7 * 24 * 3600, max_bytes=500 * 1024 * 1024, offline=False, enabled=True):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.enabled = enabled or offline
+        self.hits = 0
+        self.misses = 0
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.index = {}
+        self.index_changed = False
+        if self.enabled:
+            os.makedirs(cache_dir, exist_ok=True)
+            if os.path.exists(self.index_path):
+                try:
+                    with open(self.index_path, encoding="utf-8") as f:
+                        self.index = json.load(f)
+                except (OSError, ValueError) as e:
+                    print(f"⚠️ Page cache index unreadable, starting empty: {e}")
+
+    @staticmethod
+    def make_key(url, params=None):
+        raw = json.dumps({"url": url, "params": params or {}}, sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.html.gz")
+
+    def _save_index(self):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, self.index_path)
+        self.index_changed = False
+
+    def flush(self):
+        """Write the index if cache hits changed access times since it was last saved."""
+        if self.enabled and self.index_changed:
+            self._save_index()
+
+    def contains(self, url, params=None):
+        """True when a fresh copy of url is cached (does not count as a hit or miss)."""
+        if not self.enabled:
+            return False
+        key = self.make_key(url, params)
+        entry = self.index.get(key)
+        if entry is None or not os.path.exists(self._path(key)):
+            return False
+        return self.offline or time.time() - entry["created"] <= self.ttl
+
+    def get(self, url, params=None):
+        if not self.enabled:
+            return None
+        key = self.make_key(url, params)
+        entry = self.index.get(key)
+        path = self._path(key)
+        if entry is None or not os.path.exists(path):
+            self.misses += 1
+            count("cache_misses")
+            return None
+        if not self.offline and time.time() - entry["created"] > self.ttl:
+            self.misses += 1
+            count("cache_misses")
+            return None
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            html = f.read()
+        entry["accessed"] = time.time()
+        self.index_changed = True
+        self.hits += 1
+        count("cache_hits")
+        return html
+
+    def put(self, url, html, params=None):
+        if not self.enabled or html is None:
+            return
+        key = self.make_key(url, params)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            f.write(html)
+        now = time.time()
+        self.index[key] = {"url": url, "params": params or {}, "created": now, "accessed": now,
+                           "size": os.path.getsize(path)}
+        self._evict()
+        self._save_index()
+
+    def get_or_fetch(self, url, fetch, params=None):
+        # fetch(url) -> html, chỉ được gọi khi cache miss và không ở chế độ offline
+        html = self.get(url, params)
+        if html is not None or self.offline:
+            return html
+        html = fetch(url)
+        self.put(url, html, params)
+        return html
+
+    def _evict(self):
+        total = sum(entry["size"] for entry in self.index.values())
+        if total <= self.max_bytes:
+            return
+        for key, entry in sorted(self.index.items(), key=lambda item: item[1]["accessed"]):
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+            del self.index[key]
+            total -= entry["size"]
+            if total <= self.max_bytes:
+                break
+
+    def report(self):
+        self.flush()
+        print(f"🗄️ Page cache: {self.hits} hit(s), {self.misses} miss(es){' [offline]' if self.offline else ''}")
+
+
+def page_cache_from_args(cache_dir, description=None):
+    """Build a PageCache from the --offline / --no-cache / --cache-ttl command-line flags."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--offline", action="store_true", help="Replay pages from the cache only, never fetch")
+    parser.add_argument("--no-cache", action="store_true", help="Always fetch and do not store pages")
+    parser.add_argument("--cache-ttl", type=float, default=7 * 24, help="Cache lifetime in hours (default: 168)")
+    args, _ = parser.parse_known_args()
+    return PageCache(cache_dir, ttl=args.cache_ttl * 3600, offline=args.offline, enabled=not args.no_cache)
@@ -0,0 +1,270 @@
+"""
+Chạy toàn bộ bài tập như một đồ thị các bước (DAG), bỏ qua các bước có đầu vào không đổi.
+
+Each stage runs one of the existing scripts with its files under a single
+output directory and declares the files/directories it reads and writes.
+Dependencies come from those declarations (a stage depends on whoever writes
+one of its inputs). Before running a stage the runner hashes its input files,
+its command line and the source of the script plus every local module it
+imports; if the hash matches the last successful run and all outputs still
+exist the stage is skipped. Stages whose dependencies are done run in
+parallel (up to --jobs), except that stages sharing a resource such as the
+page cache never run at the same time. Stages that only download (scrape,
+match, etv) have no input files, so they re-run only when their code changes
+or with --refresh. Each stage's output goes to <output>/logs/<stage>.log.
+--competition / --season pick the league and season: scrape and merge write
+that partition of <output>/dataset (plus result.csv), and the transfer stages
+crawl the same league.
+
+Usage:
+    python pipeline.py --output-dir OUT [stage ...] [--jobs N] [--force STAGE ...] [--force-all]
+                       [--refresh] [--offline] [--dry-run] [--competition C] [--season S]
+Naming stages runs them together with everything upstream of them.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from fbref_config import competitions, default_competition, default_season, season_name
+
+code_dir = os.path.dirname(os.path.abspath(__file__))
+state_name = ".pipeline_state.json"
+import_pattern = re.compile(r"^\s*(?:from\s+([\w.]+)\s+import|import\s+([\w., ]+))", re.M)
+
+
+def pipeline_stages(output_dir, competition=default_competition, season=default_season):
+    csv_dir = os.path.join(output_dir, "csv")
+    result_csv = os.path.join(csv_dir, "result.csv")
+    pages_dir = os.path.join(output_dir, "pages", competition, season)
+    partition = os.path.join(output_dir, "dataset", f"league={competition}", f"season={season}")
+    root = ["--output-dir", output_dir]
+    league = ["--competition", competition, "--season", season]
+    return {
+        "scrape": {"script": "bai1andbai2.py", "args": ["--steps", "scrape"] + root + league, "inputs": [],
+                   "outputs": [pages_dir], "download": True, "resources": ["page_cache"]},
+        "merge": {"script": "bai1andbai2.py", "args": ["--steps", "merge"] + root + league, "inputs": [pages_dir],
+                  "outputs": [result_csv, os.path.join(csv_dir, "result.arrow"), partition]},
+        "rank": {"script": "bai1andbai2.py", "args": ["--steps", "rank"] + root, "inputs": [result_csv],
+                 "outputs": [os.path.join(csv_dir, "top_3.txt")]},
+        "summarize": {"script": "bai1andbai2.py", "args": ["--steps", "summarize"] + root + league, "inputs": [result_csv],
+                      "outputs": [os.path.join(csv_dir, "results2.csv"), os.path.join(csv_dir, "highest_team_stats.csv")]},
+        "plot": {"script": "histograms.py", "args": [result_csv, os.path.join(output_dir, "histograms")],
+                 "inputs": [result_csv], "outputs": [os.path.join(output_dir, "histograms")]},
+        "elbow": {"script": "bai3.1.py", "args": ["--result-csv", result_csv] + root, "inputs": [result_csv],
+                  "outputs": [os.path.join(output_dir, "elbow_plot.png")]},
+        "cluster": {"script": "bai3.2.py", "args": ["--result-csv", result_csv] + root, "inputs": [result_csv],
+                    "outputs": [os.path.join(output_dir, "cluster_plot.png"), os.path.join(output_dir, "models")]},
+        "match": {"script": "bai4.1.py", "args": root + league, "inputs": [result_csv], "download": True,
+                  "outputs": [os.path.join(csv_dir, "players_over_900_minutes.csv"),
+                              os.path.join(csv_dir, "player_transfer_fee.csv")], "resources": ["page_cache"]},
+        "etv": {"script": "estimate_players_fee.py", "args": root + league, "inputs": [result_csv], "download": True,
+                "outputs": [os.path.join(csv_dir, "all_estimate_transfer_fee.csv")], "resources": ["page_cache"]},
+        "value": {"script": "bai4.2.py", "args": root,
+                  "inputs": [result_csv, os.path.join(csv_dir, "all_estimate_transfer_fee.csv")],
+                  "outputs": [os.path.join(csv_dir, "ml_estimated_values_linear.csv")]},
+    }
+
+
+def _inside(path, parent):
+    path, parent = os.path.abspath(path), os.path.abspath(parent)
+    return path == parent or path.startswith(parent + os.sep)
+
+
+def stage_dependencies(stages):
+    """{stage: set of stages writing one of its inputs}."""
+    dependencies = {}
+    for name, stage in stages.items():
+        dependencies[name] = {other for other, other_stage in stages.items() if other != name and any(
+            _inside(path, output) for path in stage["inputs"] for output in other_stage["outputs"])}
+    return dependencies
+
+
+def local_modules(script):
+    """The script and every module from code_dir it imports, directly or indirectly."""
+    seen = set()
+    pending = [script]
+    while pending:
+        name = pending.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        with open(os.path.join(code_dir, name), encoding="utf-8") as f:
+            source = f.read()
+        for match in import_pattern.finditer(source):
+            modules = [match.group(1)] if match.group(1) else match.group(2).split(",")
+            for module in modules:
+                file_name = module.strip().split(" ")[0].split(".")[0] + ".py"
+                if os.path.exists(os.path.join(code_dir, file_name)):
+                    pending.append(file_name)
+    return sorted(seen)
+
+
+def _hash_path(digest, path):
+    if os.path.isdir(path):
+        for folder, _, files in sorted(os.walk(path)):
+            for name in sorted(files):
+                _hash_path(digest, os.path.join(folder, name))
+    elif os.path.exists(path):
+        digest.update(os.path.basename(path).encode("utf-8"))
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    else:
+        digest.update(b"<missing>")
+
+
+def stage_hash(stage, extra_args=()):
+    digest = hashlib.sha256(json.dumps([stage["script"], stage["args"], list(extra_args)]).encode("utf-8"))
+    for module in local_modules(stage["script"]):
+        _hash_path(digest, os.path.join(code_dir, module))
+    for path in stage["inputs"]:
+        _hash_path(digest, path)
+    return digest.hexdigest()
+
+
+def upstream(targets, dependencies):
+    selected = set()
+    pending = list(targets)
+    while pending:
+        name = pending.pop()
+        if name not in selected:
+            selected.add(name)
+            pending.extend(dependencies[name])
+    return selected
+
+
+class PipelineRunner:
+    def __init__(self, output_dir, jobs=2, force=(), refresh=False, passthrough=(), dry_run=False,
+                 competition=default_competition, season=default_season):
+        self.output_dir = output_dir
+        self.stages = pipeline_stages(output_dir, competition, season)
+        self.dependencies = stage_dependencies(self.stages)
+        self.jobs = max(1, jobs)
+        self.force = set(force)
+        self.refresh = refresh
+        self.passthrough = list(passthrough)
+        self.dry_run = dry_run
+        self.state_path = os.path.join(output_dir, state_name)
+        self.state = {}
+        if os.path.exists(self.state_path):
+            with open(self.state_path, encoding="utf-8") as f:
+                self.state = json.load(f)
+        self._lock = threading.Lock()
+
+    def _extra_args(self, stage):
+        return self.passthrough if stage.get("download") else []
+
+    def _up_to_date(self, name, input_hash):
+        stage = self.stages[name]
+        if name in self.force or (self.refresh and stage.get("download")):
+            return False
+        if self.state.get(name, {}).get("hash") != input_hash:
+            return False
+        return all(os.path.exists(path) for path in stage["outputs"])
+
+    def _run_stage(self, name):
+        stage = self.stages[name]
+        extra_args = self._extra_args(stage)
+        input_hash = stage_hash(stage, extra_args)
+        if self._up_to_date(name, input_hash):
+            return name, "skipped", 0.0
+        command = [sys.executable, os.path.join(code_dir, stage["script"])] + stage["args"] + extra_args
+        if self.dry_run:
+            print(f"   would run {name}: {' '.join(command)}")
+            return name, "dry-run", 0.0
+        log_dir = os.path.join(self.output_dir, "logs")
+        os.makedirs(log_dir, exist_ok=True)
+        start = time.perf_counter()
+        with open(os.path.join(log_dir, f"{name}.log"), "w", encoding="utf-8") as log:
+            completed = subprocess.run(command, cwd=code_dir, stdout=log, stderr=subprocess.STDOUT,
+                                       env=dict(os.environ, PYTHONIOENCODING="utf-8", MPLBACKEND="Agg"))
+        elapsed = time.perf_counter() - start
+        if completed.returncode != 0:
+            return name, "failed", elapsed
+        with self._lock:
+            # Băm lại đầu vào sau khi chạy: bước nào sửa chính đầu vào của nó vẫn được ghi nhận đúng
+            self.state[name] = {"hash": stage_hash(stage, extra_args), "seconds": round(elapsed, 2),
+                                "finished": time.strftime("%Y-%m-%dT%H:%M:%S")}
+            os.makedirs(self.output_dir, exist_ok=True)
+            with open(self.state_path, "w", encoding="utf-8") as f:
+                json.dump(self.state, f, indent=1, sort_keys=True)
+        return name, "ran", elapsed
+
+    def run(self, targets=None):
+        """Run the target stages (default: all) and everything upstream; returns {stage: status}."""
+        selected = upstream(targets or list(self.stages), self.dependencies)
+        order = [name for name in self.stages if name in selected]
+        statuses = {}
+        running = {}
+        held_resources = set()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            while len(statuses) < len(order):
+                for name in order:
+                    if name in statuses or name in running.values() or len(running) >= self.jobs:
+                        continue
+                    dependency_statuses = [statuses.get(dependency) for dependency in self.dependencies[name]
+                                           if dependency in selected]
+                    if any(status in ("failed", "blocked") for status in dependency_statuses):
+                        statuses[name] = "blocked"
+                        print(f"⛔ {name}: blocked by a failed upstream stage")
+                        continue
+                    resources = set(self.stages[name].get("resources", []))
+                    if None in dependency_statuses or resources & held_resources:
+                        continue
+                    held_resources |= resources
+                    running[executor.submit(self._run_stage, name)] = name
+                if not running:
+                    continue
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    held_resources -= set(self.stages[name].get("resources", []))
+                    try:
+                        _, status, elapsed = future.result()
+                    except Exception as e:
+                        status, elapsed = "failed", 0.0
+                        print(f"❌ {name}: {e}")
+                    statuses[name] = status
+                    icon = {"ran": "✅", "skipped": "⏭️", "failed": "❌", "dry-run": "📝"}[status]
+                    suffix = f" in {elapsed:.2f}s" if status in ("ran", "failed") else ""
+                    if status == "failed":
+                        suffix += f" (see {os.path.join(self.output_dir, 'logs', name + '.log')})"
+                    print(f"{icon} {name}: {status}{suffix}")
+        counts = {status: list(statuses.values()).count(status) for status in sorted(set(statuses.values()))}
+        print(f"Pipeline finished in {time.perf_counter() - start:.2f}s: "
+              + ", ".join(f"{count} {status}" for status, count in counts.items()))
+        return statuses
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the scraping / analysis stages, skipping unchanged ones")
+    parser.add_argument("stages", nargs="*", help="Stages to run (with everything upstream); default: all")
+    parser.add_argument("--output-dir", required=True)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--force", nargs="+", default=[], help="Re-run these stages even if unchanged")
+    parser.add_argument("--force-all", action="store_true")
+    parser.add_argument("--refresh", action="store_true", help="Re-run the download stages (scrape, match, etv)")
+    parser.add_argument("--offline", action="store_true", help="Download stages replay the page cache only")
+    parser.add_argument("--dry-run", action="store_true", help="Only show which stages would run")
+    parser.add_argument("--competition", choices=list(competitions), default=default_competition)
+    parser.add_argument("--season", type=season_name, default=default_season)
+    args = parser.parse_args()
+
+    output_dir = os.path.abspath(args.output_dir)
+    known_stages = pipeline_stages(output_dir)
+    unknown = [name for name in args.stages + args.force if name not in known_stages]
+    if unknown:
+        parser.error(f"unknown stage(s) {', '.join(unknown)}; choose from {', '.join(known_stages)}")
+    runner = PipelineRunner(output_dir, jobs=args.jobs, force=list(known_stages) if args.force_all else args.force,
+                            refresh=args.refresh, passthrough=["--offline"] if args.offline else [],
+                            dry_run=args.dry_run, competition=args.competition, season=args.season)
+    results = runner.run(args.stages or None)
+    sys.exit(1 if any(status in ("failed", "blocked") for status in results.values()) else 0)
@@ -0,0 +1,131 @@
+"""
+Bộ dữ liệu cầu thủ phân vùng theo giải đấu và mùa giải (nhiều lần chạy bai1andbai2.py).
+
+Each scrape-and-merge run for one competition and season writes its merged
+table to <dataset>/league=<competition>/season=<season>/players.arrow, typed
+the same way as result.arrow. load_dataset() opens the directory as one
+hive-partitioned Arrow dataset: league/season filters drop whole directories
+before any file is opened, only the requested columns are read from the files
+that remain, and row filters (e.g. minimum minutes) are applied while
+scanning. Partitions written with different column sets are read with the
+union of their schemas. Requested columns that no selected partition has come
+back as typed nulls, also when no partition matches at all.
+
+Usage:
+    python player_dataset.py DATASET_DIR [--league L ...] [--season S ...] [--columns C ...] [--min-minutes N]
+"""
+import argparse
+import os
+import time
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.feather as feather
+
+from fbref_config import decimal_columns, integer_columns, text_columns
+from player_table import player_arrow_table, player_table_schema
+
+partition_file = "players.arrow"
+partition_schema = pa.schema([pa.field("league", pa.string()), pa.field("season", pa.string())])
+partitioning = ds.partitioning(partition_schema, flavor="hive")
+
+
+def partition_dir(dataset_dir, competition, season):
+    return os.path.join(dataset_dir, f"league={competition}", f"season={season}")
+
+
+def write_partition(data_frame, dataset_dir, competition, season):
+    """Write (replace) the partition of one competition and season; returns the file path."""
+    folder = partition_dir(dataset_dir, competition, season)
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, partition_file)
+    # Ghi ra file tạm rồi đổi tên để người đọc song song không thấy file ghi dở
+    feather.write_feather(player_arrow_table(data_frame), path + ".tmp", compression="uncompressed")
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def list_partitions(dataset_dir):
+    """[(competition, season)] of every partition on disk."""
+    partitions = []
+    if not os.path.isdir(dataset_dir):
+        return partitions
+    for league_folder in sorted(os.listdir(dataset_dir)):
+        if not league_folder.startswith("league="):
+            continue
+        for season_folder in sorted(os.listdir(os.path.join(dataset_dir, league_folder))):
+            if season_folder.startswith("season=") and os.path.exists(
+                    os.path.join(dataset_dir, league_folder, season_folder, partition_file)):
+                partitions.append((league_folder[len("league="):], season_folder[len("season="):]))
+    return partitions
+
+
+def matching_partitions(dataset_dir, competitions=None, seasons=None):
+    """[(competition, season)] of the partitions on disk selected by competitions/seasons (None = all)."""
+    return [(competition, season) for competition, season in list_partitions(dataset_dir)
+            if (not competitions or competition in competitions) and (not seasons or season in seasons)]
+
+
+def partition_filter(competitions=None, seasons=None):
+    expression = None
+    for field, values in (("league", competitions), ("season", seasons)):
+        if values:
+            condition = ds.field(field).isin(list(values))
+            expression = condition if expression is None else expression & condition
+    return expression
+
+
+def open_dataset(dataset_dir, competitions=None, seasons=None):
+    """Arrow dataset over the partitions matching competitions/seasons (None = all); None if nothing matches."""
+    if not os.path.isdir(dataset_dir):
+        return None
+    discovered = ds.dataset(dataset_dir, format="ipc", partitioning=partitioning)
+    fragments = [fragment for fragment in discovered.get_fragments(filter=partition_filter(competitions, seasons))
+                 if fragment.path.endswith(partition_file)]
+    if not fragments:
+        return None
+    # Chỉ đọc schema của các phân vùng được chọn, rồi hợp lại để cột thiếu ở phân vùng nào thì là null
+    schema = pa.unify_schemas([fragment.physical_schema for fragment in fragments] + [partition_schema])
+    return ds.dataset([fragment.path for fragment in fragments], schema=schema, format="ipc",
+                      partitioning=partitioning, partition_base_dir=dataset_dir)
+
+
+def load_dataset(dataset_dir, columns=None, competitions=None, seasons=None, row_filter=None):
+    """Players of the selected partitions as a DataFrame with league and season columns."""
+    dataset = open_dataset(dataset_dir, competitions, seasons)
+    if columns is None:
+        columns = dataset.schema.names if dataset is not None else text_columns + integer_columns + decimal_columns
+    columns = [col for col in dict.fromkeys(columns) if col not in partition_schema.names] + partition_schema.names
+    if dataset is None:
+        table = partition_schema.empty_table()
+    else:
+        table = dataset.to_table(columns=[col for col in columns if col in dataset.schema.names], filter=row_filter)
+    # Cột không có ở phân vùng nào vẫn được trả về, là null với kiểu như trong result.arrow
+    schema = player_table_schema(columns)
+    table = pa.table({field.name: table.column(field.name) if field.name in table.schema.names
+                      else pa.nulls(len(table), field.type) for field in schema})
+    return table.to_pandas(ignore_metadata=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the league/season partitioned player dataset")
+    parser.add_argument("dataset_dir")
+    parser.add_argument("--league", nargs="+", default=None)
+    parser.add_argument("--season", nargs="+", default=None)
+    parser.add_argument("--columns", nargs="+", default=["Player", "Team", "Minutes", "Gls", "xG"])
+    parser.add_argument("--min-minutes", type=int, default=None)
+    args = parser.parse_args()
+
+    all_partitions = list_partitions(args.dataset_dir)
+    selected = matching_partitions(args.dataset_dir, args.league, args.season)
+    row_filter = ds.field("Minutes") >= args.min_minutes if args.min_minutes is not None else None
+    start = time.perf_counter()
+    if not selected:
+        parser.exit(1, f"No partitions in {args.dataset_dir} match the selected league(s)/season(s)\n")
+    players = load_dataset(args.dataset_dir, args.columns, args.league, args.season, row_filter)
+    elapsed = time.perf_counter() - start
+    print(f"📦 {len(selected)} of {len(all_partitions)} partition(s) read, "
+          f"{len(players)} player row(s), {players.shape[1]} column(s) in {elapsed * 1000:.1f} ms")
+    if len(players):
+        print(players.groupby(["league", "season"]).size().rename("players").to_string())
+        print(players.head(10).to_string())
@@ -0,0 +1,117 @@
+"""
+Bảng định danh cầu thủ giữa FBref và nguồn định giá (FootballTransfers), lưu lại giữa các lần chạy.
+
+Every resolved link (FBref key -> source name, score, method, timestamp) is
+stored in a CSV. resolve() consults that table first and only sends players
+without a stored link to fuzzy matching (through NameIndex), so re-runs do
+almost no matching work and a player keeps the same link across runs. The
+FBref key is the Player_ID from result.csv when it is available, otherwise
+the player name. Rows with Method "manual" can be added by hand to pin a link
+and are never replaced; their Score may be left blank (read as 100). Players that found no match are remembered together
+with a fingerprint of the source name list and retried only when it changes.
+"""
+import hashlib
+import os
+import time
+
+import pandas as pd
+
+from name_index import NameIndex
+
+identity_columns = ["FBref_Key", "FBref_Name", "Source", "Source_Name", "Score", "Method", "Matched_At",
+                    "Source_Fingerprint"]
+
+
+def _names_fingerprint(names):
+    return hashlib.sha256("\n".join(sorted(names)).encode("utf-8")).hexdigest()[:16]
+
+
+def _link_score(link):
+    # Dòng "manual" thêm bằng tay có thể để trống Score: coi như khớp tuyệt đối
+    try:
+        return int(float(link.Score))
+    except (TypeError, ValueError):
+        return 100 if link.Method == "manual" else None
+
+
+def fbref_keys(names, ids=None):
+    names = pd.Series(names)
+    keys = "name:" + names.astype(str)
+    if ids is not None:
+        ids = pd.Series(ids, index=names.index)
+        keys = ids.astype("string").where(ids.notna(), keys).astype(object)
+    return keys
+
+
+class PlayerIdentityTable:
+    def __init__(self, path, source="footballtransfers"):
+        self.path = path
+        self.source = source
+        if os.path.exists(path):
+            self.table = pd.read_csv(path, dtype=str, keep_default_na=False, encoding="utf-8-sig")
+        else:
+            self.table = pd.DataFrame(columns=identity_columns)
+        self.hits = 0
+        self.matched = 0
+
+    def _links(self):
+        rows = self.table[self.table["Source"] == self.source]
+        return {row.FBref_Key: row for row in rows.itertuples(index=False)}
+
+    def resolve(self, names, source_names, ids=None, simplify=None, min_score=90):
+        """Linked_Name / Link_Score for every FBref player (aligned to names), None when unmatched."""
+        names = pd.Series(names)
+        keys = fbref_keys(names, ids)
+        source_names = [name for name in source_names if isinstance(name, str)]
+        available = set(source_names)
+        fingerprint = _names_fingerprint(available)
+        links = self._links()
+
+        linked_names = pd.Series(None, index=names.index, dtype=object)
+        link_scores = pd.Series(None, index=names.index, dtype=object)
+        pending = []
+        for position, (index, key) in enumerate(zip(names.index, keys)):
+            link = links.get(key)
+            if link is not None and link.Source_Name in available:
+                linked_names[index] = link.Source_Name
+                link_scores[index] = _link_score(link)
+                self.hits += 1
+            elif link is not None and link.Method == "unmatched" and link.Source_Fingerprint == fingerprint:
+                self.hits += 1
+            elif link is None or link.Method != "manual":
+                pending.append(position)
+
+        if pending:
+            simplify = simplify or (lambda name: name)
+            # Tên rút gọn trùng nhau: giữ tên gốc xuất hiện đầu tiên, giống simplified_options.index()
+            originals = {}
+            for name in source_names:
+                originals.setdefault(simplify(name), name)
+            index = NameIndex(list(originals))
+            queries = [simplify(name) if isinstance(name, str) else "" for name in names.iloc[pending]]
+            now = time.strftime("%Y-%m-%dT%H:%M:%S")
+            new_rows = []
+            for position, match in zip(pending, index.extract_many(queries, score_cutoff=min_score)):
+                row_index = names.index[position]
+                if match is not None:
+                    linked_names[row_index] = originals[match[0]]
+                    link_scores[row_index] = match[1]
+                    self.matched += 1
+                    new_rows.append([keys.iloc[position], names.iloc[position], self.source,
+                                     originals[match[0]], match[1], "fuzzy", now, ""])
+                else:
+                    new_rows.append([keys.iloc[position], names.iloc[position], self.source,
+                                     "", 0, "unmatched", now, fingerprint])
+            replaced = set(row[0] for row in new_rows)
+            keep = ~((self.table["Source"] == self.source) & self.table["FBref_Key"].isin(replaced))
+            self.table = pd.concat([self.table[keep], pd.DataFrame(new_rows, columns=identity_columns)],
+                                   ignore_index=True)
+        return pd.DataFrame({"Linked_Name": linked_names, "Link_Score": link_scores})
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.table.to_csv(self.path, index=False, encoding="utf-8-sig")
+
+    def report(self):
+        print(f"Identity table: {self.hits} stored link(s) reused, {self.matched} new fuzzy match(es), "
+              f"{len(self.table)} row(s) in {self.path}")
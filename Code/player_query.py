@@ -0,0 +1,284 @@
+"""
+Dịch vụ truy vấn cục bộ trên bảng cầu thủ đã ghép (lọc + sắp xếp + top-k), có chỉ mục và cache LRU.
+
+PlayerQueryEngine loads the merged table once and builds:
+  - equality indexes on Team, Position (each part of "MF,FW"), Nation and, for
+    the partitioned dataset, league/season: value -> sorted row numbers;
+  - range indexes on Age and Minutes: rows sorted by value, so a range becomes
+    two searchsorted calls.
+A query combines the index hits into one boolean mask (other numeric columns
+can still be range-filtered with a vectorized comparison), then takes the top
+k rows by any numeric stat with argpartition. Results are kept in an LRU cache
+keyed by the normalized query; the table never changes after loading, so the
+cache only has to be cleared on reload. Ranges are min <= value < max, so
+"under 23" is max Age 23.
+
+The HTTP service (standard library only) answers
+    GET /query?team=Brighton&position=DF&max_Age=23&sort=xG per 90&k=10
+with JSON; list filters take comma-separated values (team, position, nation,
+league, season), min_<column>/max_<column> filter any numeric column, asc=1
+sorts ascending and columns= picks the returned columns. GET /stats reports
+cache hits/misses.
+
+Usage:
+    python player_query.py serve [--result-csv result.csv | --dataset DIR] [--port 8765] [--cache-size 1024]
+    python player_query.py query --sort "xG per 90" [--team Brighton] [--position DF] [--max Age 23] [--k 10]
+"""
+import argparse
+import json
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+equality_columns = {"team": "Team", "position": "Position", "nation": "Nation", "league": "league", "season": "season"}
+range_index_columns = ["Age", "Minutes"]
+default_result_columns = ["Player", "Team", "Position", "Nation", "Age", "Minutes"]
+
+
+class PlayerQueryEngine:
+    def __init__(self, data, cache_size=1024):
+        self.data = data.reset_index(drop=True)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.numeric = {col: self.data[col].to_numpy(dtype="float64", na_value=np.nan)
+                        for col in self.data.columns if pd.api.types.is_numeric_dtype(self.data[col])}
+        self.equality_index = {}
+        for col in equality_columns.values():
+            if col not in self.data.columns:
+                continue
+            values = self.data[col].fillna("").astype(str)
+            if col == "Position":
+                # Một cầu thủ "MF,FW" nằm trong cả hai danh sách MF và FW
+                values = values.str.split(",").explode()
+            rows = pd.Series(values.index.to_numpy(), index=values.to_numpy())
+            self.equality_index[col] = {value: np.unique(group.to_numpy())
+                                        for value, group in rows.groupby(level=0)}
+        self.range_index = {}
+        for col in range_index_columns:
+            if col in self.numeric:
+                values = self.numeric[col]
+                order = np.argsort(values, kind="stable")
+                valid = int(np.count_nonzero(~np.isnan(values)))
+                self.range_index[col] = (order[:valid], values[order[:valid]])
+
+    def __len__(self):
+        return len(self.data)
+
+    @staticmethod
+    def cache_key(sort_by, k, ascending, equals, ranges, columns):
+        equals = {col: sorted(values) for col, values in (equals or {}).items() if values}
+        ranges = {col: list(bounds) for col, bounds in (ranges or {}).items()}
+        return json.dumps([sort_by, k, ascending, equals, ranges, columns], sort_keys=True)
+
+    def _rows_for_range(self, col, low, high):
+        mask = np.zeros(len(self), dtype=bool)
+        order, sorted_values = self.range_index[col]
+        start = 0 if low is None else np.searchsorted(sorted_values, low, side="left")
+        stop = len(sorted_values) if high is None else np.searchsorted(sorted_values, high, side="left")
+        mask[order[start:stop]] = True
+        return mask
+
+    def candidate_mask(self, equals=None, ranges=None):
+        mask = np.ones(len(self), dtype=bool)
+        for col, values in (equals or {}).items():
+            if not values:
+                continue
+            if col not in self.equality_index:
+                raise ValueError(f"no index on column {col!r}")
+            column_mask = np.zeros(len(self), dtype=bool)
+            for value in values:
+                column_mask[self.equality_index[col].get(str(value), [])] = True
+            mask &= column_mask
+        for col, (low, high) in (ranges or {}).items():
+            if col in self.range_index:
+                mask &= self._rows_for_range(col, low, high)
+            elif col in self.numeric:
+                values = self.numeric[col]
+                with np.errstate(invalid="ignore"):
+                    if low is not None:
+                        mask &= values >= low
+                    if high is not None:
+                        mask &= values < high
+            else:
+                raise ValueError(f"unknown numeric column {col!r}")
+        return mask
+
+    def top_rows(self, sort_by, k=10, ascending=False, equals=None, ranges=None):
+        """Row numbers of the top k matching players by sort_by (players without a value are left out)."""
+        if sort_by not in self.numeric:
+            raise ValueError(f"unknown numeric column {sort_by!r}")
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        rows = np.flatnonzero(self.candidate_mask(equals, ranges))
+        values = self.numeric[sort_by][rows]
+        keep = ~np.isnan(values)
+        rows, values = rows[keep], values[keep]
+        keys = values if ascending else -values
+        if k < len(rows):
+            top = np.argpartition(keys, k - 1)[:k]
+            rows, keys = rows[top], keys[top]
+        return rows[np.lexsort((rows, keys))]
+
+    def query(self, sort_by, k=10, ascending=False, equals=None, ranges=None, columns=None):
+        """Top-k DataFrame for one filter + sort query, served from the LRU cache when possible."""
+        columns = list(columns) if columns else [col for col in default_result_columns if col in self.data.columns]
+        if sort_by not in columns:
+            columns.append(sort_by)
+        missing = [col for col in columns if col not in self.data.columns]
+        if missing:
+            raise ValueError(f"unknown column(s) {', '.join(map(repr, missing))}")
+        key = self.cache_key(sort_by, k, ascending, equals, ranges, columns)
+        with self._lock:
+            result = self._cache.get(key)
+            if result is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return result.copy()
+        rows = self.top_rows(sort_by, k, ascending, equals, ranges)
+        # Chỉ lấy đúng các dòng và cột cần trả về, không sao chép cả bảng
+        result = self.data.iloc[rows, self.data.columns.get_indexer(columns)].reset_index(drop=True)
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result.copy()
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"players": len(self), "cached_queries": len(self._cache), "cache_size": self.cache_size,
+                    "hits": self.hits, "misses": self.misses}
+
+
+def parse_query_string(query_string):
+    """Keyword arguments of PlayerQueryEngine.query from a /query URL query string."""
+    params = parse_qs(query_string, keep_blank_values=False)
+    equals, ranges = {}, {}
+    for name, values in params.items():
+        value = values[-1]
+        if name in equality_columns:
+            equals[equality_columns[name]] = [part.strip() for part in value.split(",") if part.strip()]
+        elif name.startswith("min_") or name.startswith("max_"):
+            low, high = ranges.get(name[4:], (None, None))
+            ranges[name[4:]] = (float(value), high) if name.startswith("min_") else (low, float(value))
+    if "sort" not in params:
+        raise ValueError("missing sort=<column>")
+    columns = params["columns"][-1].split(",") if "columns" in params else None
+    return {"sort_by": params["sort"][-1], "k": int(params.get("k", ["10"])[-1]),
+            "ascending": params.get("asc", ["0"])[-1] in ("1", "true"), "equals": equals, "ranges": ranges,
+            "columns": columns}
+
+
+def make_handler(engine):
+    class QueryHandler(BaseHTTPRequestHandler):
+        def _send(self, status, payload):
+            if not isinstance(payload, str):
+                payload = json.dumps(payload, ensure_ascii=False, default=str)
+            body = payload.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/stats":
+                self._send(200, engine.stats())
+            elif url.path == "/query":
+                try:
+                    result = engine.query(**parse_query_string(url.query))
+                except ValueError as e:
+                    self._send(400, {"error": str(e)})
+                    return
+                # to_json ghi NaN thành null
+                self._send(200, '{"rows": ' + result.to_json(orient="records", force_ascii=False) + "}")
+            else:
+                self._send(404, {"error": "use /query or /stats"})
+
+        def log_message(self, format, *args):
+            pass
+
+    return QueryHandler
+
+
+def start_server(engine, host="127.0.0.1", port=8765):
+    """Serve engine over HTTP in a background thread; returns the server (port 0 picks a free port)."""
+    server = ThreadingHTTPServer((host, port), make_handler(engine))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def load_engine(result_csv="result.csv", dataset_dir=None, leagues=None, seasons=None, cache_size=1024):
+    if dataset_dir:
+        from player_dataset import load_dataset
+
+        data = load_dataset(dataset_dir, competitions=leagues, seasons=seasons)
+    else:
+        from player_table import load_player_table
+
+        data = load_player_table(result_csv)
+    return PlayerQueryEngine(data, cache_size=cache_size)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Indexed filter / sort / top-k queries over the player table")
+    parser.add_argument("command", choices=["serve", "query"])
+    parser.add_argument("--result-csv", default="result.csv")
+    parser.add_argument("--dataset", default=None, help="Partitioned dataset directory (instead of result.csv)")
+    parser.add_argument("--league", nargs="+", default=None)
+    parser.add_argument("--season", nargs="+", default=None)
+    parser.add_argument("--cache-size", type=int, default=1024)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--sort", default=None, help="Stat to rank by (query)")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--asc", action="store_true")
+    parser.add_argument("--team", nargs="+", default=None)
+    parser.add_argument("--position", nargs="+", default=None)
+    parser.add_argument("--nation", nargs="+", default=None)
+    parser.add_argument("--min", nargs=2, action="append", default=[], metavar=("COLUMN", "VALUE"))
+    parser.add_argument("--max", nargs=2, action="append", default=[], metavar=("COLUMN", "VALUE"))
+    args = parser.parse_args()
+
+    if args.dataset:
+        from player_dataset import matching_partitions
+
+        if not matching_partitions(args.dataset, args.league, args.season):
+            parser.exit(1, f"No partitions in {args.dataset} match the selected league(s)/season(s)\n")
+    start = time.perf_counter()
+    engine = load_engine(args.result_csv, args.dataset, args.league, args.season, args.cache_size)
+    print(f"📚 Loaded and indexed {len(engine)} players in {(time.perf_counter() - start) * 1000:.1f} ms")
+    if args.command == "serve":
+        server = start_server(engine, args.host, args.port)
+        print(f"🚀 Serving on http://{args.host}:{server.server_address[1]}/query (Ctrl+C to stop)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
+    else:
+        if not args.sort:
+            parser.error("query needs --sort")
+        ranges = {}
+        for col, value in args.min:
+            ranges[col] = (float(value), ranges.get(col, (None, None))[1])
+        for col, value in args.max:
+            ranges[col] = (ranges.get(col, (None, None))[0], float(value))
+        equals = {"Team": args.team, "Position": args.position, "Nation": args.nation}
+        start = time.perf_counter()
+        result = engine.query(args.sort, args.k, args.asc, {col: v for col, v in equals.items() if v}, ranges)
+        print(result.to_string(index=False))
+        print(f"⏱️ {(time.perf_counter() - start) * 1000:.2f} ms")
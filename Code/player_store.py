@@ -0,0 +1,307 @@
+"""
+Cơ sở dữ liệu SQLite dùng chung giữa các bước, thay cho việc ghi lại và đọc lại toàn bộ các file CSV.
+
+<root>/csv/players.sqlite has six tables:
+  players         one row per FBref player key (name, nation, last league/season seen)
+  stat_snapshots  the merged stat table, one row per (league, season, player key),
+                  one typed SQL column per column of result.csv
+  valuations      estimated transfer values scraped from FootballTransfers
+  transfers       confirmed transfer fees per (league, season)
+  team_summaries  results2.csv in long form: (league, season, team, statistic) -> value
+  top_team_stats  highest_team_stats.csv: best team and mean value per statistic
+with indexes on player key, team and position. Each stage replaces what it
+produces for its league/season (or league, for valuations) in one
+transaction, so rows that disappeared from the source do not linger, and
+downstream stages select only the rows and columns they need, e.g. the
+players over 900 minutes, instead of parsing whole CSV files. The snapshot
+that result.csv mirrors is recorded as the "current" one, so readers stay on
+the same league/season as the CSV (load_current_players). The CSV files are
+still written for the report; readers fall back to them when the database
+has no data yet. The histograms, which run in their own process from
+result.csv's path, read the players the same way.
+The database runs in WAL mode with a busy timeout, so stages running in
+parallel can write to it.
+"""
+import json
+import os
+import sqlite3
+import time
+
+import pandas as pd
+
+from cleaning import parse_fees
+from fbref_config import decimal_columns, integer_columns, key_column, text_columns
+from instrumentation import stage
+from player_table import load_player_table, player_table_columns
+
+store_name = "players.sqlite"
+
+
+def store_path(root_dir):
+    return os.path.join(root_dir, "csv", store_name)
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _sql_type(col):
+    if col in integer_columns:
+        return "INTEGER"
+    if col in text_columns:
+        return "TEXT"
+    return "REAL"
+
+
+def _rows(data_frame):
+    # NaN / pd.NA / "N/A" đều lưu là NULL
+    values = data_frame.astype(object).where(data_frame.notna(), None)
+    return [tuple(None if value == "N/A" else value for value in row) for row in values.itertuples(index=False)]
+
+
+class PlayerStore:
+    def __init__(self, path, timeout=30.0):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=timeout)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.snapshot_columns = [key_column] + [col for col in dict.fromkeys(text_columns + integer_columns + decimal_columns)
+                                                if col != key_column]
+        self._create_schema()
+
+    def _create_schema(self):
+        stat_columns = ",\n".join(f"    {_quote(col)} {_sql_type(col)}" for col in self.snapshot_columns)
+        with self.connection:
+            self.connection.executescript(f"""
+CREATE TABLE IF NOT EXISTS players (
+    player_key TEXT PRIMARY KEY,
+    name TEXT,
+    nation TEXT,
+    last_league TEXT,
+    last_season TEXT
+);
+CREATE TABLE IF NOT EXISTS stat_snapshots (
+    league TEXT NOT NULL,
+    season TEXT NOT NULL,
+{stat_columns},
+    PRIMARY KEY (league, season, {_quote(key_column)})
+);
+CREATE INDEX IF NOT EXISTS stat_snapshots_player ON stat_snapshots ({_quote(key_column)});
+CREATE INDEX IF NOT EXISTS stat_snapshots_team ON stat_snapshots (league, season, "Team");
+CREATE INDEX IF NOT EXISTS stat_snapshots_position ON stat_snapshots (league, season, "Position");
+CREATE TABLE IF NOT EXISTS valuations (
+    source TEXT NOT NULL,
+    league TEXT NOT NULL,
+    player TEXT NOT NULL,
+    position TEXT,
+    price TEXT,
+    price_value REAL,
+    updated_at TEXT,
+    PRIMARY KEY (source, league, player)
+);
+CREATE INDEX IF NOT EXISTS valuations_position ON valuations (source, league, position);
+CREATE TABLE IF NOT EXISTS transfers (
+    league TEXT NOT NULL,
+    season TEXT NOT NULL,
+    player TEXT NOT NULL,
+    price TEXT,
+    price_value REAL,
+    updated_at TEXT,
+    PRIMARY KEY (league, season, player)
+);
+CREATE TABLE IF NOT EXISTS team_summaries (
+    league TEXT NOT NULL,
+    season TEXT NOT NULL,
+    team TEXT NOT NULL,
+    statistic TEXT NOT NULL,
+    value REAL,
+    PRIMARY KEY (league, season, team, statistic)
+);
+CREATE TABLE IF NOT EXISTS top_team_stats (
+    league TEXT NOT NULL,
+    season TEXT NOT NULL,
+    statistic TEXT NOT NULL,
+    team TEXT,
+    mean_value REAL,
+    PRIMARY KEY (league, season, statistic)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value TEXT
+);
+""")
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def replace_snapshot(self, data_frame, league, season, current=False):
+        """Replace the stats of one league/season (and upsert its players); current=True when result.csv is this snapshot."""
+        stored_columns = [col for col in data_frame.columns if col in self.snapshot_columns]
+        if key_column not in data_frame.columns:
+            # Bảng cũ chưa có mã FBref: dùng tên làm khóa như player_identity.fbref_keys
+            data_frame = data_frame.assign(**{key_column: "name:" + data_frame["Player"].astype(str)})
+        columns = [col for col in self.snapshot_columns if col in data_frame.columns]
+        data_frame = data_frame.dropna(subset=[key_column]).drop_duplicates(subset=[key_column])
+        quoted = ", ".join(["league", "season"] + [_quote(col) for col in columns])
+        placeholders = ", ".join(["?"] * (len(columns) + 2))
+        rows = [(league, season) + row for row in _rows(data_frame[columns])]
+        people = [row + (league, season) for row in _rows(data_frame.reindex(columns=[key_column, "Player", "Nation"]))]
+        now = time.strftime("%Y-%m-%dT%H:%M:%S")
+        with self.connection:
+            self.connection.execute("DELETE FROM stat_snapshots WHERE league = ? AND season = ?", (league, season))
+            self.connection.executemany(f"INSERT INTO stat_snapshots ({quoted}) VALUES ({placeholders})", rows)
+            self.connection.executemany(
+                "INSERT INTO players (player_key, name, nation, last_league, last_season) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(player_key) DO UPDATE SET name = excluded.name, nation = excluded.nation, "
+                "last_league = excluded.last_league, last_season = excluded.last_season", people)
+            # Giữ thứ tự cột của result.csv để đọc ra đúng như file
+            meta = [(f"columns:{league}/{season}", json.dumps(stored_columns))]
+            if current:
+                meta += [("current_league", league), ("current_season", season), ("current_updated_at", now)]
+            self.connection.executemany("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", meta)
+        return len(rows)
+
+    def current_snapshot_id(self):
+        """(league, season) of the snapshot result.csv mirrors, or None."""
+        values = dict(self.connection.execute(
+            "SELECT name, value FROM meta WHERE name IN ('current_league', 'current_season')").fetchall())
+        if "current_league" not in values:
+            return None
+        return values["current_league"], values["current_season"]
+
+    def stored_columns(self, league=None, season=None):
+        """result.csv columns of a snapshot (default: the current one), in order; None if not stored."""
+        if league is None or season is None:
+            current = self.current_snapshot_id()
+            if current is None:
+                return None
+            league, season = current
+        stored_columns = self.connection.execute("SELECT value FROM meta WHERE name = ?",
+                                                 (f"columns:{league}/{season}",)).fetchone()
+        return None if stored_columns is None else json.loads(stored_columns[0])
+
+    def snapshot(self, columns=None, where="", params=(), league=None, season=None, order_by="rowid"):
+        """Rows of a snapshot (default: the current one) filtered in SQL, in result.csv order; None if not stored."""
+        if league is None or season is None:
+            current = self.current_snapshot_id()
+            if current is None:
+                return None
+            league, season = current
+        stored_columns = self.stored_columns(league, season)
+        if stored_columns is None:
+            return None
+        columns = stored_columns if columns is None else [col for col in columns if col in stored_columns]
+        sql = (f"SELECT {', '.join(_quote(col) for col in columns)} FROM stat_snapshots "
+               f"WHERE league = ? AND season = ?" + (f" AND ({where})" if where else ""))
+        if order_by:
+            sql += f" ORDER BY {order_by}"
+        with stage("read store snapshot", league=league, season=season) as span:
+            data_frame = pd.read_sql_query(sql, self.connection, params=(league, season) + tuple(params))
+            span.rows_out = len(data_frame)
+        return data_frame
+
+    def replace_valuations(self, data_frame, league, source="footballtransfers"):
+        """Replace the Player / Position / Price rows of one league (players no longer listed are dropped)."""
+        now = time.strftime("%Y-%m-%dT%H:%M:%S")
+        data_frame = data_frame.drop_duplicates(subset=["Player"])
+        values = parse_fees(data_frame["Price"]).tolist()
+        rows = [(source, league, player, position, price, None if pd.isna(value) else value, now)
+                for (player, position, price), value in zip(_rows(data_frame[["Player", "Position", "Price"]]), values)]
+        with self.connection:
+            self.connection.execute("DELETE FROM valuations WHERE source = ? AND league = ?", (source, league))
+            self.connection.executemany(
+                "INSERT INTO valuations (source, league, player, position, price, price_value, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def valuations(self, league, source="footballtransfers"):
+        """Player / Position / Price / Price_Value of one league (empty when nothing is stored)."""
+        return pd.read_sql_query(
+            'SELECT player AS "Player", position AS "Position", price AS "Price", price_value AS "Price_Value" '
+            "FROM valuations WHERE source = ? AND league = ? ORDER BY rowid", self.connection, params=(source, league))
+
+    def replace_transfers(self, data_frame, league, season):
+        """Replace the confirmed transfers (Player / Price) of one league/season."""
+        now = time.strftime("%Y-%m-%dT%H:%M:%S")
+        data_frame = data_frame.drop_duplicates(subset=["Player"])
+        values = parse_fees(data_frame["Price"]).tolist()
+        rows = [(league, season, player, price, None if pd.isna(value) else value, now)
+                for (player, price), value in zip(_rows(data_frame[["Player", "Price"]]), values)]
+        with self.connection:
+            self.connection.execute("DELETE FROM transfers WHERE league = ? AND season = ?", (league, season))
+            self.connection.executemany(
+                "INSERT INTO transfers (league, season, player, price, price_value, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def replace_team_summaries(self, stats_summary, top_team_stats, league, season):
+        """Replace the results2.csv / highest_team_stats.csv tables of one league/season."""
+        # Cột đầu (tên rỗng) của results2.csv là đội, hoặc "all" cho dòng cả giải
+        teams = stats_summary.iloc[:, 0].astype(str).tolist()
+        top_rows = [(league, season) + row for row in _rows(top_team_stats[["Statistic", "Team", "Mean Value"]])]
+        with self.connection:
+            self.connection.execute("DELETE FROM team_summaries WHERE league = ? AND season = ?", (league, season))
+            self.connection.execute("DELETE FROM top_team_stats WHERE league = ? AND season = ?", (league, season))
+            # Ghi từng chỉ số một (generator) thay vì dựng cả bảng dạng dài trong bộ nhớ
+            for statistic in stats_summary.columns[1:]:
+                self.connection.executemany(
+                    "INSERT INTO team_summaries (league, season, team, statistic, value) VALUES (?, ?, ?, ?, ?)",
+                    ((league, season, team, statistic, None if pd.isna(value) else float(value))
+                     for team, value in zip(teams, stats_summary[statistic].tolist())))
+            self.connection.executemany("INSERT INTO top_team_stats (league, season, statistic, team, mean_value) "
+                                        "VALUES (?, ?, ?, ?, ?)", top_rows)
+        return len(teams) * (len(stats_summary.columns) - 1), len(top_rows)
+
+    def read_sql(self, sql, params=()):
+        return pd.read_sql_query(sql, self.connection, params=params)
+
+
+def open_store(root_dir):
+    """PlayerStore at <root>/csv/players.sqlite, or None if it cannot be opened (readers then use the CSVs)."""
+    try:
+        return PlayerStore(store_path(root_dir))
+    except sqlite3.Error as e:
+        print(f"⚠️ Could not open {store_path(root_dir)}: {e}")
+        return None
+
+
+def _current_store(result_csv_path):
+    path = os.path.join(os.path.dirname(os.path.abspath(result_csv_path)), store_name)
+    return path if os.path.exists(path) else None
+
+
+def current_player_columns(result_csv_path):
+    """Columns load_current_players would return, without reading any rows."""
+    path = _current_store(result_csv_path)
+    if path is not None:
+        try:
+            with PlayerStore(path) as store:
+                columns = store.stored_columns()
+        except sqlite3.Error as e:
+            print(f"⚠️ Could not read {path}: {e}")
+            columns = None
+        if columns is not None:
+            return columns
+    return player_table_columns(result_csv_path)
+
+
+def load_current_players(result_csv_path, columns=None):
+    """Players of the current snapshot from the store next to result.csv, or result.csv / .arrow without one."""
+    path = _current_store(result_csv_path)
+    if path is not None:
+        try:
+            with PlayerStore(path) as store:
+                data_frame = store.snapshot(columns)
+        except sqlite3.Error as e:
+            print(f"⚠️ Could not read {path}: {e}")
+            data_frame = None
+        if data_frame is not None:
+            return data_frame
+    return load_player_table(result_csv_path, columns)
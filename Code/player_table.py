@@ -0,0 +1,94 @@
+"""
+Lưu và đọc bảng cầu thủ (result.csv) ở dạng cột có kiểu (Arrow IPC / Feather).
+
+bai1andbai2.py writes result.arrow next to result.csv with an explicit schema
+built from the integer/decimal/text column groups in fbref_config. The file is
+uncompressed so downstream scripts can memory-map it and read only the columns
+they use, without re-parsing text or re-coercing types. When no .arrow file
+exists, or result.csv is newer than it (edited by hand, or an old .arrow copied
+in), load_player_table falls back to the CSV.
+"""
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from fbref_config import decimal_columns, integer_columns, text_columns
+from instrumentation import stage
+
+
+def arrow_path_for(csv_path):
+    return os.path.splitext(csv_path)[0] + ".arrow"
+
+
+def player_table_schema(columns):
+    fields = []
+    for col in columns:
+        if col in integer_columns:
+            fields.append(pa.field(col, pa.int64()))
+        elif col in decimal_columns:
+            fields.append(pa.field(col, pa.float64()))
+        elif col in text_columns:
+            fields.append(pa.field(col, pa.string()))
+        else:
+            fields.append(pa.field(col, pa.float64()))
+    return pa.schema(fields)
+
+
+def player_arrow_table(data_frame):
+    """data_frame as an Arrow table with the typed player schema."""
+    data_frame = data_frame.copy()
+    for col in text_columns:
+        if col in data_frame.columns:
+            # "N/A" chỉ là cách hiển thị trong CSV, trong file cột thì lưu là null
+            data_frame[col] = data_frame[col].mask(data_frame[col] == "N/A")
+    return pa.Table.from_pandas(data_frame, schema=player_table_schema(data_frame.columns), preserve_index=False)
+
+
+def write_player_table(data_frame, csv_path):
+    """Write data_frame as a typed Arrow IPC file next to csv_path and return its path."""
+    path = arrow_path_for(csv_path)
+    # Ghi ra file tạm rồi đổi tên để người đọc song song không thấy file ghi dở
+    feather.write_feather(player_arrow_table(data_frame), path + ".tmp", compression="uncompressed")
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def _current_arrow_path(csv_path):
+    # Bản .arrow chỉ dùng được khi không cũ hơn result.csv
+    path = arrow_path_for(csv_path)
+    if not os.path.exists(path):
+        return None
+    if os.path.exists(csv_path) and os.path.getmtime(csv_path) > os.path.getmtime(path):
+        return None
+    return path
+
+
+def player_table_columns(csv_path):
+    """Column names of result.csv (from the .arrow schema when it is current), without reading any rows."""
+    path = _current_arrow_path(csv_path)
+    if path is not None:
+        return feather.read_table(path, columns=[], memory_map=True).schema.names
+    return list(pd.read_csv(csv_path, nrows=0).columns)
+
+
+def _read_player_table(csv_path, columns=None):
+    path = _current_arrow_path(csv_path)
+    if path is not None:
+        if columns is not None:
+            available = player_table_columns(csv_path)
+            columns = [col for col in columns if col in available]
+        table = feather.read_table(path, columns=columns, memory_map=True)
+        # Bỏ metadata pandas để có cùng kiểu dữ liệu như khi đọc CSV (cột nguyên có null -> float64)
+        return table.to_pandas(ignore_metadata=True)
+    usecols = (lambda col: col in columns) if columns is not None else None
+    return pd.read_csv(csv_path, na_values=["N/A"], usecols=usecols)
+
+
+def load_player_table(csv_path, columns=None):
+    """Load result.csv (or only columns of it), preferring the memory-mapped .arrow copy unless the CSV is newer."""
+    with stage("read player table", columns=len(columns) if columns is not None else None) as span:
+        data_frame = _read_player_table(csv_path, columns)
+        span.rows_out = len(data_frame)
+    return data_frame
@@ -0,0 +1,19 @@
+"""
+Thư mục gốc chung cho các script (chứa csv/, page_cache/, histograms/ ...).
+
+Every script takes --output-dir (or the BTL_OUTPUT_DIR environment variable);
+without either it keeps using the original project folder. Result tables are
+kept under <root>/csv so each stage finds the files of the previous one.
+"""
+import argparse
+import os
+
+default_root_dir = r"C:\Users\DD\OneDrive\Documents\newfolder(2)\btlpython"
+
+
+def root_dir_from_args(default=default_root_dir):
+    """Root directory from --output-dir / BTL_OUTPUT_DIR (other command-line flags are ignored)."""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--output-dir", default=os.environ.get("BTL_OUTPUT_DIR", default))
+    args, _ = parser.parse_known_args()
+    return args.output_dir
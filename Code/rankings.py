@@ -0,0 +1,90 @@
+"""
+Xếp hạng top-k cao nhất / thấp nhất (khác 0) cho mọi chỉ số cùng lúc.
+
+The numeric columns are stacked into one matrix and the k-th best value of
+every column is found with a single np.partition call; only rows reaching that
+threshold are sorted, so the work per column is O(n) instead of two full
+sorts. Ties keep the original row order. The "lowest" side skips zeros, unless
+the whole column is zero, like the original top_3.txt logic. Groups with fewer
+than k eligible rows simply return fewer ranks.
+
+The result is a long DataFrame with one row per (statistic, direction, rank):
+    [group columns...], Statistic, Direction, Order, Rank, Player, Team, Value
+"""
+import numpy as np
+import pandas as pd
+
+
+def ordinal(n):
+    if 10 <= n % 100 <= 20:
+        suffix = "th"
+    else:
+        suffix = {1: "st", 2: "nd", 3: "rd"}.get(n % 10, "th")
+    return f"{n}{suffix}"
+
+
+def _top_rows(matrix, k):
+    # Trả về, cho mỗi cột, danh sách chỉ số dòng của k giá trị lớn nhất (bỏ -inf)
+    n_rows = matrix.shape[0]
+    kk = min(k, n_rows)
+    if kk == 0:
+        return [np.array([], dtype=int) for _ in range(matrix.shape[1])]
+    thresholds = np.partition(matrix, n_rows - kk, axis=0)[n_rows - kk]
+    candidates = (matrix >= thresholds) & np.isfinite(matrix)
+    top_rows = []
+    for j in range(matrix.shape[1]):
+        rows = np.flatnonzero(candidates[:, j])
+        order = np.lexsort((rows, -matrix[rows, j]))
+        top_rows.append(rows[order][:kk])
+    return top_rows
+
+
+def _rank_block(data, stat_columns, k, label_columns):
+    matrix = data[stat_columns].to_numpy(dtype="float64", na_value=np.nan)
+    highest = np.where(np.isnan(matrix), -np.inf, matrix)
+    all_zero = (np.nan_to_num(matrix) == 0).all(axis=0)
+    lowest = np.where((matrix > 0) | all_zero, -matrix, -np.inf)
+    lowest[np.isnan(lowest)] = -np.inf
+    statistics, directions, orders, rows, values = [], [], [], [], []
+    for direction, rows_per_stat in (("Highest", _top_rows(highest, k)), ("Lowest", _top_rows(lowest, k))):
+        for col, stat_rows in zip(stat_columns, rows_per_stat):
+            statistics.extend([col] * len(stat_rows))
+            directions.extend([direction] * len(stat_rows))
+            orders.extend(range(1, len(stat_rows) + 1))
+            rows.extend(stat_rows)
+            values.extend(data[col].iloc[stat_rows].tolist())
+    block = data[list(label_columns)].iloc[rows].reset_index(drop=True)
+    block.insert(0, "Statistic", statistics)
+    block.insert(1, "Direction", directions)
+    block.insert(2, "Order", orders)
+    block.insert(3, "Rank", [ordinal(order) for order in orders])
+    block["Value"] = pd.Series(values, dtype=object)
+    return block
+
+
+def top_k_rankings(data, stat_columns, k=3, group_by=None, label_columns=("Player", "Team")):
+    """Top-k highest and lowest non-zero rows of every stat, optionally per group."""
+    columns = ["Statistic", "Direction", "Order", "Rank", *label_columns, "Value"]
+    if group_by is None:
+        return _rank_block(data, stat_columns, k, label_columns)[columns]
+    group_keys = [group_by] if isinstance(group_by, str) else list(group_by)
+    extra_labels = [key for key in group_keys if key not in label_columns]
+    columns = group_keys + [col for col in columns if col not in group_keys]
+    blocks = [_rank_block(group, stat_columns, k, list(label_columns) + extra_labels)
+              for _, group in data.groupby(group_keys, sort=True)]
+    if not blocks:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(blocks, ignore_index=True)[columns]
+
+
+def write_rankings_text(rankings, path, k=3):
+    """Write the top_3.txt style report for an ungrouped top_k_rankings result."""
+    with open(path, "w", encoding="utf-8") as f:
+        for stat, stat_rows in rankings.groupby("Statistic", sort=False):
+            f.write(f"\nStatistic: {stat}\n")
+            for header, direction in (("\nTop {k} Highest:\n", "Highest"), ("\n\nTop {k} Lowest:\n", "Lowest")):
+                part = stat_rows[stat_rows["Direction"] == direction].copy()
+                part["Value"] = pd.to_numeric(part["Value"])
+                f.write(header.format(k=k))
+                f.write(part[["Rank", "Player", "Team", "Value"]].to_string(index=False))
+            f.write("\n" + "-" * 50 + "\n")
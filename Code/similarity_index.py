@@ -0,0 +1,178 @@
+"""
+Tìm cầu thủ có lối chơi tương tự trong không gian đặc trưng đã chuẩn hóa của bài 3.
+
+SimilarityIndex standardizes the 18 clustering features of every player in the
+pool (the same profile bai3.1.py / bai3.2.py cluster on) and keeps them as one
+contiguous float32 matrix. With the cosine metric the rows are L2-normalized
+once, so scoring a batch of query players against the whole pool is a single
+matrix product; the euclidean metric uses |q|^2 + |x|^2 - 2 q.x from the same
+product. Position, minutes and team filters are boolean masks applied before
+the top-k selection (argpartition, then a sort of only k entries per query).
+Queries are processed in chunks so memory stays bounded for large batches.
+
+The pool can be result.csv or any league/season selection of the partitioned
+dataset (player_dataset.py), e.g. several leagues and seasons at once.
+
+Usage:
+    python similarity_index.py "Bukayo Saka" "Rodri" [--result-csv result.csv | --dataset DIR [--league ...] [--season ...]]
+                               [--k 10] [--position FW MF] [--min-minutes 900] [--team ...] [--metric cosine|euclidean]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from cluster_model import cluster_features
+from name_index import fold_name
+
+info_columns = ["Player", "Team", "Position", "Minutes", "Player_ID"]
+
+
+class SimilarityIndex:
+    def __init__(self, data, features=cluster_features, metric="cosine", chunk_size=1024):
+        if metric not in ("cosine", "euclidean"):
+            raise ValueError(f"unknown metric {metric!r}")
+        self.features = list(features)
+        self.metric = metric
+        self.chunk_size = chunk_size
+        self.score_column = "Score" if metric == "cosine" else "Distance"
+        self.players = data[[col for col in data.columns if col not in self.features]].reset_index(drop=True)
+        X = data[self.features].astype("float64").fillna(0).to_numpy()
+        self.mean = X.mean(axis=0)
+        self.scale = X.std(axis=0)
+        self.scale[self.scale == 0] = 1.0
+        matrix = ((X - self.mean) / self.scale).astype(np.float32)
+        if metric == "cosine":
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix /= np.where(norms == 0, 1.0, norms)
+        self.matrix = np.ascontiguousarray(matrix)
+        self.squared_norms = np.einsum("ij,ij->i", self.matrix, self.matrix)
+        self.minutes = pd.to_numeric(self.players.get("Minutes", pd.Series(0, index=self.players.index)),
+                                     errors="coerce").fillna(0).to_numpy()
+        # Vị trí FBref có dạng "MF,FW": mỗi vị trí có sẵn một mặt nạ để lọc nhanh
+        positions = self.players.get("Position", pd.Series("", index=self.players.index)).fillna("").astype(str)
+        position_lists = positions.str.split(",")
+        self.position_masks = {position: position_lists.map(lambda values, p=position: p in values).to_numpy()
+                               for position in set(position_lists.explode())}
+        self.rows_by_id = {}
+        if "Player_ID" in self.players.columns:
+            for row, player_id in enumerate(self.players["Player_ID"]):
+                self.rows_by_id.setdefault(player_id, []).append(row)
+        self.rows_by_name = {}
+        for row, name in enumerate(self.players.get("Player", pd.Series(dtype=str))):
+            self.rows_by_name.setdefault(fold_name(name), []).append(row)
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    def find(self, player):
+        """Row numbers of a player given by Player_ID or by name (accents/case ignored)."""
+        if player in self.rows_by_id:
+            return np.array(self.rows_by_id[player], dtype=np.int64)
+        return np.array(self.rows_by_name.get(fold_name(player), []), dtype=np.int64)
+
+    def candidate_mask(self, positions=None, min_minutes=0, teams=None):
+        mask = self.minutes >= min_minutes
+        if positions:
+            position_mask = np.zeros(len(self), dtype=bool)
+            for position in positions:
+                position_mask |= self.position_masks.get(position, False)
+            mask &= position_mask
+        if teams:
+            mask &= self.players["Team"].isin(teams).to_numpy()
+        return mask
+
+    def _top_k(self, query_rows, candidates, k, exclude_self):
+        """Yield (chunk start, neighbour rows, scores) with k columns per query, best first."""
+        pool = self.matrix[candidates]
+        k = min(k, len(candidates))
+        for start in range(0, len(query_rows), self.chunk_size):
+            chunk = query_rows[start:start + self.chunk_size]
+            products = self.matrix[chunk] @ pool.T
+            if self.metric == "cosine":
+                scores = products
+            else:
+                # Khoảng cách càng nhỏ càng giống: đổi dấu bình phương khoảng cách để luôn chọn giá trị lớn nhất
+                scores = 2 * products - self.squared_norms[chunk][:, None] - self.squared_norms[candidates][None, :]
+            if exclude_self:
+                scores[candidates[None, :] == chunk[:, None]] = -np.inf
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind="stable")
+            yield start, candidates[np.take_along_axis(top, order, axis=1)], np.take_along_axis(top_scores, order, axis=1)
+
+    def query(self, players, k=10, positions=None, min_minutes=0, teams=None, exclude_self=True):
+        """Top-k similar players for each query player, as one DataFrame (Query, Rank, player columns, Score/Distance)."""
+        query_rows, query_labels = [], []
+        for player in players:
+            rows = self.find(player)
+            if not len(rows):
+                print(f"⚠️ Player not found in the pool: {player}")
+            query_rows.extend(rows)
+            query_labels.extend([player] * len(rows))
+        candidates = np.flatnonzero(self.candidate_mask(positions, min_minutes, teams))
+        if not query_rows or not len(candidates):
+            return pd.DataFrame(columns=["Query", "Rank"] + list(self.players.columns) + [self.score_column])
+        query_labels = np.array(query_labels, dtype=object)
+        frames = []
+        for start, neighbours, scores in self._top_k(np.array(query_rows, dtype=np.int64), candidates, k, exclude_self):
+            valid = np.isfinite(scores)
+            frame = self.players.iloc[neighbours[valid]].reset_index(drop=True)
+            frame.insert(0, "Rank", np.broadcast_to(np.arange(1, scores.shape[1] + 1), scores.shape)[valid])
+            frame.insert(0, "Query", np.repeat(query_labels[start:start + len(scores)], scores.shape[1])[valid.ravel()])
+            score = scores[valid]
+            frame[self.score_column] = np.round(score if self.metric == "cosine" else np.sqrt(np.maximum(-score, 0)), 4)
+            frames.append(frame)
+        return pd.concat(frames, ignore_index=True)
+
+
+def load_pool(result_csv=None, dataset_dir=None, leagues=None, seasons=None, features=cluster_features):
+    """Player pool with info + feature columns, from result.csv or from the partitioned dataset."""
+    columns = info_columns + list(features)
+    if dataset_dir:
+        from player_dataset import load_dataset
+
+        return load_dataset(dataset_dir, columns, leagues, seasons)
+    from player_table import load_player_table
+
+    return load_player_table(result_csv, columns)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find players with a similar statistical profile")
+    parser.add_argument("players", nargs="+", help="Player names or FBref Player_IDs")
+    parser.add_argument("--result-csv", default="result.csv")
+    parser.add_argument("--dataset", default=None, help="Partitioned dataset directory (instead of result.csv)")
+    parser.add_argument("--league", nargs="+", default=None)
+    parser.add_argument("--season", nargs="+", default=None)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--position", nargs="+", default=None, help="Keep candidates playing one of these (GK DF MF FW)")
+    parser.add_argument("--min-minutes", type=int, default=0)
+    parser.add_argument("--team", nargs="+", default=None)
+    parser.add_argument("--metric", choices=["cosine", "euclidean"], default="cosine")
+    parser.add_argument("--include-self", action="store_true", help="Keep the query player in its own results")
+    parser.add_argument("--out", default=None, help="Also write the results to this CSV")
+    args = parser.parse_args()
+
+    if args.dataset:
+        from player_dataset import matching_partitions
+
+        if not matching_partitions(args.dataset, args.league, args.season):
+            parser.exit(1, f"No partitions in {args.dataset} match the selected league(s)/season(s)\n")
+    start = time.perf_counter()
+    pool = load_pool(args.result_csv, args.dataset, args.league, args.season)
+    index = SimilarityIndex(pool, metric=args.metric)
+    build_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    neighbours = index.query(args.players, k=args.k, positions=args.position, min_minutes=args.min_minutes,
+                             teams=args.team, exclude_self=not args.include_self)
+    query_seconds = time.perf_counter() - start
+    print(f"🔎 Index of {len(index)} players built in {build_seconds * 1000:.1f} ms, "
+          f"{len(args.players)} query(ies) answered in {query_seconds * 1000:.1f} ms")
+    for query, group in neighbours.groupby("Query", sort=False):
+        print(f"\n{query}:")
+        print(group.drop(columns=["Query"]).to_string(index=False))
+    if args.out:
+        neighbours.to_csv(args.out, index=False, encoding="utf-8-sig")
+        print(f"✅ Saved {len(neighbours)} row(s) to {args.out}")
@@ -0,0 +1,58 @@
+"""
+Tính median / mean / std (và các thống kê khác) theo nhóm trong một lần groupby.
+
+summarize() replaces the per-team, per-column loop that built results2.csv:
+every statistic is computed for all groups and columns by a single grouped
+reduction (groupby().median() etc.), and the league row by one column-wise
+reduction over the same frame. Statistics are given by name:
+"median", "mean", "std", "min", "max", "count" or percentiles such as "p25" /
+"p90". The output layout matches results2.csv: one label column, then
+"<Stat> of <column>" for every column and statistic.
+"""
+import pandas as pd
+
+statistic_labels = {"median": "Median", "mean": "Mean", "std": "Std", "min": "Min", "max": "Max", "count": "Count"}
+
+
+def _statistic_label(statistic):
+    if statistic.startswith("p") and statistic[1:].isdigit():
+        return statistic.upper()
+    return statistic_labels[statistic]
+
+
+def summarize(data, stat_columns, group_by="Team", statistics=("median", "mean", "std"),
+              league_label="all", decimals=2):
+    """Summary table with a league row followed by one row per group (sorted)."""
+    group_keys = [group_by] if isinstance(group_by, str) else list(group_by)
+    plain = [stat for stat in statistics if not stat.startswith("p")]
+    percentiles = {stat: int(stat[1:]) / 100 for stat in statistics if stat.startswith("p")}
+
+    grouped = data.groupby(group_keys, sort=True)[stat_columns]
+    group_parts = {}
+    league_parts = {}
+    for stat in plain:
+        group_parts[stat] = getattr(grouped, stat)()
+        league_parts[stat] = getattr(data[stat_columns], stat)()
+    if percentiles:
+        quantiles = list(percentiles.values())
+        group_quantiles = grouped.quantile(quantiles)
+        league_quantiles = data[stat_columns].quantile(quantiles)
+        for stat, q in percentiles.items():
+            group_parts[stat] = group_quantiles.xs(q, level=-1)
+            league_parts[stat] = league_quantiles.loc[q]
+
+    ordered = [(col, stat) for col in stat_columns for stat in statistics]
+    labels = [f"{_statistic_label(stat)} of {col}" for col, stat in ordered]
+    group_table = pd.DataFrame({label: group_parts[stat][col] for label, (col, stat) in zip(labels, ordered)})
+    league_row = pd.DataFrame([{label: league_parts[stat][col] for label, (col, stat) in zip(labels, ordered)}])
+    group_table = group_table.round(decimals)
+    league_row = league_row.round(decimals)
+
+    if len(group_keys) == 1:
+        group_table.insert(0, "", group_table.index)
+        league_row.insert(0, "", league_label)
+    else:
+        for position, key in enumerate(group_keys):
+            group_table.insert(position, key, group_table.index.get_level_values(key))
+            league_row.insert(position, key, league_label)
+    return pd.concat([league_row, group_table.reset_index(drop=True)], ignore_index=True)
@@ -0,0 +1,331 @@
+"""
+Sinh dữ liệu giả có cùng cấu trúc với FBref / FootballTransfers để đo hiệu năng ở nhiều quy mô.
+
+make_players() builds a merged player table with the columns, dtypes and
+rough distributions of result.csv (minutes, per-90 rates, keeper-only stats,
+multi-role positions such as "MF,FW", 20 teams per league). From that table:
+  - make_pages() renders one FBref-shaped stats page per table id: the table
+    sits inside an HTML comment, has the two header rows FBref uses (so
+    pandas produces the "Unnamed: 1" / "Performance.6" names that
+    rename_columns_map expects) and player links carrying the Player_ID;
+  - make_valuations() / make_transfers() build the FootballTransfers tables,
+    with a share of names spelled differently so the fuzzy matching has work
+    to do;
+  - make_raw_columns() returns the raw text columns (ages like "27-123",
+    nations like "eng ENG", fees like "€41.6M") the cleaning helpers parse.
+Everything is vectorized and seeded, so a scale always produces the same data.
+
+Usage:
+    python synthetic_data.py OUT_DIR [--scale small|medium|large|N] [--seed 42] [--no-pages]
+writes OUT_DIR/csv/result.csv (+ .arrow), all_estimate_transfer_fee.csv,
+player_transfer_fee.csv and OUT_DIR/pages/<competition>/<season>/<table_id>.html,
+the layout bai1andbai2.py --steps merge --output-dir OUT_DIR reads.
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from fbref_config import (decimal_columns, default_competition, default_season, integer_columns, key_column,
+                          stat_urls_for, table_identifiers)
+
+# Số cầu thủ của từng quy mô (500 ~ một giải, 50k ~ nhiều giải nhiều mùa, 5M để thử giới hạn)
+scale_presets = {"small": 500, "medium": 50_000, "large": 5_000_000}
+teams_per_league = 20
+
+first_names = ["Bukayo", "Rodrigo", "Erling", "Mohamed", "Kevin", "Bruno", "Martin", "Declan", "Virgil", "Alexis",
+               "Cole", "Phil", "Joško", "André", "Emiliano", "Kai", "Gabriel", "Jérémy", "Mykhailo", "Bernardo",
+               "Luis", "Dominik", "Rúben", "Son", "Yoane", "Antoine", "Jarrod", "Ollie", "Morgan", "Ibrahima",
+               "Pedro", "Nicolás", "João", "Cristian", "Thiago", "Moisés", "Dejan", "Đorđe", "Lucas", "Matheus"]
+name_syllables = ["sa", "ka", "ro", "dri", "mar", "ti", "nel", "li", "haa", "land", "fer", "nan", "des", "gvar",
+                  "di", "ol", "ise", "bow", "en", "szo", "bo", "ma", "ro", "ri", "ce", "ko", "ne", "vic", "mu",
+                  "dyk", "ste", "ens", "ez", "ba", "lo", "ni", "go", "mez", "ta", "ra"]
+nations = ["ENG", "ESP", "FRA", "GER", "ITA", "POR", "NED", "BEL", "BRA", "ARG", "NOR", "DEN", "SCO", "WAL", "CRO",
+           "SRB", "URU", "COL", "NGA", "GHA", "SEN", "CIV", "MAR", "JPN", "KOR", "USA", "SUI", "AUT", "POL", "UKR"]
+positions = ["GK", "DF", "MF", "FW", "DF,MF", "MF,DF", "MF,FW", "FW,MF", "DF,FW"]
+position_weights = [0.08, 0.30, 0.22, 0.16, 0.06, 0.05, 0.06, 0.05, 0.02]
+keeper_columns = ["GA90", "Save%", "CS%", "PK Save%"]
+# Số trung bình mỗi 90 phút của các cột đếm (cột không có ở đây dùng 1.0)
+count_rates = {"Gls": 0.12, "Ast": 0.09, "crdY": 0.18, "crdR": 0.01, "PrgC": 1.8, "PrgP": 3.5, "PrgR": 3.5,
+               "Cmp": 32.0, "TotDist": 560.0, "Tkl": 1.6, "TklW": 1.0, "Deff Att": 1.9, "Lost": 0.9,
+               "Blocks": 1.1, "Sh": 0.4, "Pass": 0.7, "Int": 0.9, "Touches": 55.0, "Def Pen": 4.0,
+               "Def 3rd": 16.0, "Mid 3rd": 24.0, "Att 3rd": 14.0, "Att Pen": 2.0, "Take-Ons Att": 1.5,
+               "Carries": 30.0, "Carries 1_3": 1.1, "CPA": 0.4, "Mis": 1.3, "Dis": 1.0, "Rec": 30.0,
+               "Rec PrgR": 3.5, "Fls": 1.0, "Fld": 1.0, "Off": 0.15, "Crs": 1.2, "Recov": 4.5,
+               "Aerl Won": 1.3, "Aerl Lost": 1.2}
+
+
+def players_for_scale(scale):
+    """Number of players for a preset name (small / medium / large) or a plain number."""
+    if str(scale) in scale_presets:
+        return scale_presets[str(scale)]
+    return int(str(scale).replace("_", ""))
+
+
+def make_names(rng, n):
+    first = np.array(first_names, dtype=object)[rng.integers(0, len(first_names), n)]
+    syllables = np.array(name_syllables, dtype=object)
+    # Họ gồm 2-3 âm tiết: đủ nhiều tổ hợp để tên gần như không trùng ở quy mô vài triệu
+    last = (syllables[rng.integers(0, len(syllables), n)] + syllables[rng.integers(0, len(syllables), n)]
+            + np.where(rng.random(n) < 0.6, syllables[rng.integers(0, len(syllables), n)], ""))
+    last = pd.Series(last, dtype=object).str.capitalize()
+    return pd.Series(first, dtype=object) + " " + last
+
+
+def player_ids(n):
+    # Nhân với một số lẻ modulo 2^32 là song ánh: mã 8 ký tự hex không bao giờ trùng
+    values = (np.arange(n, dtype=np.uint64) * np.uint64(2654435761)) % np.uint64(2 ** 32)
+    return pd.Series([f"{value:08x}" for value in values.tolist()], dtype=object)
+
+
+def make_players(n, seed=42, players_per_team=25):
+    """Synthetic merged player table with the columns and dtypes of result.csv."""
+    from bai1andbai2 import target_columns
+
+    rng = np.random.default_rng(seed)
+    teams = max(teams_per_league, -(-n // players_per_team))
+    data = {
+        "Player": make_names(rng, n),
+        "Nation": pd.Series(np.array(nations, dtype=object)[rng.integers(0, len(nations), n)], dtype=object),
+        "Team": pd.Series([f"Team {team:05d}" for team in rng.integers(0, teams, n).tolist()], dtype=object),
+        "Position": pd.Series(rng.choice(np.array(positions, dtype=object), n, p=position_weights), dtype=object),
+        "Age": np.round(rng.uniform(16.5, 38.5, n), 2),
+    }
+    # build_result bỏ cầu thủ chơi không quá 90 phút: bắt đầu từ 91 để bảng ghép lại đủ n cầu thủ
+    minutes = rng.integers(91, 3421, n)
+    nineties = minutes / 90
+    matches = np.clip(np.ceil(minutes / rng.uniform(55, 90, n)), 1, 38).astype(np.int64)
+    data["Matches Played"] = matches
+    data["Starts"] = np.floor(matches * rng.uniform(0, 1, n)).astype(np.int64)
+    data["Minutes"] = minutes
+    is_keeper = data["Position"].to_numpy() == "GK"
+    attacking = np.select([is_keeper, data["Position"].str.startswith("DF").to_numpy(),
+                           data["Position"].str.startswith("MF").to_numpy()], [0.02, 0.4, 1.0], 2.5)
+    for col in integer_columns:
+        if col in data:
+            continue
+        rate = count_rates.get(col, 1.0) * (attacking if col in ("Gls", "Ast", "Off", "Att Pen", "CPA") else 1.0)
+        data[col] = rng.poisson(nineties * rate * rng.uniform(0.5, 1.5, n))
+    per_90 = {"Gls per 90": "Gls", "Ast per 90": "Ast"}
+    data["xG"] = np.round(data["Gls"] * rng.uniform(0.6, 1.4, n) + rng.uniform(0, 0.5, n), 2)
+    data["xAG"] = np.round(data["Ast"] * rng.uniform(0.6, 1.4, n) + rng.uniform(0, 0.5, n), 2)
+    for col in decimal_columns:
+        if col in data:
+            continue
+        if col in per_90:
+            values = data[per_90[col]] / nineties
+        elif col in ("xG per 90", "xAG per 90"):
+            values = data[col.split()[0]] / nineties
+        elif "%" in col:
+            values = rng.beta(6, 3, n) * 100
+        elif col in ("SCA", "GCA", "KP", "PPA", "CrsPA", "Pass into 1_3"):
+            values = rng.poisson(nineties * (2.5 if col == "SCA" else 0.8)).astype("float64")
+        elif col in ("SCA90", "GCA90", "SoT per 90"):
+            values = rng.gamma(2.0, 0.4 if col != "GCA90" else 0.08, n)
+        elif col == "GA90":
+            values = rng.gamma(4.0, 0.35, n)
+        elif col == "G per Sh":
+            values = rng.beta(1.5, 10, n)
+        elif col == "Dist":
+            values = rng.normal(17, 3, n)
+        elif col == "ProDist":
+            values = rng.poisson(nineties * 90).astype("float64")
+        else:
+            values = rng.gamma(2.0, 1.0, n)
+        data[col] = np.round(values, 2)
+    players = pd.DataFrame(data)
+    players.loc[~is_keeper, keeper_columns] = np.nan
+    # Một số cầu thủ không có thống kê sút / rê bóng, giống các ô trống trên FBref
+    players.loc[rng.random(n) < 0.05, ["SoT%", "G per Sh", "Dist", "Succ%", "Tkld%"]] = np.nan
+    for col in integer_columns:
+        players[col] = players[col].astype("Int64")
+    players[key_column] = player_ids(n)
+    return players[[col for col in target_columns if col in players.columns] + [key_column]]
+
+
+def fbref_ages(ages):
+    years = np.floor(ages).astype(np.int64)
+    days = np.minimum(np.round((ages - years) * 365).astype(np.int64), 364)
+    return years.astype(str) + "-" + days.astype(str).str.zfill(3)
+
+
+def make_raw_columns(players):
+    """Raw FBref / FootballTransfers text columns of the players (what cleaning.py parses)."""
+    rng = np.random.default_rng(len(players))
+    names = players["Player"].astype(str)
+    parts = names.str.split(" ", n=1)
+    # Một phần tên ở dạng "Họ, Tên" và có khoảng trắng thừa, như bảng cũ của FBref
+    reversed_names = parts.str[1] + ",  " + parts.str[0]
+    raw_names = names.where(rng.random(len(names)) < 0.8, reversed_names)
+    return pd.DataFrame({
+        "Player": raw_names,
+        "Age": fbref_ages(players["Age"]),
+        "Nation": players["Nation"].str[:2].str.lower() + " " + players["Nation"],
+        "Price": format_fees(rng.lognormal(15.5, 1.2, len(players))),
+    })
+
+
+def format_fees(values):
+    values = pd.Series(values)
+    millions = "€" + (values / 1_000_000).round(1).astype(str).str.replace(r"\.0$", "", regex=True) + "M"
+    thousands = "€" + (values / 1_000).round().astype(np.int64).astype(str) + "K"
+    return millions.where(values >= 1_000_000, thousands)
+
+
+def misspell(names, rng, share):
+    """Copy of names where share of them are spelled the way another site might spell them."""
+    names = names.astype(str).reset_index(drop=True)
+    changed = names.copy()
+    picked = np.flatnonzero(rng.random(len(names)) < share)
+    kind = rng.integers(0, 3, len(picked))
+    for position, how in zip(picked.tolist(), kind.tolist()):
+        name = names[position]
+        if how == 0 and len(name) > 4:
+            # Đảo hai ký tự liền nhau
+            cut = int(rng.integers(1, len(name) - 2))
+            changed[position] = name[:cut] + name[cut + 1] + name[cut] + name[cut + 2:]
+        elif how == 1:
+            changed[position] = name.replace("é", "e").replace("ø", "o").replace("ú", "u").replace("Đ", "D") + "s"
+        else:
+            changed[position] = name.lower().title()[:-1]
+    return changed
+
+
+def make_valuations(players, seed=42, coverage=0.9, misspelled=0.2):
+    """all_estimate_transfer_fee.csv: Player / Position / Price for coverage of the players."""
+    rng = np.random.default_rng(seed + 1)
+    listed = players[rng.random(len(players)) < coverage].reset_index(drop=True)
+    minutes = listed["Minutes"].astype("float64").to_numpy()
+    values = rng.lognormal(15.0, 1.0, len(listed)) * (0.3 + minutes / 3420)
+    valuations = pd.DataFrame({
+        "Player": misspell(listed["Player"], rng, misspelled),
+        "Position": listed["Position"].str.split(",").str[0],
+        "Price": format_fees(values),
+    })
+    return valuations.iloc[np.argsort(-values, kind="stable")].reset_index(drop=True)
+
+
+def make_transfers(players, seed=42, share=0.05):
+    """player_transfer_fee.csv: Player / Price for the few players with a confirmed transfer."""
+    rng = np.random.default_rng(seed + 2)
+    moved = players[(players["Minutes"] > 900) & (rng.random(len(players)) < share)]
+    return pd.DataFrame({"Player": moved["Player"].to_numpy(),
+                         "Price": format_fees(rng.lognormal(16.0, 1.0, len(moved))).to_numpy()})
+
+
+def page_columns(table_id):
+    """[(over-header text, result column or None)] of one FBref table, in column order."""
+    from bai1andbai2 import rename_columns_map
+
+    unnamed, groups = {}, {}
+    for source, target in rename_columns_map[table_id].items():
+        if source.startswith("Unnamed: "):
+            unnamed[int(source[len("Unnamed: "):])] = target
+            continue
+        group, _, occurrence = source.rpartition(".")
+        if not occurrence.isdigit():
+            group, occurrence = source, "0"
+        groups.setdefault(group, {})[int(occurrence)] = target
+    # pandas đặt tên ô tiêu đề trống là "Unnamed: <vị trí>" và thêm .1, .2 cho tên lặp lại;
+    # cột đầu của nhóm không đổi tên thì giữ tên nhóm (vd. "SCA" của bảng stats_gca)
+    pending = []
+    for group, targets in groups.items():
+        for occurrence in range(max(targets) + 1):
+            pending.append((group, targets.get(occurrence, group if occurrence == 0 else None)))
+    columns = []
+    while pending or len(columns) <= max(unnamed):
+        position = len(columns)
+        if position in unnamed:
+            columns.append(("", unnamed[position]))
+        elif pending and position > 0:
+            columns.append(pending.pop(0))
+        else:
+            columns.append(("", "Rk" if position == 0 else None))
+    return columns
+
+
+def _cells(players, col, rng):
+    if col == "Player":
+        slugs = players["Player"].astype(str).str.replace(" ", "-", regex=False)
+        return ('<td data-stat="player"><a href="/en/players/' + players[key_column].astype(str) + "/" + slugs
+                + '">' + players["Player"].astype(str) + "</a></td>")
+    if col == "Rk":
+        return "<th>" + pd.Series(np.arange(1, len(players) + 1), index=players.index).astype(str) + "</th>"
+    if col == "Age":
+        text = fbref_ages(players["Age"])
+    elif col == "Nation":
+        text = players["Nation"].str[:2].str.lower() + " " + players["Nation"]
+    elif col == "Minutes":
+        text = players["Minutes"].map("{:,}".format)
+    elif col in players.columns and col in integer_columns:
+        text = players[col].astype("string").fillna("")
+    elif col in players.columns and pd.api.types.is_numeric_dtype(players[col]):
+        text = players[col].round(2).astype("string").fillna("")
+    elif col in players.columns:
+        text = players[col].astype(str)
+    else:
+        # Cột FBref không dùng trong result.csv (vd. Live touches)
+        text = pd.Series(rng.integers(0, 100, len(players)), index=players.index).astype(str)
+    return "<td>" + text + "</td>"
+
+
+def make_page(players, table_id, seed=42):
+    """One FBref stats page (table inside an HTML comment) for the players."""
+    rng = np.random.default_rng(seed)
+    if table_id == "stats_keeper":
+        players = players[players["Position"] == "GK"]
+    columns = page_columns(table_id)
+    over_header = "".join(f"<th>{group}</th>" for group, _ in columns)
+    header = "".join(f"<th>{col or ''}</th>" for _, col in columns)
+    rows = pd.Series("<tr>", index=players.index, dtype=object)
+    for _, col in columns:
+        rows = rows + _cells(players, col, rng)
+    body = "\n".join((rows + "</tr>").tolist())
+    return (f"<html><head><title>{table_id}</title></head><body><div id=\"all_{table_id}\">\n<!--\n"
+            f"<table class=\"stats_table\" id=\"{table_id}\">\n<thead>\n<tr class=\"over_header\">{over_header}</tr>\n"
+            f"<tr>{header}</tr>\n</thead>\n<tbody>\n{body}\n</tbody>\n</table>\n-->\n</div></body></html>")
+
+
+def make_pages(players, competition=default_competition, season=default_season, seed=42):
+    """{url: page html} like fetch_pages returns for one competition and season."""
+    return {url: make_page(players, table_id, seed)
+            for url, table_id in zip(stat_urls_for(competition, season), table_identifiers)}
+
+
+def write_synthetic(out_dir, n, seed=42, pages=True, competition=default_competition, season=default_season):
+    """Write the synthetic result / valuation / transfer tables (and pages) under out_dir; returns the players."""
+    from player_table import write_player_table
+
+    csv_dir = os.path.join(out_dir, "csv")
+    os.makedirs(csv_dir, exist_ok=True)
+    players = make_players(n, seed)
+    result_csv_path = os.path.join(csv_dir, "result.csv")
+    players.to_csv(result_csv_path, index=False, encoding="utf-8-sig", na_rep="N/A")
+    write_player_table(players, result_csv_path)
+    make_valuations(players, seed).to_csv(os.path.join(csv_dir, "all_estimate_transfer_fee.csv"),
+                                          index=False, encoding="utf-8-sig")
+    make_transfers(players, seed).to_csv(os.path.join(csv_dir, "player_transfer_fee.csv"), index=False)
+    if pages:
+        pages_dir = os.path.join(out_dir, "pages", competition, season)
+        os.makedirs(pages_dir, exist_ok=True)
+        for table_id in table_identifiers:
+            with open(os.path.join(pages_dir, f"{table_id}.html"), "w", encoding="utf-8") as f:
+                f.write(make_page(players, table_id, seed))
+    return players
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate FBref-shaped synthetic data for benchmarks")
+    parser.add_argument("out_dir")
+    parser.add_argument("--scale", default="small", help="small (500), medium (50k), large (5M) or a number of players")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-pages", action="store_true", help="Only write the CSV tables")
+    args = parser.parse_args()
+
+    n = players_for_scale(args.scale)
+    start = time.perf_counter()
+    players = write_synthetic(args.out_dir, n, args.seed, pages=not args.no_pages)
+    print(f"✅ Wrote {len(players)} synthetic players ({players['Team'].nunique()} teams) to {args.out_dir} "
+          f"in {time.perf_counter() - start:.1f}s")
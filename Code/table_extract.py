@@ -0,0 +1,109 @@
+"""
+Trích xuất bảng FBref (kể cả bảng nằm trong comment HTML) trong một lượt quét.
+
+FBref ships most player tables inside <!-- --> comments. Instead of building a
+BeautifulSoup tree, re-parsing every comment and serialising the table back to
+a string, the raw page is scanned once for <table id=...> blocks and only those
+bytes are handed to pandas.
+"""
+import re
+from io import StringIO
+
+import lxml.html
+import pandas as pd
+
+from fbref_config import key_column
+
+table_pattern = re.compile(r'<table\b[^>]*?\bid="([^"]+)"[^>]*>.*?</table>', re.S | re.I)
+row_pattern = re.compile(r"<tr\b.*?</tr>", re.S | re.I)
+player_link_pattern = re.compile(r'href="/en/players/([^/"]+)/')
+
+
+class PlayerKeyError(Exception):
+    """Player keys that cannot be lined up with the rows of a table (the table would be dropped from the merge)."""
+
+
+def find_tables(page_source, table_ids=None):
+    """Return {table_id: table_html} for every table (or only table_ids) on the page."""
+    wanted = set(table_ids) if table_ids is not None else None
+    tables = {}
+    for match in table_pattern.finditer(page_source):
+        table_id = match.group(1)
+        if table_id in tables or (wanted is not None and table_id not in wanted):
+            continue
+        tables[table_id] = match.group(0)
+        if wanted is not None and len(tables) == len(wanted):
+            break
+    return tables
+
+
+def row_player_keys(table_html):
+    # Mã cầu thủ FBref của từng dòng dữ liệu (bỏ dòng tiêu đề đầu tiên, giống header=0)
+    rows = row_pattern.findall(table_html)[1:]
+    keys = []
+    for row in rows:
+        match = player_link_pattern.search(row)
+        keys.append(match.group(1) if match else None)
+    return keys
+
+
+def read_table(table_html):
+    """Parse one table fragment, adding a Player_ID column when rows link to FBref player pages."""
+    table_data = pd.read_html(StringIO(table_html), header=0, flavor="lxml")[0]
+    player_keys = row_player_keys(table_html)
+    if any(player_keys):
+        if len(player_keys) == len(table_data):
+            table_data[key_column] = player_keys
+        else:
+            raise PlayerKeyError(f"Player keys not aligned with table rows ({len(player_keys)} vs {len(table_data)})")
+    return table_data
+
+
+def extract_tables(page_source, table_ids=None):
+    """Return {table_id: DataFrame} for every table (or only table_ids) on the page."""
+    data_frames = {}
+    for table_id, table_html in find_tables(page_source, table_ids).items():
+        try:
+            data_frames[table_id] = read_table(table_html)
+        except PlayerKeyError as e:
+            raise PlayerKeyError(f"{table_id}: {e}") from e
+        except ValueError as e:
+            print(f"❌ Error reading table {table_id}: {e}")
+    return data_frames
+
+
+def class_xpath(class_name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+
+def cell_text(cell):
+    # Gần giống WebElement.text: mỗi đoạn text con nằm trên một dòng riêng
+    return "\n".join(part.strip() for part in cell.itertext() if part.strip())
+
+
+def table_row_cells(page_source, table_class):
+    """Return the <td> texts of every <tr> under the first element with class table_class."""
+    document = lxml.html.fromstring(page_source)
+    tables = document.xpath(f"//*[{class_xpath(table_class)}]")
+    if not tables:
+        return None
+    return [[cell_text(cell) for cell in row.xpath("./td")] for row in tables[0].iter("tr")]
+
+
+# Một lần execute_script trả về toàn bộ ô của bảng, thay cho find_elements/.text từng ô
+table_rows_script = """
+const table = document.getElementsByClassName(arguments[0])[0];
+if (!table) { return null; }
+return Array.from(table.querySelectorAll("tr"), row =>
+    Array.from(row.querySelectorAll(":scope > td"), cell => cell.innerText));
+"""
+
+
+def browser_row_cells(driver, table_class):
+    """Same rows as table_row_cells, read from a live WebDriver page in a single round-trip."""
+    return driver.execute_script(table_rows_script, table_class)
+
+
+def link_texts(page_source, container_class):
+    document = lxml.html.fromstring(page_source)
+    return [cell_text(link) for link in document.xpath(f"//*[{class_xpath(container_class)}]//a")]